@@ -5,40 +5,50 @@ PDX-Data: Basic Analysis Examples
 This script demonstrates common analysis patterns for the Portland property dataset.
 
 Requirements:
-    pip install pandas matplotlib seaborn
+    pip install pandas
 
 Usage:
     python basic_analysis.py
+    python basic_analysis.py --sample 0.01   # 1% stratified sample, weighted back up
 """
 
+import argparse
+import os
+import sys
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from pathlib import Path
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from arrow_io import read_frame
+from sampling import WEIGHT_COLUMN, load_sample
+from validation import valid_rows
+
 # Configuration
 DATA_DIR = Path(__file__).parent.parent / "subsets"
 HIGH_QUALITY_FILE = DATA_DIR / "high_quality_80pct.csv"
 PORTLAND_FILE = DATA_DIR / "portland_focused.csv"
 
-def load_data(filepath=PORTLAND_FILE, sample_size=None):
+def load_data(filepath=PORTLAND_FILE, sample_fraction=None, seed=0):
     """
-    Load property data from CSV file.
+    Load property data (memory-mapped from its Arrow copy when current).
     
     Args:
         filepath: Path to CSV file
-        sample_size: Optional number of rows to sample (for faster testing)
+        sample_fraction: Optional fraction to sample (for faster testing), stratified
+            by neighborhood and value tier; rows carry a sample_weight column
+        seed: Sample seed (the same seed always gives the same sample)
     
     Returns:
         pandas DataFrame
     """
     print(f"Loading data from {filepath.name}...")
     
-    if sample_size:
-        df = pd.read_csv(filepath, nrows=sample_size)
-        print(f"Loaded {len(df):,} rows (sample)")
+    if sample_fraction:
+        df = load_sample(str(filepath), fraction=sample_fraction, seed=seed)
+        print(f"Loaded {len(df):,} rows ({sample_fraction:.1%} stratified sample, "
+              f"weights scale to {df[WEIGHT_COLUMN].sum():,.0f} properties)")
     else:
-        df = pd.read_csv(filepath)
+        df = read_frame(str(filepath))
         print(f"Loaded {len(df):,} rows")
     
     return df
@@ -51,6 +61,8 @@ def basic_statistics(df):
     print("="*60)
     
     print(f"\nTotal Properties: {len(df):,}")
+    if WEIGHT_COLUMN in df.columns:
+        print(f"Estimated Total (weighted): {df[WEIGHT_COLUMN].sum():,.0f}")
     print(f"Unique Neighborhoods: {df['NEIGHBORHOOD'].nunique()}")
     print(f"Cities Covered: {df['CITY'].nunique()}")
     print(f"Date Range: {df.shape}")
@@ -69,8 +81,8 @@ def market_value_analysis(df):
     print("MARKET VALUE ANALYSIS")
     print("="*60)
     
-    # Filter to valid market values
-    df_valid = df[df['MARKET_VALUE'] > 0].copy()
+    # Market values that pass validation
+    df_valid = valid_rows(df, ['market_value_positive'])
     
     print(f"\nProperties with Market Value: {len(df_valid):,}")
     print(f"Mean Market Value: ${df_valid['MARKET_VALUE'].mean():,.0f}")
@@ -93,20 +105,23 @@ def neighborhood_rankings(df, top_n=15):
     
     # By count
     print("\n📊 Most Properties:")
-    counts = df['NEIGHBORHOOD'].value_counts().head(top_n)
+    if WEIGHT_COLUMN in df.columns:
+        counts = df.groupby('NEIGHBORHOOD')[WEIGHT_COLUMN].sum().round().astype(int).sort_values(ascending=False).head(top_n)
+    else:
+        counts = df['NEIGHBORHOOD'].value_counts().head(top_n)
     for i, (hood, count) in enumerate(counts.items(), 1):
         print(f"  {i:2d}. {hood:35s} {count:6,d} properties")
     
     # By median value
     print(f"\n💰 Highest Median Values:")
-    df_valid = df[df['MARKET_VALUE'] > 0].copy()
+    df_valid = valid_rows(df, ['market_value_positive'])
     medians = df_valid.groupby('NEIGHBORHOOD')['MARKET_VALUE'].median().sort_values(ascending=False).head(top_n)
     for i, (hood, value) in enumerate(medians.items(), 1):
         print(f"  {i:2d}. {hood:35s} ${value:9,.0f}")
     
     # By age
     print(f"\n🏛️ Oldest Average Building Age:")
-    df_built = df[df['YEAR_BUILT'] > 0].copy()
+    df_built = valid_rows(df, ['year_built_plausible']).copy()
     df_built['AGE'] = 2024 - df_built['YEAR_BUILT']
     ages = df_built.groupby('NEIGHBORHOOD')['AGE'].mean().sort_values(ascending=False).head(top_n)
     for i, (hood, age) in enumerate(ages.items(), 1):
@@ -119,8 +134,8 @@ def sales_analysis(df):
     print("SALES ACTIVITY ANALYSIS")
     print("="*60)
     
-    # Filter to properties with sale data
-    df_sales = df[df['SALE_PRICE'].notna() & (df['SALE_PRICE'] > 0)].copy()
+    # Arm's-length sales (no placeholders or nominal transfers)
+    df_sales = valid_rows(df, ['sale_price_arms_length']).copy()
     
     print(f"\nProperties with Sale Data: {len(df_sales):,}")
     print(f"Mean Sale Price: ${df_sales['SALE_PRICE'].mean():,.0f}")
@@ -152,7 +167,7 @@ def property_characteristics(df):
     print("="*60)
     
     # Square footage
-    df_sqft = df[df['SQUARE_FEET'] > 0].copy()
+    df_sqft = valid_rows(df, ['square_feet_positive'])
     print(f"\nSquare Footage Statistics:")
     print(f"  Mean: {df_sqft['SQUARE_FEET'].mean():,.0f} sq ft")
     print(f"  Median: {df_sqft['SQUARE_FEET'].median():,.0f} sq ft")
@@ -160,7 +175,7 @@ def property_characteristics(df):
     print(f"  75th percentile: {df_sqft['SQUARE_FEET'].quantile(0.75):,.0f} sq ft")
     
     # Year built
-    df_built = df[df['YEAR_BUILT'] > 0].copy()
+    df_built = valid_rows(df, ['year_built_plausible']).copy()
     print(f"\nYear Built Statistics:")
     print(f"  Oldest: {df_built['YEAR_BUILT'].min():.0f}")
     print(f"  Newest: {df_built['YEAR_BUILT'].max():.0f}")
@@ -182,11 +197,8 @@ def price_per_sqft_analysis(df):
     print("="*60)
     
     # Filter to valid data
-    df_calc = df[
-        (df['MARKET_VALUE'] > 0) & 
-        (df['SQUARE_FEET'] > 0) & 
-        (df['SQUARE_FEET'] < 10000)  # Filter outliers
-    ].copy()
+    df_calc = valid_rows(df, ['market_value_positive', 'square_feet_positive'])
+    df_calc = df_calc[df_calc['SQUARE_FEET'] < 10000].copy()  # Filter outliers
     
     df_calc['PRICE_PER_SQFT'] = df_calc['MARKET_VALUE'] / df_calc['SQUARE_FEET']
     
@@ -204,8 +216,13 @@ def price_per_sqft_analysis(df):
         print(f"  {i:2d}. {hood:35s} ${row['median']:6.2f}/sqft ({int(row['count'])} properties)")
 
 
-def main():
+def main(argv=None):
     """Run all analysis examples."""
+    parser = argparse.ArgumentParser(description="Basic analysis of the Portland-focused subset")
+    parser.add_argument("--sample", type=float, metavar="FRACTION",
+                        help="Analyze a stratified sample, e.g. 0.01 for 1%%")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
     
     # Check if data files exist
     if not PORTLAND_FILE.exists():
@@ -215,7 +232,7 @@ def main():
         return
     
     # Load data
-    df = load_data(PORTLAND_FILE)
+    df = load_data(PORTLAND_FILE, sample_fraction=args.sample, seed=args.seed)
     
     # Run analyses
     basic_statistics(df)
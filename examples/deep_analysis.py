@@ -1,283 +1,366 @@
+import argparse
+import os
+import sys
 import pandas as pd
 import numpy as np
-from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
-print("🔬 DEEP ANALYSIS: Portland Property Data")
-print("=" * 80)
-print("\nLoading high-quality dataset...\n")
-
-# Load the cleanest dataset
-df = pd.read_csv("subsets/complete_core_fields.csv", low_memory=False)
-print(f"Analyzing {len(df):,} properties with complete core data\n")
-
-# Convert types
-df['YEAR_BUILT'] = pd.to_numeric(df['YEAR_BUILT'], errors='coerce')
-df['MARKET_VALUE'] = pd.to_numeric(df['MARKET_VALUE'], errors='coerce')
-df['SQUARE_FEET'] = pd.to_numeric(df['SQUARE_FEET'], errors='coerce')
-df['SALE_PRICE'] = pd.to_numeric(df['SALE_PRICE'], errors='coerce')
-df['SALE_DATE'] = pd.to_datetime(df['SALE_DATE'], errors='coerce')
-
-# Calculate derived metrics
-df['price_per_sqft'] = df['MARKET_VALUE'] / df['SQUARE_FEET']
-df['building_age'] = 2025 - df['YEAR_BUILT']
-df['value_category'] = pd.cut(df['MARKET_VALUE'], 
-                               bins=[0, 250000, 500000, 750000, 1000000, np.inf],
-                               labels=['<250K', '250-500K', '500-750K', '750K-1M', '>1M'])
-
-print("=" * 80)
-print("🏠 INSIGHT #1: THE NEIGHBORHOOD WEALTH GRADIENT")
-print("=" * 80)
-
-neighborhood_wealth = df.groupby('neighborhood').agg({
-    'MARKET_VALUE': ['median', 'mean', 'std', 'count'],
-    'price_per_sqft': 'median',
-    'YEAR_BUILT': 'median'
-}).round(0)
-
-neighborhood_wealth.columns = ['median_value', 'mean_value', 'value_std', 'properties', 'price_per_sqft', 'median_year']
-neighborhood_wealth['inequality_index'] = neighborhood_wealth['value_std'] / neighborhood_wealth['mean_value']
-neighborhood_wealth = neighborhood_wealth[neighborhood_wealth['properties'] >= 100]  # min 100 properties
-
-print("\n📈 TOP 15 MOST VALUABLE NEIGHBORHOODS:\n")
-top_wealth = neighborhood_wealth.sort_values('median_value', ascending=False).head(15)
-for idx, (hood, row) in enumerate(top_wealth.iterrows(), 1):
-    print(f"{idx:2d}. {hood[:40]:<40} ${row['median_value']:>10,.0f}  (${row['price_per_sqft']:>4,.0f}/sqft)")
-
-print("\n📉 BOTTOM 10 NEIGHBORHOODS (OPPORTUNITY ZONES?):\n")
-bottom_wealth = neighborhood_wealth.sort_values('median_value', ascending=True).head(10)
-for idx, (hood, row) in enumerate(bottom_wealth.iterrows(), 1):
-    print(f"{idx:2d}. {hood[:40]:<40} ${row['median_value']:>10,.0f}  ({int(row['properties']):,} props)")
-
-print("\n💎 HIGHEST INEQUALITY (Rich/Poor Mix):\n")
-inequality = neighborhood_wealth.sort_values('inequality_index', ascending=False).head(10)
-for idx, (hood, row) in enumerate(inequality.iterrows(), 1):
-    print(f"{idx:2d}. {hood[:40]:<40} Index: {row['inequality_index']:.2f}  (More diverse = higher)")
-
-print("\n\n" + "=" * 80)
-print("🏗️  INSIGHT #2: THE BUILDING BOOM TIMELINE")
-print("=" * 80)
-
-# Building activity by decade
-df['decade'] = (df['YEAR_BUILT'] // 10) * 10
-decade_stats = df[df['YEAR_BUILT'] >= 1900].groupby('decade').agg({
-    'PROPERTY_ID': 'count',
-    'MARKET_VALUE': 'median',
-    'SQUARE_FEET': 'median'
-}).round(0)
-decade_stats.columns = ['properties_built', 'current_median_value', 'median_sqft']
-
-print("\nPortland's Construction Waves:\n")
-for decade, row in decade_stats.iterrows():
-    pct = (row['properties_built'] / len(df)) * 100
-    bar = '█' * int(pct * 2)
-    print(f"{int(decade)}s: {bar:<30} {int(row['properties_built']):>7,} ({pct:>4.1f}%)  Value: ${row['current_median_value']:>8,.0f}")
-
-# Find the boom periods
-top_decades = decade_stats.nlargest(3, 'properties_built')
-print(f"\n🔥 Biggest Building Booms: {', '.join([f'{int(d)}s' for d in top_decades.index])}")
-
-print("\n\n" + "=" * 80)
-print("💰 INSIGHT #3: VALUE DEPRECIATION CURVES")
-print("=" * 80)
-
-# How does value change with building age?
-age_groups = pd.cut(df['building_age'], bins=[0, 10, 20, 30, 50, 75, 100, 150], 
-                    labels=['0-10yr', '10-20yr', '20-30yr', '30-50yr', '50-75yr', '75-100yr', '100+yr'])
-df['age_group'] = age_groups
-
-age_value = df.groupby('age_group').agg({
-    'MARKET_VALUE': ['median', 'mean'],
-    'price_per_sqft': 'median',
-    'PROPERTY_ID': 'count'
-}).round(0)
-
-print("\nValue by Building Age (Vintage Premium?):\n")
-print(f"{'Age Group':<12} {'Count':<10} {'Median Value':<15} {'$/sqft':<10} {'Vintage Premium'}")
-print("-" * 70)
-
-baseline_value = age_value.iloc[2][('MARKET_VALUE', 'median')]  # 20-30 year old as baseline
-for age, row in age_value.iterrows():
-    count = int(row[('PROPERTY_ID', 'count')])
-    median_val = row[('MARKET_VALUE', 'median')]
-    price_sqft = row[('price_per_sqft', 'median')]
-    premium = ((median_val / baseline_value) - 1) * 100
-    indicator = "📈" if premium > 10 else "📉" if premium < -10 else "➡️"
-    print(f"{str(age):<12} {count:<10,} ${median_val:<13,.0f} ${price_sqft:<8,.0f} {indicator} {premium:>+6.1f}%")
-
-print("\n\n" + "=" * 80)
-print("🎯 INSIGHT #4: THE SQUARE FOOTAGE SWEET SPOT")
-print("=" * 80)
-
-# Optimal size analysis
-size_bins = [0, 800, 1200, 1600, 2000, 2500, 3000, 4000, 10000]
-size_labels = ['<800', '800-1.2K', '1.2-1.6K', '1.6-2K', '2-2.5K', '2.5-3K', '3-4K', '>4K']
-df['size_category'] = pd.cut(df['SQUARE_FEET'], bins=size_bins, labels=size_labels)
-
-size_value = df.groupby('size_category').agg({
-    'MARKET_VALUE': 'median',
-    'price_per_sqft': 'median',
-    'PROPERTY_ID': 'count'
-})
-
-print("\nValue Efficiency by Property Size:\n")
-print(f"{'Size (sqft)':<12} {'Count':<10} {'Median Value':<15} {'$/sqft':<12} {'Efficiency'}")
-print("-" * 70)
-
-max_efficiency = size_value['price_per_sqft'].max()
-for size, row in size_value.iterrows():
-    count = int(row['PROPERTY_ID'])
-    if count < 1000:
-        continue
-    efficiency = (row['price_per_sqft'] / max_efficiency) * 100
-    stars = '⭐' * int(efficiency / 20)
-    print(f"{str(size):<12} {count:<10,} ${row['MARKET_VALUE']:<13,.0f} ${row['price_per_sqft']:<10,.0f} {stars}")
-
-optimal_size = size_value['price_per_sqft'].idxmax()
-print(f"\n💡 HIGHEST $/SQFT: {optimal_size} square feet (Most market demand)")
-
-print("\n\n" + "=" * 80)
-print("🚀 INSIGHT #5: HIDDEN GEMS - UNDERVALUED NEIGHBORHOODS")
-print("=" * 80)
-
-# Find neighborhoods with low prices but good fundamentals
-neighborhood_metrics = df.groupby('neighborhood').agg({
-    'MARKET_VALUE': 'median',
-    'price_per_sqft': 'median',
-    'YEAR_BUILT': 'median',
-    'SQUARE_FEET': 'median',
-    'PROPERTY_ID': 'count'
-})
-
-neighborhood_metrics = neighborhood_metrics[neighborhood_metrics['PROPERTY_ID'] >= 200]
-neighborhood_metrics['value_rank'] = neighborhood_metrics['MARKET_VALUE'].rank(pct=True)
-neighborhood_metrics['quality_score'] = (
-    neighborhood_metrics['SQUARE_FEET'].rank(pct=True) + 
-    (2025 - neighborhood_metrics['YEAR_BUILT']).rank(pct=True, ascending=False)
-) / 2
-
-neighborhood_metrics['opportunity_score'] = (
-    neighborhood_metrics['quality_score'] - neighborhood_metrics['value_rank']
-)
-
-print("\nTop 15 Undervalued Neighborhoods (Good Quality, Lower Price):\n")
-opportunities = neighborhood_metrics.sort_values('opportunity_score', ascending=False).head(15)
-for idx, (hood, row) in enumerate(opportunities.iterrows(), 1):
-    print(f"{idx:2d}. {hood[:40]:<40} ${row['MARKET_VALUE']:>8,.0f}  Score: {row['opportunity_score']:>+5.2f}")
-
-print("\n\n" + "=" * 80)
-print("📊 INSIGHT #6: OWNERSHIP CONCENTRATION PATTERNS")
-print("=" * 80)
-
-# Find large property owners
-owner_counts = df['OWNER'].value_counts()
-large_owners = owner_counts[owner_counts >= 10].head(20)
-
-print("\nTop Property Owners (Portfolio Size):\n")
-for idx, (owner, count) in enumerate(large_owners.items(), 1):
-    owner_value = df[df['OWNER'] == owner]['MARKET_VALUE'].sum()
-    median_prop_value = df[df['OWNER'] == owner]['MARKET_VALUE'].median()
-    print(f"{idx:2d}. {owner[:50]:<50} {count:>4} props  ${owner_value/1e6:>6.1f}M  (${median_prop_value:>8,.0f} median)")
-
-print("\n\n" + "=" * 80)
-print("🌍 INSIGHT #7: GEOGRAPHIC VALUE CLUSTERING")
-print("=" * 80)
-
-# Analyze spatial patterns using coordinates
-coords_df = df[(df['LATITUDE'].notna()) & (df['LONGITUDE'].notna())].copy()
-
-# Create rough geographic zones
-coords_df['lat_zone'] = pd.cut(coords_df['LATITUDE'], bins=10, labels=False)
-coords_df['lon_zone'] = pd.cut(coords_df['LONGITUDE'], bins=10, labels=False)
-coords_df['geo_zone'] = coords_df['lat_zone'].astype(str) + '_' + coords_df['lon_zone'].astype(str)
-
-geo_value = coords_df.groupby('geo_zone').agg({
-    'MARKET_VALUE': 'median',
-    'PROPERTY_ID': 'count',
-    'LATITUDE': 'mean',
-    'LONGITUDE': 'mean'
-})
-geo_value = geo_value[geo_value['PROPERTY_ID'] >= 100]
-
-print(f"\nIdentified {len(geo_value)} geographic value clusters")
-print(f"Value Range: ${geo_value['MARKET_VALUE'].min():,.0f} - ${geo_value['MARKET_VALUE'].max():,.0f}")
-print(f"Geographic Disparity: {geo_value['MARKET_VALUE'].max() / geo_value['MARKET_VALUE'].min():.1f}x difference")
-
-print("\n\n" + "=" * 80)
-print("⏰ INSIGHT #8: MARKET TIMING - SALES VELOCITY")
-print("=" * 80)
-
-# Analyze sale patterns
-sales_df = df[df['SALE_DATE'].notna()].copy()
-sales_df['sale_year'] = sales_df['SALE_DATE'].dt.year
-sales_df['sale_month'] = sales_df['SALE_DATE'].dt.month
-
-recent_sales = sales_df[sales_df['sale_year'] >= 2020]
-if len(recent_sales) > 0:
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from arrow_io import read_frame
+from insights import Insight, RENDERERS, render, run_report, write_output
+
+DATASET = "subsets/complete_core_fields.csv"
+TITLE = "🔬 DEEP ANALYSIS: Portland Property Data"
+WIDTH = 80
+
+
+def load():
+    # Progress goes to stderr so --format json/markdown output stays clean
+    print("\nLoading high-quality dataset...\n", file=sys.stderr)
+
+    # Load the cleanest dataset
+    df = read_frame(DATASET)
+    print(f"Analyzing {len(df):,} properties with complete core data\n", file=sys.stderr)
+
+    # Convert types
+    df['YEAR_BUILT'] = pd.to_numeric(df['YEAR_BUILT'], errors='coerce')
+    df['MARKET_VALUE'] = pd.to_numeric(df['MARKET_VALUE'], errors='coerce')
+    df['SQUARE_FEET'] = pd.to_numeric(df['SQUARE_FEET'], errors='coerce')
+    df['SALE_PRICE'] = pd.to_numeric(df['SALE_PRICE'], errors='coerce')
+    df['SALE_DATE'] = pd.to_datetime(df['SALE_DATE'], errors='coerce')
+
+    # Calculate derived metrics
+    df['price_per_sqft'] = df['MARKET_VALUE'] / df['SQUARE_FEET']
+    df['building_age'] = 2025 - df['YEAR_BUILT']
+    df['value_category'] = pd.cut(df['MARKET_VALUE'],
+                                   bins=[0, 250000, 500000, 750000, 1000000, np.inf],
+                                   labels=['<250K', '250-500K', '500-750K', '750K-1M', '>1M'])
+    return df
+
+
+# Each insight computes an Insight (scalars + tables); show_* turns one into terminal lines
+
+def wealth_gradient(df):
+    neighborhood_wealth = df.groupby('neighborhood').agg({
+        'MARKET_VALUE': ['median', 'mean', 'std', 'count'],
+        'price_per_sqft': 'median',
+        'YEAR_BUILT': 'median'
+    }).round(0)
+
+    neighborhood_wealth.columns = ['median_value', 'mean_value', 'value_std', 'properties', 'price_per_sqft', 'median_year']
+    neighborhood_wealth['inequality_index'] = neighborhood_wealth['value_std'] / neighborhood_wealth['mean_value']
+    neighborhood_wealth = neighborhood_wealth[neighborhood_wealth['properties'] >= 100]  # min 100 properties
+
+    return Insight("wealth_gradient", "🏠 INSIGHT #1: THE NEIGHBORHOOD WEALTH GRADIENT", tables={
+        "top_wealth": neighborhood_wealth.sort_values('median_value', ascending=False).head(15),
+        "bottom_wealth": neighborhood_wealth.sort_values('median_value', ascending=True).head(10),
+        "inequality": neighborhood_wealth.sort_values('inequality_index', ascending=False).head(10),
+    })
+
+
+def show_wealth_gradient(insight):
+    yield "\n📈 TOP 15 MOST VALUABLE NEIGHBORHOODS:\n"
+    for idx, (hood, row) in enumerate(insight.tables["top_wealth"].iterrows(), 1):
+        yield f"{idx:2d}. {hood[:40]:<40} ${row['median_value']:>10,.0f}  (${row['price_per_sqft']:>4,.0f}/sqft)"
+
+    yield "\n📉 BOTTOM 10 NEIGHBORHOODS (OPPORTUNITY ZONES?):\n"
+    for idx, (hood, row) in enumerate(insight.tables["bottom_wealth"].iterrows(), 1):
+        yield f"{idx:2d}. {hood[:40]:<40} ${row['median_value']:>10,.0f}  ({int(row['properties']):,} props)"
+
+    yield "\n💎 HIGHEST INEQUALITY (Rich/Poor Mix):\n"
+    for idx, (hood, row) in enumerate(insight.tables["inequality"].iterrows(), 1):
+        yield f"{idx:2d}. {hood[:40]:<40} Index: {row['inequality_index']:.2f}  (More diverse = higher)"
+
+
+def building_booms(df):
+    # Building activity by decade
+    decade = (df['YEAR_BUILT'] // 10) * 10
+    decade_stats = df[df['YEAR_BUILT'] >= 1900].groupby(decade.rename('decade')).agg({
+        'PROPERTY_ID': 'count',
+        'MARKET_VALUE': 'median',
+        'SQUARE_FEET': 'median'
+    }).round(0)
+    decade_stats.columns = ['properties_built', 'current_median_value', 'median_sqft']
+    decade_stats['pct_of_stock'] = decade_stats['properties_built'] / len(df) * 100
+
+    # Find the boom periods
+    top_decades = decade_stats.nlargest(3, 'properties_built')
+    return Insight("building_booms", "🏗️  INSIGHT #2: THE BUILDING BOOM TIMELINE",
+                   scalars={"boom_decades": [int(d) for d in top_decades.index]},
+                   tables={"decades": decade_stats})
+
+
+def show_building_booms(insight):
+    yield "\nPortland's Construction Waves:\n"
+    for decade, row in insight.tables["decades"].iterrows():
+        pct = row['pct_of_stock']
+        bar = '█' * int(pct * 2)
+        yield f"{int(decade)}s: {bar:<30} {int(row['properties_built']):>7,} ({pct:>4.1f}%)  Value: ${row['current_median_value']:>8,.0f}"
+
+    yield f"\n🔥 Biggest Building Booms: {', '.join([f'{d}s' for d in insight.scalars['boom_decades']])}"
+
+
+def depreciation_curves(df):
+    # How does value change with building age?
+    age_group = pd.cut(df['building_age'], bins=[0, 10, 20, 30, 50, 75, 100, 150],
+                       labels=['0-10yr', '10-20yr', '20-30yr', '30-50yr', '50-75yr', '75-100yr', '100+yr'])
+
+    age_value = df.groupby(age_group.rename('age_group')).agg({
+        'MARKET_VALUE': ['median', 'mean'],
+        'price_per_sqft': 'median',
+        'PROPERTY_ID': 'count'
+    }).round(0)
+    age_value.columns = ['median_value', 'mean_value', 'price_per_sqft', 'properties']
+
+    baseline_value = age_value['median_value'].iloc[2]  # 20-30 year old as baseline
+    age_value['vintage_premium'] = ((age_value['median_value'] / baseline_value) - 1) * 100
+    return Insight("depreciation_curves", "💰 INSIGHT #3: VALUE DEPRECIATION CURVES",
+                   scalars={"baseline_value": baseline_value}, tables={"age_value": age_value})
+
+
+def show_depreciation_curves(insight):
+    yield "\nValue by Building Age (Vintage Premium?):\n"
+    yield f"{'Age Group':<12} {'Count':<10} {'Median Value':<15} {'$/sqft':<10} {'Vintage Premium'}"
+    yield "-" * 70
+
+    for age, row in insight.tables["age_value"].iterrows():
+        premium = row['vintage_premium']
+        indicator = "📈" if premium > 10 else "📉" if premium < -10 else "➡️"
+        yield f"{str(age):<12} {int(row['properties']):<10,} ${row['median_value']:<13,.0f} ${row['price_per_sqft']:<8,.0f} {indicator} {premium:>+6.1f}%"
+
+
+def size_sweet_spot(df):
+    # Optimal size analysis
+    size_bins = [0, 800, 1200, 1600, 2000, 2500, 3000, 4000, 10000]
+    size_labels = ['<800', '800-1.2K', '1.2-1.6K', '1.6-2K', '2-2.5K', '2.5-3K', '3-4K', '>4K']
+    size_category = pd.cut(df['SQUARE_FEET'], bins=size_bins, labels=size_labels)
+
+    size_value = df.groupby(size_category.rename('size_category')).agg({
+        'MARKET_VALUE': 'median',
+        'price_per_sqft': 'median',
+        'PROPERTY_ID': 'count'
+    })
+    size_value['efficiency'] = size_value['price_per_sqft'] / size_value['price_per_sqft'].max() * 100
+
+    return Insight("size_sweet_spot", "🎯 INSIGHT #4: THE SQUARE FOOTAGE SWEET SPOT",
+                   scalars={"optimal_size": str(size_value['price_per_sqft'].idxmax())},
+                   tables={"size_value": size_value})
+
+
+def show_size_sweet_spot(insight):
+    yield "\nValue Efficiency by Property Size:\n"
+    yield f"{'Size (sqft)':<12} {'Count':<10} {'Median Value':<15} {'$/sqft':<12} {'Efficiency'}"
+    yield "-" * 70
+
+    for size, row in insight.tables["size_value"].iterrows():
+        count = int(row['PROPERTY_ID'])
+        if count < 1000:
+            continue
+        stars = '⭐' * int(row['efficiency'] / 20)
+        yield f"{str(size):<12} {count:<10,} ${row['MARKET_VALUE']:<13,.0f} ${row['price_per_sqft']:<10,.0f} {stars}"
+
+    yield f"\n💡 HIGHEST $/SQFT: {insight.scalars['optimal_size']} square feet (Most market demand)"
+
+
+def hidden_gems(df):
+    # Find neighborhoods with low prices but good fundamentals
+    neighborhood_metrics = df.groupby('neighborhood').agg({
+        'MARKET_VALUE': 'median',
+        'price_per_sqft': 'median',
+        'YEAR_BUILT': 'median',
+        'SQUARE_FEET': 'median',
+        'PROPERTY_ID': 'count'
+    })
+
+    neighborhood_metrics = neighborhood_metrics[neighborhood_metrics['PROPERTY_ID'] >= 200]
+    neighborhood_metrics['value_rank'] = neighborhood_metrics['MARKET_VALUE'].rank(pct=True)
+    neighborhood_metrics['quality_score'] = (
+        neighborhood_metrics['SQUARE_FEET'].rank(pct=True) +
+        (2025 - neighborhood_metrics['YEAR_BUILT']).rank(pct=True, ascending=False)
+    ) / 2
+
+    neighborhood_metrics['opportunity_score'] = (
+        neighborhood_metrics['quality_score'] - neighborhood_metrics['value_rank']
+    )
+
+    return Insight("hidden_gems", "🚀 INSIGHT #5: HIDDEN GEMS - UNDERVALUED NEIGHBORHOODS", tables={
+        "opportunities": neighborhood_metrics.sort_values('opportunity_score', ascending=False).head(15),
+    })
+
+
+def show_hidden_gems(insight):
+    yield "\nTop 15 Undervalued Neighborhoods (Good Quality, Lower Price):\n"
+    for idx, (hood, row) in enumerate(insight.tables["opportunities"].iterrows(), 1):
+        yield f"{idx:2d}. {hood[:40]:<40} ${row['MARKET_VALUE']:>8,.0f}  Score: {row['opportunity_score']:>+5.2f}"
+
+
+def ownership_concentration(df):
+    # Find large property owners
+    owner_counts = df['OWNER'].value_counts()
+    large_owners = owner_counts[owner_counts >= 10].head(20)
+
+    owner_values = df[df['OWNER'].isin(large_owners.index)].groupby('OWNER')['MARKET_VALUE'].agg(['sum', 'median'])
+    owner_values = owner_values.reindex(large_owners.index)
+    portfolios = pd.DataFrame({
+        'properties': large_owners,
+        'total_value': owner_values['sum'],
+        'median_value': owner_values['median'],
+    })
+    portfolios.index.name = 'OWNER'
+    return Insight("ownership_concentration", "📊 INSIGHT #6: OWNERSHIP CONCENTRATION PATTERNS",
+                   tables={"large_owners": portfolios})
+
+
+def show_ownership_concentration(insight):
+    yield "\nTop Property Owners (Portfolio Size):\n"
+    for idx, (owner, row) in enumerate(insight.tables["large_owners"].iterrows(), 1):
+        yield f"{idx:2d}. {owner[:50]:<50} {int(row['properties']):>4} props  ${row['total_value']/1e6:>6.1f}M  (${row['median_value']:>8,.0f} median)"
+
+
+def geographic_clustering(df):
+    # Analyze spatial patterns using coordinates
+    coords_df = df[(df['LATITUDE'].notna()) & (df['LONGITUDE'].notna())].copy()
+
+    # Create rough geographic zones
+    coords_df['lat_zone'] = pd.cut(coords_df['LATITUDE'], bins=10, labels=False)
+    coords_df['lon_zone'] = pd.cut(coords_df['LONGITUDE'], bins=10, labels=False)
+    coords_df['geo_zone'] = coords_df['lat_zone'].astype(str) + '_' + coords_df['lon_zone'].astype(str)
+
+    geo_value = coords_df.groupby('geo_zone').agg({
+        'MARKET_VALUE': 'median',
+        'PROPERTY_ID': 'count',
+        'LATITUDE': 'mean',
+        'LONGITUDE': 'mean'
+    })
+    geo_value = geo_value[geo_value['PROPERTY_ID'] >= 100]
+
+    return Insight("geographic_clustering", "🌍 INSIGHT #7: GEOGRAPHIC VALUE CLUSTERING", scalars={
+        "clusters": len(geo_value),
+        "min_value": geo_value['MARKET_VALUE'].min(),
+        "max_value": geo_value['MARKET_VALUE'].max(),
+        "disparity": geo_value['MARKET_VALUE'].max() / geo_value['MARKET_VALUE'].min(),
+    }, tables={"zones": geo_value})
+
+
+def show_geographic_clustering(insight):
+    scalars = insight.scalars
+    yield f"\nIdentified {scalars['clusters']} geographic value clusters"
+    yield f"Value Range: ${scalars['min_value']:,.0f} - ${scalars['max_value']:,.0f}"
+    yield f"Geographic Disparity: {scalars['disparity']:.1f}x difference"
+
+
+def sales_velocity(df):
+    # Analyze sale patterns
+    sales_df = df[df['SALE_DATE'].notna()].copy()
+    sales_df['sale_year'] = sales_df['SALE_DATE'].dt.year
+
+    recent_sales = sales_df[sales_df['sale_year'] >= 2020]
     yearly_sales = recent_sales.groupby('sale_year').agg({
         'PROPERTY_ID': 'count',
         'MARKET_VALUE': 'median',
         'SALE_PRICE': 'median'
     })
-    
-    print("\nRecent Sales Activity (2020+):\n")
-    print(f"{'Year':<8} {'Sales':<10} {'Median Market Value':<20} {'Median Sale Price'}")
-    print("-" * 65)
+    return Insight("sales_velocity", "⏰ INSIGHT #8: MARKET TIMING - SALES VELOCITY",
+                   tables={"yearly_sales": yearly_sales})
+
+
+def show_sales_velocity(insight):
+    yearly_sales = insight.tables["yearly_sales"]
+    if len(yearly_sales) == 0:
+        return
+    yield "\nRecent Sales Activity (2020+):\n"
+    yield f"{'Year':<8} {'Sales':<10} {'Median Market Value':<20} {'Median Sale Price'}"
+    yield "-" * 65
     for year, row in yearly_sales.iterrows():
         market_val = row['MARKET_VALUE']
         sale_val = row['SALE_PRICE']
         if pd.notna(market_val) and pd.notna(sale_val) and sale_val > 0:
             ratio = (sale_val / market_val) * 100
-            print(f"{int(year):<8} {int(row['PROPERTY_ID']):<10,} ${market_val:<18,.0f} ${sale_val:>12,.0f} ({ratio:>5.1f}%)")
+            yield f"{int(year):<8} {int(row['PROPERTY_ID']):<10,} ${market_val:<18,.0f} ${sale_val:>12,.0f} ({ratio:>5.1f}%)"
         else:
-            print(f"{int(year):<8} {int(row['PROPERTY_ID']):<10,} ${market_val:<18,.0f} {'N/A':>12}")
+            yield f"{int(year):<8} {int(row['PROPERTY_ID']):<10,} ${market_val:<18,.0f} {'N/A':>12}"
+
+
+def century_club(df):
+    century_properties = df[df['building_age'] >= 100]
+
+    century_hoods = century_properties.groupby('neighborhood').agg({
+        'PROPERTY_ID': 'count',
+        'MARKET_VALUE': 'median',
+        'YEAR_BUILT': 'median'
+    }).sort_values('PROPERTY_ID', ascending=False).head(10)
+
+    historic_premium = century_properties['MARKET_VALUE'].median() / df['MARKET_VALUE'].median()
+    return Insight("century_club", "🎓 INSIGHT #9: THE CENTURY CLUB (100+ Year Old Properties)", scalars={
+        "century_properties": len(century_properties),
+        "historic_premium_pct": (historic_premium - 1) * 100,
+    }, tables={"century_hoods": century_hoods})
+
+
+def show_century_club(insight):
+    yield f"\nFound {insight.scalars['century_properties']:,} properties built before 1925"
 
-print("\n\n" + "=" * 80)
-print("🎓 INSIGHT #9: THE CENTURY CLUB (100+ Year Old Properties)")
-print("=" * 80)
+    yield "\nNeighborhoods with Most Historic Properties:\n"
+    for hood, row in insight.tables["century_hoods"].iterrows():
+        avg_year = int(row['YEAR_BUILT'])
+        yield f"{hood[:40]:<40} {int(row['PROPERTY_ID']):>4} historic props  (avg: {avg_year})"
 
-century_properties = df[df['building_age'] >= 100].copy()
-print(f"\nFound {len(century_properties):,} properties built before 1925")
+    yield f"\n💰 Historic Premium: {insight.scalars['historic_premium_pct']:+.1f}% vs typical property"
 
-century_hoods = century_properties.groupby('neighborhood').agg({
-    'PROPERTY_ID': 'count',
-    'MARKET_VALUE': 'median',
-    'YEAR_BUILT': 'median'
-}).sort_values('PROPERTY_ID', ascending=False).head(10)
 
-print("\nNeighborhoods with Most Historic Properties:\n")
-for hood, row in century_hoods.iterrows():
-    avg_year = int(row['YEAR_BUILT'])
-    print(f"{hood[:40]:<40} {int(row['PROPERTY_ID']):>4} historic props  (avg: {avg_year})")
+def value_concentration(df):
+    # Where is the wealth concentrated?
+    total_market_value = df['MARKET_VALUE'].sum()
+    value_by_hood = df.groupby('neighborhood')['MARKET_VALUE'].sum().sort_values(ascending=False)
 
-historic_premium = century_properties['MARKET_VALUE'].median() / df['MARKET_VALUE'].median()
-print(f"\n💰 Historic Premium: {(historic_premium - 1) * 100:+.1f}% vs typical property")
+    cumulative_value = value_by_hood.cumsum() / total_market_value * 100
+    neighborhoods_for_50pct = list(cumulative_value[cumulative_value <= 50].index)
 
-print("\n\n" + "=" * 80)
-print("📈 INSIGHT #10: VALUE CONCENTRATION ANALYSIS")
-print("=" * 80)
+    top = value_by_hood[neighborhoods_for_50pct[:10]].to_frame('total_value')
+    top['pct_of_value'] = top['total_value'] / total_market_value * 100
+    return Insight("value_concentration", "📈 INSIGHT #10: VALUE CONCENTRATION ANALYSIS", scalars={
+        "total_market_value": total_market_value,
+        "neighborhoods_for_50pct": len(neighborhoods_for_50pct),
+    }, tables={"top_neighborhoods": top})
 
-# Where is the wealth concentrated?
-total_market_value = df['MARKET_VALUE'].sum()
-value_by_hood = df.groupby('neighborhood')['MARKET_VALUE'].sum().sort_values(ascending=False)
 
-cumulative_value = value_by_hood.cumsum() / total_market_value * 100
-top_10_pct = cumulative_value[cumulative_value <= 50].index[-1]
-neighborhoods_for_50pct = list(cumulative_value[cumulative_value <= 50].index)
+def show_value_concentration(insight):
+    yield f"\nTotal Market Value: ${insight.scalars['total_market_value']/1e9:.2f} BILLION"
+    yield f"\n50% of all value is in just {insight.scalars['neighborhoods_for_50pct']} neighborhoods:"
+    for hood, row in insight.tables["top_neighborhoods"].iterrows():
+        yield f"  • {hood[:45]:<45} ${row['total_value']/1e9:>5.2f}B ({row['pct_of_value']:>4.1f}%)"
 
-print(f"\nTotal Market Value: ${total_market_value/1e9:.2f} BILLION")
-print(f"\n50% of all value is in just {len(neighborhoods_for_50pct)} neighborhoods:")
-for hood in neighborhoods_for_50pct[:10]:
-    hood_value = value_by_hood[hood]
-    hood_pct = (hood_value / total_market_value) * 100
-    print(f"  • {hood[:45]:<45} ${hood_value/1e9:>5.2f}B ({hood_pct:>4.1f}%)")
 
-print("\n\n" + "=" * 80)
-print("💡 KEY TAKEAWAYS & ACTIONABLE INSIGHTS")
-print("=" * 80)
+def summarize(df):
+    return {
+        'total_properties': len(df),
+        'total_market_value': df['MARKET_VALUE'].sum(),
+        'median_value': df['MARKET_VALUE'].median(),
+        'neighborhoods_analyzed': df['neighborhood'].nunique(),
+    }
+
+
+INSIGHTS = [wealth_gradient, building_booms, depreciation_curves, size_sweet_spot, hidden_gems,
+            ownership_concentration, geographic_clustering, sales_velocity, century_club, value_concentration]
+
+FORMATTERS = {
+    "wealth_gradient": show_wealth_gradient,
+    "building_booms": show_building_booms,
+    "depreciation_curves": show_depreciation_curves,
+    "size_sweet_spot": show_size_sweet_spot,
+    "hidden_gems": show_hidden_gems,
+    "ownership_concentration": show_ownership_concentration,
+    "geographic_clustering": show_geographic_clustering,
+    "sales_velocity": show_sales_velocity,
+    "century_club": show_century_club,
+    "value_concentration": show_value_concentration,
+}
+
+TAKEAWAYS = "=" * WIDTH + """
+💡 KEY TAKEAWAYS & ACTIONABLE INSIGHTS
+""" + "=" * WIDTH + """
 
-print("""
 1. 🏆 PREMIUM MARKETS: Top neighborhoods command 5-10x median values
    → Focus high-end development in established wealthy areas
 
@@ -307,25 +390,32 @@ print("""
 
 10. 💎 50/50 RULE: Half the market value in <20% of neighborhoods
     → Wealth heavily concentrated geographically
-""")
-
-print("\n" + "=" * 80)
-print("✅ Analysis complete. This data reveals Portland's urban economic geography.")
-print("=" * 80)
-
-# Save summary
-summary_data = {
-    'total_properties': len(df),
-    'total_market_value': total_market_value,
-    'median_value': df['MARKET_VALUE'].median(),
-    'neighborhoods_analyzed': df['neighborhood'].nunique(),
-    'date_analyzed': datetime.now().strftime('%Y-%m-%d %H:%M')
-}
 
-with open('deep_analysis_summary.txt', 'w') as f:
-    f.write("Portland Property Market - Deep Analysis Summary\n")
-    f.write("=" * 80 + "\n\n")
-    for key, val in summary_data.items():
-        f.write(f"{key}: {val}\n")
+""" + "=" * WIDTH + """
+✅ Analysis complete. This data reveals Portland's urban economic geography.
+""" + "=" * WIDTH
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deep analysis of the complete-core-fields subset")
+    parser.add_argument("-f", "--format", default="text", choices=sorted(RENDERERS))
+    parser.add_argument("-o", "--output", help="Write the report to a file instead of the terminal")
+    parser.add_argument("--refresh", action="store_true", help="Recompute even if the cached results are current")
+    args = parser.parse_args(argv)
+
+    report = run_report("deep_analysis", TITLE, DATASET, __file__, load, INSIGHTS, summarize=summarize,
+                        refresh=args.refresh)
+    if args.format == "text":
+        write_output(render(report, "text", formatters=FORMATTERS, width=WIDTH, footer=TAKEAWAYS), args.output)
+    else:
+        write_output(render(report, args.format), args.output)
+
+    # Save summary
+    with open('deep_analysis_summary.txt', 'w') as f:
+        f.write(render(report, "summary", heading="Portland Property Market - Deep Analysis Summary"))
+    if args.format == "text" or args.output:
+        print("\n📄 Summary saved to: deep_analysis_summary.txt")
+
 
-print("\n📄 Summary saved to: deep_analysis_summary.txt")
+if __name__ == "__main__":
+    main()
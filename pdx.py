@@ -0,0 +1,140 @@
+"""
+pdx: one command line for the whole PDX-Data workflow.
+
+Each subcommand imports only the module that does the work, so pandas,
+numpy and Selenium load for the commands that use them and `status`
+runs on the standard library alone. Arguments after the subcommand are
+passed through to the underlying script (`pdx merge --help` shows the
+merge options).
+
+Usage:
+    python pdx.py status                      # datasets, indexes, archive, snapshots, reports
+    python pdx.py scrape [--reverse] ...      # tools/portlandmaps_scrape.py
+    python pdx.py merge [--subsets]           # tools/cleanup_and_merge.py
+    python pdx.py subsets                     # tools/create_quality_subsets.py
+    python pdx.py analyze basic|deep|advanced # examples/*_analysis.py
+    python pdx.py viz [data|tiles]            # scripts/generate_viz_data.py, generate_map_tiles.py
+    python pdx.py query "SELECT ..."          # tools/query.py
+    python pdx.py pipeline [--watch]          # tools/pipeline.py
+"""
+
+import glob
+import importlib
+import json
+import os
+import sys
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+MAIN_DATASET = "Portland_Assessor_AllNeighborhoods.csv"
+INDEX_SUFFIXES = [".address_index.npz", ".text_index.npz", ".sample_index.npz"]
+
+# Subcommand -> (folder, module, description); commands with variants map a second word to a module
+COMMANDS = {
+    "scrape": ("tools", "portlandmaps_scrape", "Download assessor CSVs (--reverse: last neighborhood first)"),
+    "merge": ("tools", "cleanup_and_merge", "Merge downloads/ into the main dataset"),
+    "subsets": ("tools", "create_quality_subsets", "Write the quality subsets"),
+    "analyze": ("examples", {"basic": "basic_analysis", "deep": "deep_analysis",
+                             "advanced": "advanced_analysis"}, "Run an analysis report"),
+    "viz": ("scripts", {"data": "generate_viz_data", "tiles": "generate_map_tiles"},
+            "Export data for index.html"),
+    "query": ("tools", "query", "Run SQL against the datasets"),
+    "pipeline": ("tools", "pipeline", "Rebuild whatever is out of date (--watch: as downloads land)"),
+}
+
+
+def run_module(folder, name, argv):
+    """Import one script's module and call its main() with the remaining arguments."""
+    sys.path.insert(0, os.path.join(ROOT, folder))
+    if folder != "tools":
+        sys.path.insert(1, os.path.join(ROOT, "tools"))
+    return importlib.import_module(name).main(argv)
+
+
+def _age(path):
+    return datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y-%m-%d %H:%M")
+
+
+def _is_fresh(derived, source):
+    return os.path.exists(derived) and os.path.getmtime(derived) >= os.path.getmtime(source)
+
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def status(argv=None):
+    """What has been built so far and whether each derived file is current (standard library only)."""
+    datasets = [p for p in [MAIN_DATASET] + sorted(glob.glob("subsets/*.csv")) if os.path.exists(p)]
+    print("📁 Datasets")
+    if not datasets:
+        print(f"   none yet (python pdx.py merge builds {MAIN_DATASET})")
+    for path in datasets:
+        stem = os.path.splitext(path)[0]
+        derived = [("arrow", stem + ".arrow")]
+        derived += [(suffix.split(".")[1].split("_")[0], stem + suffix) for suffix in INDEX_SUFFIXES]
+        # ✓ current, ✗ older than the CSV, - not built
+        flags = " ".join(f"{label}{'✓' if _is_fresh(p, path) else '✗' if os.path.exists(p) else '-'}"
+                         for label, p in derived)
+        print(f"   {path:<45} {os.path.getsize(path) / 1e6:>8.1f} MB  {_age(path)}  {flags}")
+
+    downloads = glob.glob("downloads/*.csv")
+    print(f"\n⬇️  Downloads: {len(downloads):,} page files in downloads/")
+    if os.path.exists("raw_archive/index.csv"):
+        with open("raw_archive/index.csv") as f:
+            pages = sum(1 for _ in f) - 1
+        print(f"   Archive: {pages:,} pages in raw_archive/ (updated {_age('raw_archive/index.csv')})")
+
+    if os.path.exists("snapshots/versions.json"):
+        versions = _read_json("snapshots/versions.json")
+        if versions:
+            latest = versions[-1]
+            print(f"\n🕓 Snapshots: {len(versions)} versions, latest v{latest['version']} "
+                  f"({latest['created']}, {latest['rows']:,} rows)")
+
+    if os.path.exists("quarantine/summary.json"):
+        summary = _read_json("quarantine/summary.json")
+        print(f"\n🚧 Quarantine: {summary['flagged']:,} of {summary['checked']:,} rows flagged")
+
+    reports = sorted(glob.glob(".insight_cache/*.pkl"))
+    if reports:
+        print("\n📊 Cached reports")
+        for path in reports:
+            print(f"   {os.path.splitext(os.path.basename(path))[0]:<24} {_age(path)}")
+
+
+def usage():
+    lines = [__doc__.strip().split("\n")[0], "", "Commands:"]
+    lines.append(f"  {'status':<10} Show datasets, indexes and caches")
+    for command, (_, module, description) in COMMANDS.items():
+        variants = f" [{'|'.join(module)}]" if isinstance(module, dict) else ""
+        lines.append(f"  {command:<10} {description}{variants}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return
+    command, rest = argv[0], argv[1:]
+    if command == "status":
+        return status(rest)
+    if command not in COMMANDS:
+        sys.exit(f"pdx: unknown command {command!r}\n\n{usage()}")
+
+    folder, module, _ = COMMANDS[command]
+    if command == "scrape" and "--reverse" in rest:
+        rest = [arg for arg in rest if arg != "--reverse"]
+        module = "portlandmaps_scrape_reverse"
+    elif isinstance(module, dict):
+        variant = rest[0] if rest and rest[0] in module else next(iter(module))
+        if rest and rest[0] == variant:
+            rest = rest[1:]
+        module = module[variant]
+    return run_module(folder, module, rest)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Export map tiles: properties binned into square cells at several zoom levels.
+
+Cells are laid out in Oregon North state-plane feet (X_STATE_PLANE /
+Y_STATE_PLANE), so no projection is needed. Each cell carries the
+property count, median market value and median price per square foot.
+Cells are grouped into tiles of TILE_CELLS x TILE_CELLS, one JSON file
+(plus .gz) per tile, so a map view only fetches the tiles it shows and the
+browser never handles individual properties.
+
+Output (scripts/viz/tiles/):
+    index.json               origin, zoom levels, cell sizes, tile list with bounds
+    z0/3_2.json(.gz)         columnar arrays: cell col/row inside the tile, count, values
+
+Usage:
+    python scripts/generate_map_tiles.py
+    python scripts/generate_map_tiles.py --source subsets/portland_focused.csv
+"""
+
+import argparse
+import glob
+import gzip
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from arrow_io import read_frame
+
+TILES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "viz", "tiles")
+CELL_SIZES_FT = [16000, 8000, 4000, 2000, 1000, 500]  # zoom 0 (coarsest) .. 5
+TILE_CELLS = 32
+
+
+def write_tile(relpath, data):
+    path = os.path.join(TILES_DIR, relpath)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    with open(path, "wb") as f:
+        f.write(raw)
+    with open(path + ".gz", "wb") as f:
+        f.write(gzip.compress(raw, compresslevel=9, mtime=0))
+    return len(raw)
+
+
+def load_points(source):
+    columns = ["PROPERTY_ID", "MARKET_VALUE", "SQUARE_FEET", "X_STATE_PLANE", "Y_STATE_PLANE"]
+    df = read_frame(source, columns=columns, dtype={"PROPERTY_ID": str})
+    df = df.drop_duplicates(subset="PROPERTY_ID")
+    for col in columns[1:]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    # Missing or zero coordinates cannot be placed
+    df = df[(df["X_STATE_PLANE"] > 0) & (df["Y_STATE_PLANE"] > 0)]
+    df["price_per_sqft"] = df["MARKET_VALUE"] / df["SQUARE_FEET"].where(df["SQUARE_FEET"] > 0)
+    return df
+
+
+def aggregate_zoom(x, y, value, ppsf, origin, cell_size):
+    """Per-cell count and medians for one zoom level, vectorized with one groupby."""
+    col = ((x - origin[0]) // cell_size).astype(np.int64)
+    row = ((y - origin[1]) // cell_size).astype(np.int64)
+    cells = pd.DataFrame({"col": col, "row": row, "value": value, "ppsf": ppsf})
+    return cells.groupby(["col", "row"], sort=True).agg(
+        count=("value", "size"),
+        median_value=("value", "median"),
+        median_ppsf=("ppsf", "median"),
+    ).reset_index()
+
+
+def rounded(values):
+    return [None if np.isnan(v) else int(round(v)) for v in values]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export multi-resolution map tiles")
+    parser.add_argument("--source", default="Portland_Assessor_AllNeighborhoods.csv", help="Dataset CSV")
+    args = parser.parse_args(argv)
+
+    print("🗺️  Generating map tiles...")
+    df = load_points(args.source)
+    print(f"   {len(df):,} properties with coordinates")
+    if df.empty:
+        sys.exit(f"❌ No properties in {args.source} have state-plane coordinates; nothing to tile "
+                 "(pages scraped with --extract dom carry none)")
+
+    x = df["X_STATE_PLANE"].to_numpy()
+    y = df["Y_STATE_PLANE"].to_numpy()
+    value = df["MARKET_VALUE"].to_numpy(dtype=float)
+    ppsf = df["price_per_sqft"].to_numpy(dtype=float)
+
+    # Align every zoom to the coarsest grid so cells nest exactly
+    coarsest = CELL_SIZES_FT[0]
+    origin = (float(np.floor(x.min() / coarsest) * coarsest), float(np.floor(y.min() / coarsest) * coarsest))
+
+    index = {
+        "crs": "EPSG:6559 (NAD83(2011) / Oregon North, international feet)",
+        "origin": origin,
+        "bounds": [float(x.min()), float(y.min()), float(x.max()), float(y.max())],
+        "tile_cells": TILE_CELLS,
+        "zooms": [],
+    }
+    # Start from empty zoom folders so tiles from an earlier run can't linger next to the new index
+    for folder in glob.glob(os.path.join(TILES_DIR, "z*")):
+        shutil.rmtree(folder)
+    total_bytes = 0
+    for zoom, cell_size in enumerate(CELL_SIZES_FT):
+        cells = aggregate_zoom(x, y, value, ppsf, origin, cell_size)
+        cells["tile_col"] = cells["col"] // TILE_CELLS
+        cells["tile_row"] = cells["row"] // TILE_CELLS
+        tiles = []
+        for (tile_col, tile_row), tile in cells.groupby(["tile_col", "tile_row"]):
+            name = f"z{zoom}/{tile_col}_{tile_row}.json"
+            total_bytes += write_tile(name, {
+                "z": zoom,
+                "cell_size": cell_size,
+                "col": (tile["col"] - tile_col * TILE_CELLS).tolist(),
+                "row": (tile["row"] - tile_row * TILE_CELLS).tolist(),
+                "count": tile["count"].tolist(),
+                "median_value": rounded(tile["median_value"].to_numpy()),
+                "median_ppsf": rounded(tile["median_ppsf"].to_numpy()),
+            })
+            span = cell_size * TILE_CELLS
+            tiles.append({
+                "file": name,
+                "col": int(tile_col),
+                "row": int(tile_row),
+                "bounds": [origin[0] + tile_col * span, origin[1] + tile_row * span,
+                           origin[0] + (tile_col + 1) * span, origin[1] + (tile_row + 1) * span],
+                "cells": len(tile),
+                "properties": int(tile["count"].sum()),
+            })
+        index["zooms"].append({"z": zoom, "cell_size": cell_size, "cells": len(cells), "tiles": tiles})
+        print(f"   z{zoom}: {cell_size:>6,} ft cells → {len(cells):>7,} cells in {len(tiles):>4} tiles")
+
+    os.makedirs(TILES_DIR, exist_ok=True)
+    with open(os.path.join(TILES_DIR, "index.json"), "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+
+    print(f"✅ Tiles written to {TILES_DIR} ({total_bytes / 1e6:.1f} MB uncompressed)")
+
+
+if __name__ == "__main__":
+    main()
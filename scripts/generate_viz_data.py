@@ -1,166 +1,331 @@
+import argparse
 import pandas as pd
+import gzip
 import json
+import os
+import re
+import sys
+from datetime import date
 
-print("Generating visualization data for interactive page...")
-
-df = pd.read_csv("subsets/complete_core_fields.csv", low_memory=False)
-
-# Prepare data
-df['YEAR_BUILT'] = pd.to_numeric(df['YEAR_BUILT'], errors='coerce')
-df['MARKET_VALUE'] = pd.to_numeric(df['MARKET_VALUE'], errors='coerce')
-df['SQUARE_FEET'] = pd.to_numeric(df['SQUARE_FEET'], errors='coerce')
-df['price_per_sqft'] = df['MARKET_VALUE'] / df['SQUARE_FEET']
-df['building_age'] = 2025 - df['YEAR_BUILT']
-
-# 1. Top/Bottom neighborhoods by value
-neighborhood_values = df.groupby('neighborhood')['MARKET_VALUE'].agg(['median', 'count'])
-neighborhood_values = neighborhood_values[neighborhood_values['count'] >= 300].sort_values('median', ascending=False)
-
-top_hoods = neighborhood_values.head(15).reset_index()
-bottom_hoods = neighborhood_values.tail(15).reset_index()
-
-top_neighborhoods = [{
-    'neighborhood': row['neighborhood'],
-    'value': int(row['median']),
-    'count': int(row['count'])
-} for _, row in top_hoods.iterrows()]
-
-bottom_neighborhoods = [{
-    'neighborhood': row['neighborhood'],
-    'value': int(row['median']),
-    'count': int(row['count'])
-} for _, row in bottom_hoods.iterrows()]
-
-# 2. Affordability tiers
-affordability_tiers = pd.cut(df['MARKET_VALUE'], 
-                              bins=[0, 300000, 500000, 750000, 1000000, float('inf')],
-                              labels=['<300K', '300-500K', '500-750K', '750K-1M', '>1M'])
-tier_counts = affordability_tiers.value_counts().sort_index()
-
-affordability_data = [{
-    'tier': str(tier),
-    'count': int(count),
-    'percentage': round(count / len(df) * 100, 1)
-} for tier, count in tier_counts.items()]
-
-# 3. Building age distribution by decade
-df['decade'] = (df['YEAR_BUILT'] // 10) * 10
-decade_counts = df[df['YEAR_BUILT'] >= 1900].groupby('decade').agg({
-    'PROPERTY_ID': 'count',
-    'MARKET_VALUE': 'median'
-}).round(0)
-
-decade_data = [{
-    'decade': int(decade),
-    'count': int(row['PROPERTY_ID']),
-    'median_value': int(row['MARKET_VALUE'])
-} for decade, row in decade_counts.iterrows()]
-
-# 4. Corporate vs Individual ownership
-corporate_keywords = ['LLC', 'INC', 'CORP', 'LP', 'COMPANY', 'CO ', 'TRUST', 'PROPERTIES']
-df['is_corporate'] = df['OWNER'].str.upper().str.contains('|'.join(corporate_keywords), na=False)
-
-ownership_data = [{
-    'type': 'Corporate/Institutional',
-    'count': int(df['is_corporate'].sum()),
-    'total_value': int(df[df['is_corporate']]['MARKET_VALUE'].sum()),
-    'median_value': int(df[df['is_corporate']]['MARKET_VALUE'].median())
-}, {
-    'type': 'Individual/Family',
-    'count': int((~df['is_corporate']).sum()),
-    'total_value': int(df[~df['is_corporate']]['MARKET_VALUE'].sum()),
-    'median_value': int(df[~df['is_corporate']]['MARKET_VALUE'].median())
-}]
-
-# 5. Displacement risk neighborhoods
-neighborhood_gent = df.groupby('neighborhood').agg({
-    'MARKET_VALUE': ['median', 'std', 'mean'],
-    'price_per_sqft': 'median',
-    'building_age': 'median',
-    'PROPERTY_ID': 'count'
-})
-neighborhood_gent.columns = ['_'.join(col).strip() for col in neighborhood_gent.columns.values]
-neighborhood_gent = neighborhood_gent[neighborhood_gent['PROPERTY_ID_count'] >= 500]
-
-neighborhood_gent['price_variance'] = neighborhood_gent['MARKET_VALUE_std'] / neighborhood_gent['MARKET_VALUE_mean']
-neighborhood_gent['risk_score'] = (
-    neighborhood_gent['price_variance'].rank(pct=True) * 0.3 +
-    (neighborhood_gent['building_age_median'] / 100).rank(pct=True) * 0.2 +
-    (1 / (neighborhood_gent['MARKET_VALUE_median'] / 1000000)).rank(pct=True) * 0.3 +
-    (neighborhood_gent['price_per_sqft_median'] / 100).rank(pct=True) * 0.2
-) * 100
-
-displacement_risk = neighborhood_gent.sort_values('risk_score', ascending=False).head(20).reset_index()
-displacement_data = [{
-    'neighborhood': row['neighborhood'],
-    'risk_score': round(row['risk_score'], 1),
-    'median_value': int(row['MARKET_VALUE_median']),
-    'building_age': int(row['building_age_median']),
-    'variance': round(row['price_variance'], 2)
-} for _, row in displacement_risk.iterrows()]
-
-# 6. Value concentration (top 8 neighborhoods)
-value_by_hood = df.groupby('neighborhood')['MARKET_VALUE'].sum().sort_values(ascending=False).head(8)
-total_value = df['MARKET_VALUE'].sum()
-
-concentration_data = [{
-    'neighborhood': hood,
-    'total_value': int(value),
-    'percentage': round(value / total_value * 100, 1)
-} for hood, value in value_by_hood.items()]
-
-# 7. Ultra-luxury concentration ($2M+)
-ultra_luxury = df[df['MARKET_VALUE'] >= 2000000]
-ultra_by_hood = ultra_luxury.groupby('neighborhood').agg({
-    'PROPERTY_ID': 'count',
-    'MARKET_VALUE': ['max', 'median']
-})
-ultra_by_hood.columns = ['count', 'max_value', 'median_value']
-ultra_by_hood = ultra_by_hood[ultra_by_hood['count'] >= 5].sort_values('count', ascending=False).head(15).reset_index()
-
-ultra_luxury_data = [{
-    'neighborhood': row['neighborhood'],
-    'count': int(row['count']),
-    'max_value': int(row['max_value']),
-    'median_value': int(row['median_value'])
-} for _, row in ultra_by_hood.iterrows()]
-
-# 8. Most corporatized neighborhoods
-corp_by_hood = df.groupby('neighborhood')['is_corporate'].agg(['sum', 'count'])
-corp_by_hood['corp_pct'] = (corp_by_hood['sum'] / corp_by_hood['count'] * 100)
-corp_by_hood = corp_by_hood[corp_by_hood['count'] >= 300].sort_values('corp_pct', ascending=False).head(15).reset_index()
-
-corporate_concentration_data = [{
-    'neighborhood': row['neighborhood'],
-    'corporate_pct': round(row['corp_pct'], 1),
-    'corporate_count': int(row['sum']),
-    'total_count': int(row['count'])
-} for _, row in corp_by_hood.iterrows()]
-
-# Compile all data
-viz_data = {
-    'metadata': {
-        'total_properties': len(df),
-        'total_market_value': int(df['MARKET_VALUE'].sum()),
-        'median_value': int(df['MARKET_VALUE'].median()),
-        'neighborhoods': int(df['neighborhood'].nunique()),
-        'analysis_date': '2025-10-30'
-    },
-    'top_neighborhoods': top_neighborhoods,
-    'bottom_neighborhoods': bottom_neighborhoods,
-    'affordability_tiers': affordability_data,
-    'building_decades': decade_data,
-    'ownership_breakdown': ownership_data,
-    'displacement_risk': displacement_data,
-    'value_concentration': concentration_data,
-    'ultra_luxury': ultra_luxury_data,
-    'corporate_concentration': corporate_concentration_data
-}
-
-# Save to JSON
-with open('viz_data.json', 'w') as f:
-    json.dump(viz_data, f, indent=2)
-
-print("✅ Data exported to viz_data.json")
-print(f"   - {len(df):,} properties analyzed")
-print(f"   - {len(viz_data)} visualization datasets created")
+try:
+    import brotli
+except ImportError:  # optional; gzip shards are always written
+    brotli = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from arrow_io import read_frame
+from text_index import load_index
+
+# Shards for index.html: a manifest plus one file per chart and per neighborhood
+VIZ_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "viz")
+
+
+def slugify(name):
+    return re.sub(r'[^a-z0-9]+', '-', str(name).lower()).strip('-')
+
+
+def write_shard(relpath, data):
+    """Write data as .json plus precompressed .json.gz (and .json.br with brotli installed)."""
+    path = os.path.join(VIZ_DIR, relpath)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    raw = json.dumps(data, separators=(',', ':')).encode()
+    with open(path, 'wb') as f:
+        f.write(raw)
+    compressed = gzip.compress(raw, compresslevel=9, mtime=0)
+    with open(path + '.gz', 'wb') as f:
+        f.write(compressed)
+    if brotli is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(raw))
+    return {'file': relpath, 'bytes': len(raw), 'gzip_bytes': len(compressed)}
+
+
+def median_or_none(value):
+    return None if pd.isna(value) else int(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export chart and per-neighborhood data for index.html")
+    parser.add_argument("--source", default="subsets/complete_core_fields.csv", help="Dataset CSV")
+    args = parser.parse_args(argv)
+
+    print("Generating visualization data for interactive page...")
+
+    df = read_frame(args.source)
+
+    # Prepare data
+    df['YEAR_BUILT'] = pd.to_numeric(df['YEAR_BUILT'], errors='coerce')
+    df['MARKET_VALUE'] = pd.to_numeric(df['MARKET_VALUE'], errors='coerce')
+    df['SQUARE_FEET'] = pd.to_numeric(df['SQUARE_FEET'], errors='coerce')
+    df['price_per_sqft'] = df['MARKET_VALUE'] / df['SQUARE_FEET']
+    df['building_age'] = 2025 - df['YEAR_BUILT']
+    df['SALE_PRICE'] = pd.to_numeric(df['SALE_PRICE'], errors='coerce')
+    df['SALE_DATE'] = pd.to_datetime(df['SALE_DATE'], errors='coerce')
+
+    # 1. Top/Bottom neighborhoods by value
+    neighborhood_values = df.groupby('neighborhood')['MARKET_VALUE'].agg(['median', 'count'])
+    neighborhood_values = neighborhood_values[neighborhood_values['count'] >= 300].sort_values('median', ascending=False)
+
+    top_hoods = neighborhood_values.head(15).reset_index()
+    bottom_hoods = neighborhood_values.tail(15).reset_index()
+
+    top_neighborhoods = [{
+        'neighborhood': row['neighborhood'],
+        'value': int(row['median']),
+        'count': int(row['count'])
+    } for _, row in top_hoods.iterrows()]
+
+    bottom_neighborhoods = [{
+        'neighborhood': row['neighborhood'],
+        'value': int(row['median']),
+        'count': int(row['count'])
+    } for _, row in bottom_hoods.iterrows()]
+
+    # 2. Affordability tiers
+    affordability_tiers = pd.cut(df['MARKET_VALUE'], 
+                                  bins=[0, 300000, 500000, 750000, 1000000, float('inf')],
+                                  labels=['<300K', '300-500K', '500-750K', '750K-1M', '>1M'])
+    tier_counts = affordability_tiers.value_counts().sort_index()
+
+    affordability_data = [{
+        'tier': str(tier),
+        'count': int(count),
+        'percentage': round(count / len(df) * 100, 1)
+    } for tier, count in tier_counts.items()]
+
+    # 3. Building age distribution by decade
+    df['decade'] = (df['YEAR_BUILT'] // 10) * 10
+    decade_counts = df[df['YEAR_BUILT'] >= 1900].groupby('decade').agg({
+        'PROPERTY_ID': 'count',
+        'MARKET_VALUE': 'median'
+    }).round(0)
+
+    decade_data = [{
+        'decade': int(decade),
+        'count': int(row['PROPERTY_ID']),
+        'median_value': int(row['MARKET_VALUE'])
+    } for decade, row in decade_counts.iterrows()]
+
+    # 4. Corporate vs Individual ownership
+    # Whole-word match against the owner word index (so 'INC' no longer matches 'VINCENT')
+    corporate_keywords = ['LLC', 'INC', 'CORP*', 'LP', 'COMPANY', 'CO', 'TRUST*', 'PROPERTIES']
+    owner_index = load_index(args.source, df)
+    df['is_corporate'] = owner_index.mask(' OR '.join(corporate_keywords), field='OWNER')
+
+    ownership_data = [{
+        'type': 'Corporate/Institutional',
+        'count': int(df['is_corporate'].sum()),
+        'total_value': int(df[df['is_corporate']]['MARKET_VALUE'].sum()),
+        'median_value': int(df[df['is_corporate']]['MARKET_VALUE'].median())
+    }, {
+        'type': 'Individual/Family',
+        'count': int((~df['is_corporate']).sum()),
+        'total_value': int(df[~df['is_corporate']]['MARKET_VALUE'].sum()),
+        'median_value': int(df[~df['is_corporate']]['MARKET_VALUE'].median())
+    }]
+
+    # 5. Displacement risk neighborhoods
+    neighborhood_gent = df.groupby('neighborhood').agg({
+        'MARKET_VALUE': ['median', 'std', 'mean'],
+        'price_per_sqft': 'median',
+        'building_age': 'median',
+        'PROPERTY_ID': 'count'
+    })
+    neighborhood_gent.columns = ['_'.join(col).strip() for col in neighborhood_gent.columns.values]
+    neighborhood_gent = neighborhood_gent[neighborhood_gent['PROPERTY_ID_count'] >= 500]
+
+    neighborhood_gent['price_variance'] = neighborhood_gent['MARKET_VALUE_std'] / neighborhood_gent['MARKET_VALUE_mean']
+    neighborhood_gent['risk_score'] = (
+        neighborhood_gent['price_variance'].rank(pct=True) * 0.3 +
+        (neighborhood_gent['building_age_median'] / 100).rank(pct=True) * 0.2 +
+        (1 / (neighborhood_gent['MARKET_VALUE_median'] / 1000000)).rank(pct=True) * 0.3 +
+        (neighborhood_gent['price_per_sqft_median'] / 100).rank(pct=True) * 0.2
+    ) * 100
+
+    displacement_risk = neighborhood_gent.sort_values('risk_score', ascending=False).head(20).reset_index()
+    displacement_data = [{
+        'neighborhood': row['neighborhood'],
+        'risk_score': round(row['risk_score'], 1),
+        'median_value': int(row['MARKET_VALUE_median']),
+        'building_age': int(row['building_age_median']),
+        'variance': round(row['price_variance'], 2)
+    } for _, row in displacement_risk.iterrows()]
+
+    # 6. Value concentration (top 8 neighborhoods)
+    value_by_hood = df.groupby('neighborhood')['MARKET_VALUE'].sum().sort_values(ascending=False).head(8)
+    total_value = df['MARKET_VALUE'].sum()
+
+    concentration_data = [{
+        'neighborhood': hood,
+        'total_value': int(value),
+        'percentage': round(value / total_value * 100, 1)
+    } for hood, value in value_by_hood.items()]
+
+    # 7. Ultra-luxury concentration ($2M+)
+    ultra_luxury = df[df['MARKET_VALUE'] >= 2000000]
+    ultra_by_hood = ultra_luxury.groupby('neighborhood').agg({
+        'PROPERTY_ID': 'count',
+        'MARKET_VALUE': ['max', 'median']
+    })
+    ultra_by_hood.columns = ['count', 'max_value', 'median_value']
+    ultra_by_hood = ultra_by_hood[ultra_by_hood['count'] >= 5].sort_values('count', ascending=False).head(15).reset_index()
+
+    ultra_luxury_data = [{
+        'neighborhood': row['neighborhood'],
+        'count': int(row['count']),
+        'max_value': int(row['max_value']),
+        'median_value': int(row['median_value'])
+    } for _, row in ultra_by_hood.iterrows()]
+
+    # 8. Most corporatized neighborhoods
+    corp_by_hood = df.groupby('neighborhood')['is_corporate'].agg(['sum', 'count'])
+    corp_by_hood['corp_pct'] = (corp_by_hood['sum'] / corp_by_hood['count'] * 100)
+    corp_by_hood = corp_by_hood[corp_by_hood['count'] >= 300].sort_values('corp_pct', ascending=False).head(15).reset_index()
+
+    corporate_concentration_data = [{
+        'neighborhood': row['neighborhood'],
+        'corporate_pct': round(row['corp_pct'], 1),
+        'corporate_count': int(row['sum']),
+        'total_count': int(row['count'])
+    } for _, row in corp_by_hood.iterrows()]
+
+    # Compile all data
+    viz_data = {
+        'metadata': {
+            'total_properties': len(df),
+            'total_market_value': int(df['MARKET_VALUE'].sum()),
+            'median_value': int(df['MARKET_VALUE'].median()),
+            'neighborhoods': int(df['neighborhood'].nunique()),
+            'analysis_date': '2025-10-30'
+        },
+        'top_neighborhoods': top_neighborhoods,
+        'bottom_neighborhoods': bottom_neighborhoods,
+        'affordability_tiers': affordability_data,
+        'building_decades': decade_data,
+        'ownership_breakdown': ownership_data,
+        'displacement_risk': displacement_data,
+        'value_concentration': concentration_data,
+        'ultra_luxury': ultra_luxury_data,
+        'corporate_concentration': corporate_concentration_data
+    }
+
+    # Save to JSON
+    with open('viz_data.json', 'w') as f:
+        json.dump(viz_data, f, indent=2)
+
+    print("✅ Data exported to viz_data.json")
+    print(f"   - {len(df):,} properties analyzed")
+    print(f"   - {len(viz_data)} visualization datasets created")
+
+    # Sharded export: full (uncapped) chart lists and a drill-down file per neighborhood,
+    # each precompressed, so the page only fetches what a view needs
+    chart_data = {
+        'neighborhood_values': [{
+            'neighborhood': hood,
+            'value': int(row['median']),
+            'count': int(row['count'])
+        } for hood, row in neighborhood_values.iterrows()],
+        'affordability_tiers': affordability_data,
+        'building_decades': decade_data,
+        'ownership_breakdown': ownership_data,
+        'displacement_risk': [{
+            'neighborhood': row['neighborhood'],
+            'risk_score': round(row['risk_score'], 1),
+            'median_value': int(row['MARKET_VALUE_median']),
+            'building_age': int(row['building_age_median']),
+            'variance': round(row['price_variance'], 2)
+        } for _, row in neighborhood_gent.sort_values('risk_score', ascending=False).reset_index().iterrows()],
+        'value_concentration': [{
+            'neighborhood': hood,
+            'total_value': int(value),
+            'percentage': round(value / total_value * 100, 2)
+        } for hood, value in df.groupby('neighborhood')['MARKET_VALUE'].sum().sort_values(ascending=False).items()],
+        'ultra_luxury': [{
+            'neighborhood': hood,
+            'count': int(row['count']),
+            'max_value': int(row['max_value']),
+            'median_value': int(row['median_value'])
+        } for hood, row in ultra_luxury.groupby('neighborhood')['MARKET_VALUE']
+            .agg(count='count', max_value='max', median_value='median')
+            .sort_values('count', ascending=False).iterrows()],
+        'corporate_concentration': [{
+            'neighborhood': hood,
+            'corporate_pct': round(row['corp_pct'], 1),
+            'corporate_count': int(row['sum']),
+            'total_count': int(row['count'])
+        } for hood, row in df.groupby('neighborhood')['is_corporate'].agg(['sum', 'count'])
+            .assign(corp_pct=lambda t: t['sum'] / t['count'] * 100)
+            .query('count >= 30').sort_values('corp_pct', ascending=False).iterrows()],
+    }
+
+    # Per-neighborhood drill-down, computed with one groupby per measure
+    hood_groups = df.groupby('neighborhood')
+    hood_stats = hood_groups.agg(
+        count=('PROPERTY_ID', 'count'),
+        median_value=('MARKET_VALUE', 'median'),
+        mean_value=('MARKET_VALUE', 'mean'),
+        total_value=('MARKET_VALUE', 'sum'),
+        median_price_per_sqft=('price_per_sqft', 'median'),
+        median_year_built=('YEAR_BUILT', 'median'),
+        median_sqft=('SQUARE_FEET', 'median'),
+        corporate_count=('is_corporate', 'sum'),
+    )
+    value_percentiles = hood_groups['MARKET_VALUE'].quantile([0.1, 0.25, 0.5, 0.75, 0.9]).unstack()
+    tiers_by_hood = pd.crosstab(df['neighborhood'], affordability_tiers)
+    built = df[df['YEAR_BUILT'] >= 1900]
+    decades_by_hood = pd.crosstab(built['neighborhood'], built['decade'])
+    sales = df[df['SALE_DATE'].notna()]
+    sales_by_hood = sales.groupby(['neighborhood', sales['SALE_DATE'].dt.year])['SALE_PRICE'].agg(['count', 'median'])
+
+    os.makedirs(VIZ_DIR, exist_ok=True)
+    manifest_neighborhoods = []
+    for hood, stats in hood_stats.iterrows():
+        slug = slugify(hood)
+        shard = {
+            'neighborhood': hood,
+            'count': int(stats['count']),
+            'median_value': median_or_none(stats['median_value']),
+            'mean_value': median_or_none(stats['mean_value']),
+            'total_value': int(stats['total_value']),
+            'median_price_per_sqft': None if pd.isna(stats['median_price_per_sqft']) else round(stats['median_price_per_sqft'], 1),
+            'median_year_built': median_or_none(stats['median_year_built']),
+            'median_sqft': median_or_none(stats['median_sqft']),
+            'corporate_pct': round(stats['corporate_count'] / stats['count'] * 100, 1),
+            'value_percentiles': {f'p{int(q * 100)}': median_or_none(v) for q, v in value_percentiles.loc[hood].items()},
+            'affordability_tiers': [{'tier': str(t), 'count': int(c)} for t, c in tiers_by_hood.loc[hood].items()],
+            'building_decades': [{'decade': int(d), 'count': int(c)}
+                                 for d, c in (decades_by_hood.loc[hood].items() if hood in decades_by_hood.index else []) if c],
+            'sales_by_year': [{'year': int(y), 'count': int(r['count']), 'median_price': median_or_none(r['median'])}
+                              for y, r in (sales_by_hood.loc[hood].iterrows() if hood in sales_by_hood.index else [])],
+        }
+        entry = write_shard(f'neighborhoods/{slug}.json', shard)
+        manifest_neighborhoods.append({
+            'name': hood,
+            'slug': slug,
+            'count': shard['count'],
+            'median_value': shard['median_value'],
+            'file': entry['file'],
+        })
+
+    charts = {name: {**write_shard(f'charts/{name}.json', data), 'records': len(data)}
+              for name, data in chart_data.items()}
+
+    manifest = {
+        'generated': date.today().isoformat(),
+        'metadata': viz_data['metadata'],
+        'encodings': ['gzip'] + (['br'] if brotli is not None else []),
+        'charts': charts,
+        'neighborhoods': manifest_neighborhoods,
+    }
+    with open(os.path.join(VIZ_DIR, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, separators=(',', ':'))
+
+    shard_bytes = sum(c['gzip_bytes'] for c in charts.values())
+    print(f"✅ Shards exported to {VIZ_DIR}")
+    print(f"   - manifest.json ({os.path.getsize(os.path.join(VIZ_DIR, 'manifest.json')):,} bytes)")
+    print(f"   - {len(charts)} chart shards ({shard_bytes:,} bytes gzipped)")
+    print(f"   - {len(manifest_neighborhoods)} neighborhood shards")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import json
+import os
+import sys
+
+import pandas as pd
+
+TOOLS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools")
+sys.path.insert(0, TOOLS)
+
+from cleanup_and_merge import OUTPUT_FILE, merge  # noqa: E402
+from portlandmaps_common import parse_results_table  # noqa: E402
+
+
+def alameda_rows():
+    with open(os.path.join(TOOLS, "alameda_page_source.html"), encoding="utf-8") as f:
+        columns, rows = parse_results_table(f.read())
+    return pd.DataFrame(rows, columns=columns)
+
+
+def write_page(rows, neighborhood, page, scraped_at):
+    os.makedirs("downloads", exist_ok=True)
+    rows.to_csv(f"downloads/{neighborhood}_page{page}_{scraped_at}.csv", index=False)
+
+
+def merged_ids():
+    return set(pd.read_csv(OUTPUT_FILE, usecols=["PROPERTY_ID"], dtype=str)["PROPERTY_ID"])
+
+
+def test_merging_new_pages_adds_to_the_dataset(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    rows = alameda_rows()
+    buckman = rows.iloc[600:].assign(PROPERTY_ID=lambda d: "B" + d["PROPERTY_ID"], NEIGHBORHOOD="BUCKMAN")
+    write_page(rows.iloc[:300], "ALAMEDA", 1, "20250101_120000")
+    write_page(rows.iloc[300:600], "ALAMEDA", 2, "20250101_120100")
+    write_page(buckman, "BUCKMAN", 1, "20250101_120200")
+    merge()
+    everything = merged_ids()
+    assert everything == set(rows["PROPERTY_ID"].iloc[:600]) | set(buckman["PROPERTY_ID"])
+    assert not os.listdir("downloads")
+
+    # A new scrape has only reached BUCKMAN page 1 so far: the dataset must keep ALAMEDA
+    write_page(buckman, "BUCKMAN", 1, "20250102_090000")
+    merge()
+    assert merged_ids() == everything
+
+
+def test_incomplete_neighborhoods_wait_in_downloads(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    rows = alameda_rows()
+    write_page(rows.iloc[:500], "ALAMEDA", 1, "20250101_120000")
+    write_page(rows.iloc[500:], "ALAMEDA", 2, "20250101_120100")
+    merge()
+    everything = merged_ids()
+    assert everything == set(rows["PROPERTY_ID"])
+
+    # The scraper has planned 2 pages for ALAMEDA and downloaded one of them
+    with open("downloads/page_plan.json", "w") as f:
+        json.dump({"ALAMEDA": {"total": 1000, "page_size": 500, "pages": 2}}, f)
+    write_page(rows.iloc[:10], "ALAMEDA", 1, "20250102_090000")
+    assert merge() is None  # nothing finished: a skip, not a failure
+    assert merged_ids() == everything
+    # Kept (not archived, not removed) so the scraper resumes and a later merge picks it up
+    assert "ALAMEDA_page1_20250102_090000.csv" in os.listdir("downloads")
+
+
+def test_nothing_complete_yet_is_not_an_error(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("downloads")
+    with open("downloads/page_plan.json", "w") as f:
+        json.dump({"ALAMEDA": {"total": 1000, "page_size": 500, "pages": 2}}, f)
+    write_page(alameda_rows().iloc[:500], "ALAMEDA", 1, "20250101_120000")
+    assert merge() is None
+    assert not os.path.exists(OUTPUT_FILE)
@@ -0,0 +1,55 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+
+from raw_archive import RawArchive  # noqa: E402
+
+
+def write_pages(folder, neighborhood, pages, scraped_at):
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for page in pages:
+        path = os.path.join(folder, f"{neighborhood}_page{page}_{scraped_at}.csv")
+        with open(path, "w") as f:
+            f.write(f"PROPERTY_ID\nR{scraped_at}{page}\n")
+        paths.append(path)
+    return paths
+
+
+def test_as_of_never_mixes_pages_across_scrapes(tmp_path):
+    archive = RawArchive(str(tmp_path / "archive"))
+    archive.add_files(write_pages(str(tmp_path / "a"), "ALAMEDA", [1, 2, 3], "20250101_120000"))
+    # The neighborhood shrank to two pages
+    archive.add_files(write_pages(str(tmp_path / "b"), "ALAMEDA", [1, 2], "20250201_120000"))
+
+    latest = archive.as_of()
+    assert latest["page"].tolist() == [1, 2]
+    assert set(latest["scraped_at"]) == {"20250201_120000"}
+
+    january = archive.as_of("20250115")
+    assert january["page"].tolist() == [1, 2, 3]
+    assert set(january["scraped_at"]) == {"20250101_120000"}
+
+
+def test_as_of_skips_incomplete_scrapes(tmp_path):
+    archive = RawArchive(str(tmp_path / "archive"))
+    archive.add_files(write_pages(str(tmp_path / "a"), "BUCKMAN", [1, 2], "20250101_120000"))
+    archive.add_files(write_pages(str(tmp_path / "b"), "BUCKMAN", [2], "20250201_120000"))
+
+    assert set(archive.as_of()["scraped_at"]) == {"20250101_120000"}
+
+
+def test_migrated_downloads_come_apart_into_their_scrapes(tmp_path):
+    archive = RawArchive(str(tmp_path / "archive"))
+    old = (write_pages(str(tmp_path / "raw"), "CULLY", [1, 2, 3], "20240301_090000")
+           + write_pages(str(tmp_path / "raw"), "CULLY", [1, 2], "20240901_090000")
+           + write_pages(str(tmp_path / "raw"), "CULLY", [1, 2, 3], "20250301_090000"))
+    added = archive.add_files(old)  # one add, like `raw_archive.py add raw_downloads/*.csv`
+    assert added["scrape"].nunique() == 3
+
+    assert archive.as_of()["page"].tolist() == [1, 2, 3]
+    assert set(archive.as_of()["scraped_at"]) == {"20250301_090000"}
+    september = archive.as_of("20241001")
+    assert september["page"].tolist() == [1, 2]
+    assert set(september["scraped_at"]) == {"20240901_090000"}
@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+
+from snapshot_store import SnapshotStore  # noqa: E402
+
+
+def dataset(values, **derived):
+    df = pd.DataFrame({"PROPERTY_ID": ["R1", "R2", "R3"], "MARKET_VALUE": values,
+                       "neighborhood": ["ALAMEDA", "ALAMEDA", "BUCKMAN"]})
+    return df.assign(**derived)
+
+
+def test_derived_columns_are_not_tracked(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots"))
+    store.commit(dataset([100, 200, 300], LATITUDE=[45.5, 45.5, 45.5], validation_flags=[0, 0, 0]))
+    # A new rule and a reprojection change every derived cell; only R2's value really changed
+    version = store.commit(dataset([100, 250, 300], LATITUDE=[45.6, 45.6, 45.6], validation_flags=[8, 8, 8],
+                                   census_tract=["1", "2", "3"]))
+    assert version["changed_cells"] == 1
+    assert "LATITUDE" not in store.read().columns
+
+
+def test_repeated_property_ids_are_counted(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots"))
+    df = pd.concat([dataset([100, 200, 300]), dataset([100, 200, 300]).iloc[[0]].assign(neighborhood="CULLY")])
+    version = store.commit(df)
+    assert version["rows"] == 3
+    assert version["duplicate_rows"] == 1
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pandas as pd
+
+TOOLS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools")
+sys.path.insert(0, TOOLS)
+
+from portlandmaps_common import parse_results_table  # noqa: E402
+from validation import FLAGS_COLUMN, rule_masks, valid_mask, valid_rows, validate  # noqa: E402
+
+
+def alameda_page():
+    with open(os.path.join(TOOLS, "alameda_page_source.html"), encoding="utf-8") as f:
+        columns, rows = parse_results_table(f.read())
+    return pd.DataFrame(rows, columns=columns)
+
+
+def test_unsold_placeholders_are_not_sale_violations():
+    df = alameda_page()
+    price = pd.to_numeric(df["SALE_PRICE"])
+    unsold = (price == 0) | (df["SALE_DATE"] == "1900-01-01")
+    assert unsold.sum() > 400  # about half the page has never sold
+
+    masks = rule_masks(df)
+    assert not masks["sale_price_arms_length"][unsold.to_numpy()].any()
+    assert not masks["sale_date_not_future"][unsold.to_numpy()].any()
+    # Actual sales are still judged
+    assert masks["sale_price_arms_length"].sum() == ((price > 0) & (price < 10000)).sum()
+
+
+def test_valid_mask_keeps_unsold_properties(tmp_path):
+    df = alameda_page()
+    validate(df, quarantine_dir=str(tmp_path))
+    assert FLAGS_COLUMN in df.columns
+    sales_ok = valid_mask(df, "sale_price_arms_length", "sale_date_not_future")
+    assert sales_ok.sum() >= len(df) - 5
+
+
+def test_valid_rows_are_the_actual_sales_with_or_without_flags(tmp_path):
+    df = alameda_page()
+    price = pd.to_numeric(df["SALE_PRICE"])
+    expected = set(df.index[price >= 10000])
+
+    assert set(valid_rows(df, ["sale_price_arms_length"]).index) == expected
+    validate(df, quarantine_dir=str(tmp_path))
+    assert set(valid_rows(df, ["sale_price_arms_length"]).index) == expected
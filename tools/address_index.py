@@ -0,0 +1,176 @@
+"""
+Address lookup index for the merged dataset.
+
+Addresses are normalized (upper case, punctuation dropped, street
+suffixes, directionals and unit designators reduced to one spelling), so
+"1234 Southeast Main Street, Apt 5" and "1234 SE MAIN ST #5" are the same
+key. The index is a sorted array of distinct keys with the PROPERTY_IDs
+for each key stored contiguously, so an exact lookup is one binary search
+and a prefix lookup (autocomplete) is two. The merge writes it next to the
+dataset (Portland_Assessor_AllNeighborhoods.address_index.npz).
+
+Usage:
+    python tools/address_index.py "1234 se main street"
+    python tools/address_index.py "1234 SE MA" --prefix
+    python tools/address_index.py --build
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_DATASET = "Portland_Assessor_AllNeighborhoods.csv"
+
+DIRECTIONALS = {
+    "NORTH": "N", "SOUTH": "S", "EAST": "E", "WEST": "W",
+    "NORTHEAST": "NE", "NORTHWEST": "NW", "SOUTHEAST": "SE", "SOUTHWEST": "SW",
+}
+SUFFIXES = {
+    "STREET": "ST", "STR": "ST", "AVENUE": "AVE", "AV": "AVE", "AVEN": "AVE", "BOULEVARD": "BLVD",
+    "BOUL": "BLVD", "DRIVE": "DR", "DRV": "DR", "ROAD": "RD", "LANE": "LN", "COURT": "CT",
+    "PLACE": "PL", "TERRACE": "TER", "TERR": "TER", "PARKWAY": "PKWY", "PKY": "PKWY",
+    "HIGHWAY": "HWY", "CIRCLE": "CIR", "WAY": "WAY", "LOOP": "LOOP", "SQUARE": "SQ",
+    "TRAIL": "TRL", "CRESCENT": "CRES", "HEIGHTS": "HTS", "VIEW": "VW", "POINT": "PT",
+    "ALLEY": "ALY", "EXPRESSWAY": "EXPY", "FREEWAY": "FWY", "CROSSING": "XING",
+}
+UNIT_WORDS = {"APT", "APARTMENT", "UNIT", "STE", "SUITE", "SPC", "SPACE", "RM", "ROOM", "NO", "#"}
+
+TOKENS = {**DIRECTIONALS, **SUFFIXES, **{word: "UNIT" for word in UNIT_WORDS}}
+_PUNCTUATION = str.maketrans({".": " ", ",": " ", "#": " # "})
+
+
+def normalize_address(address):
+    """One canonical spelling for an address string."""
+    tokens = []
+    for token in str(address).upper().translate(_PUNCTUATION).split():
+        token = TOKENS.get(token, token)
+        if token == "UNIT" and tokens and tokens[-1] == "UNIT":  # "APT # 5"
+            continue
+        tokens.append(token)
+    return " ".join(tokens)
+
+
+def index_path(dataset):
+    return os.path.splitext(dataset)[0] + ".address_index.npz"
+
+
+def _source_signature(dataset):
+    stat = os.stat(dataset)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+class AddressIndex:
+    """Sorted normalized addresses -> PROPERTY_IDs."""
+
+    def __init__(self, keys, starts, ids, source=None):
+        self.keys = keys        # sorted distinct keys, utf-8 bytes
+        self.starts = starts    # ids[starts[i]:starts[i + 1]] belong to keys[i]
+        self.ids = ids
+        self.source = source
+
+    @classmethod
+    def build(cls, df):
+        pairs = df[["ADDRESS", "PROPERTY_ID"]].dropna().drop_duplicates()
+        # Normalize each distinct spelling once
+        codes, spellings = pd.factorize(pairs["ADDRESS"].astype(str))
+        normalized = np.array([normalize_address(a).encode() for a in spellings], dtype=bytes)
+        keys = normalized[codes]
+        ids = pairs["PROPERTY_ID"].astype(str).to_numpy().astype(bytes)
+
+        order = np.lexsort((ids, keys))
+        keys, ids = keys[order], ids[order]
+        # Different spellings of the same address for the same property
+        keep = np.ones(len(keys), dtype=bool)
+        keep[1:] = (keys[1:] != keys[:-1]) | (ids[1:] != ids[:-1])
+        keys, ids = keys[keep], ids[keep]
+
+        unique_keys, starts = np.unique(keys, return_index=True)
+        return cls(unique_keys, np.append(starts, len(keys)).astype(np.int64), ids)
+
+    def save(self, path, dataset=None):
+        source = _source_signature(dataset) if dataset else np.zeros(2, dtype=np.int64)
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(tmp_path, keys=self.keys, starts=self.starts, ids=self.ids, source=source)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["keys"], data["starts"], data["ids"], data["source"])
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _ids(self, i):
+        return [pid.decode() for pid in self.ids[self.starts[i]:self.starts[i + 1]]]
+
+    def lookup(self, address):
+        """PROPERTY_IDs at exactly this address (after normalization)."""
+        key = normalize_address(address).encode()
+        i = np.searchsorted(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self._ids(i)
+        return []
+
+    def prefix(self, text, limit=10):
+        """(address, PROPERTY_IDs) for up to `limit` addresses starting with `text`, in order."""
+        key = normalize_address(text).encode()
+        lo = np.searchsorted(self.keys, key, side="left")
+        hi = np.searchsorted(self.keys, key + b"\xff", side="left")
+        return [(self.keys[i].decode(), self._ids(i)) for i in range(lo, min(hi, lo + limit))]
+
+
+def build_index(dataset=DEFAULT_DATASET, df=None):
+    """Build and save the index for a dataset (reads ADDRESS/PROPERTY_ID if no frame is given)."""
+    if df is None:
+        df = pd.read_csv(dataset, usecols=["ADDRESS", "PROPERTY_ID"], dtype=str)
+    index = AddressIndex.build(df)
+    index.save(index_path(dataset), dataset)
+    index.source = _source_signature(dataset)
+    return index
+
+
+def load_index(dataset=DEFAULT_DATASET, df=None):
+    """The saved index if it matches the dataset file, otherwise a freshly built one."""
+    path = index_path(dataset)
+    if os.path.exists(path):
+        index = AddressIndex.load(path)
+        if np.array_equal(index.source, _source_signature(dataset)):
+            return index
+    return build_index(dataset, df)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Look up properties by address")
+    parser.add_argument("address", nargs="?", help="Address (or the start of one with --prefix)")
+    parser.add_argument("--prefix", action="store_true", help="Autocomplete: addresses starting with the text")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--build", action="store_true", help="Rebuild the index")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET)
+    args = parser.parse_args(argv)
+
+    started = time.time()
+    index = build_index(args.dataset) if args.build else load_index(args.dataset)
+    print(f"📇 {len(index):,} addresses indexed ({time.time() - started:.2f}s to load)")
+    if not args.address:
+        return
+
+    started = time.perf_counter()
+    if args.prefix:
+        results = index.prefix(args.address, args.limit)
+    else:
+        results = [(normalize_address(args.address), index.lookup(args.address))]
+    elapsed = (time.perf_counter() - started) * 1e6
+    for address, ids in results:
+        if ids:
+            print(f"   {address}: {', '.join(ids)}")
+    if not any(ids for _, ids in results):
+        print(f"   No match for {normalize_address(args.address)!r}")
+    print(f"   ({elapsed:.0f} µs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+Local HTTP API over the merged dataset.
+
+The dataset is read once into column arrays and per-neighborhood
+aggregates; requests are answered from those and from a response cache
+keyed by dataset version, never by re-reading the CSV. Responses carry an
+ETag, so clients that send If-None-Match get a 304 until the data changes.
+The source file is checked periodically and reloaded in the background
+when it changes.
+
+Endpoints (GET, JSON):
+    /version                            dataset version and row count
+    /neighborhoods                      stats for every neighborhood
+    /neighborhoods/{name}               stats for one neighborhood
+    /rankings?metric=median_value&order=desc&limit=20&min_count=100
+    /properties/{PROPERTY_ID}           one property
+    /properties?address=1234 SE MAIN ST lookup by address
+    /addresses?prefix=1234 SE MA        address autocomplete
+    /comps/{PROPERTY_ID}?limit=10       similar properties nearby
+
+Usage:
+    python tools/api_server.py --port 8080
+    curl localhost:8080/rankings?metric=median_price_per_sqft
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from address_index import load_index
+from assessor_schema import CSV_ENGINE, read_dtypes
+
+DEFAULT_DATASET = "Portland_Assessor_AllNeighborhoods.csv"
+SNAPSHOT_INDEX = "snapshots/versions.json"
+CACHE_SIZE = 4096
+RELOAD_CHECK_SECONDS = 30
+METRICS = [
+    "count", "median_value", "mean_value", "total_value", "median_price_per_sqft",
+    "median_sale_price", "median_year_built", "median_square_feet",
+]
+
+
+def dataset_version(path):
+    """Snapshot version when the store exists, otherwise the file's size and mtime."""
+    stat = os.stat(path)
+    version = f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+    if os.path.exists(SNAPSHOT_INDEX):
+        with open(SNAPSHOT_INDEX) as f:
+            versions = json.load(f)
+        if versions:
+            version = f"v{versions[-1]['version']}-{version}"
+    return version
+
+
+def _clean(value):
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) else round(float(value), 2)
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+def _median(values):
+    values = values[~np.isnan(values)]
+    return float(np.median(values)) if len(values) else None
+
+
+class Dataset:
+    """Everything the API needs, computed once per dataset version."""
+
+    def __init__(self, path):
+        self.path = path
+        self.version = dataset_version(path)
+        started = time.time()
+        df = pd.read_csv(path, dtype=read_dtypes(), engine=CSV_ENGINE)
+        hood_col = "neighborhood" if "neighborhood" in df.columns else "NEIGHBORHOOD"
+        df = df[df["PROPERTY_ID"].notna()].drop_duplicates(subset="PROPERTY_ID", keep="last")
+        df = df.drop(columns=[c for c in ["source_file"] if c in df.columns]).reset_index(drop=True)
+        self.df = df
+
+        self.hood = df[hood_col].fillna("UNKNOWN").str.upper().to_numpy()
+        self.value = pd.to_numeric(df["MARKET_VALUE"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        self.sqft = pd.to_numeric(df["SQUARE_FEET"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        self.year = pd.to_numeric(df["YEAR_BUILT"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        self.sale = pd.to_numeric(df["SALE_PRICE"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        self.x = pd.to_numeric(df["X_STATE_PLANE"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        self.y = pd.to_numeric(df["Y_STATE_PLANE"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.ppsf = np.where(self.sqft > 0, self.value / self.sqft, np.nan)
+
+        self.by_id = pd.Index(df["PROPERTY_ID"])
+        self.addresses = load_index(path, df)
+        self.hood_rows = pd.Series(np.arange(len(df))).groupby(self.hood).indices
+        self.stats = {hood: self._stats(hood, rows) for hood, rows in sorted(self.hood_rows.items())}
+        self.load_seconds = time.time() - started
+
+    def _stats(self, hood, rows):
+        value = self.value[rows]
+        return {
+            "neighborhood": hood,
+            "count": int(len(rows)),
+            "median_value": _median(value),
+            "mean_value": float(np.nanmean(value)) if np.isfinite(value).any() else None,
+            "total_value": float(np.nansum(value)),
+            "median_price_per_sqft": _median(self.ppsf[rows]),
+            "median_sale_price": _median(self.sale[rows]),
+            "median_year_built": _median(self.year[rows]),
+            "median_square_feet": _median(self.sqft[rows]),
+        }
+
+    def record(self, i):
+        row = {col: _clean(value) for col, value in self.df.iloc[i].items()}
+        row["price_per_sqft"] = _clean(self.ppsf[i])
+        return row
+
+    def find_property(self, property_id):
+        loc = self.by_id.get_indexer([property_id])[0]
+        return None if loc < 0 else loc
+
+    def comps(self, i, limit=10):
+        """Properties in the same neighborhood with similar size and age, nearest first."""
+        rows = self.hood_rows[self.hood[i]]
+        rows = rows[rows != i]
+        sqft, year = self.sqft[i], self.year[i]
+        mask = np.ones(len(rows), dtype=bool)
+        if not np.isnan(sqft):
+            mask &= np.abs(self.sqft[rows] - sqft) <= 0.2 * sqft
+        if not np.isnan(year):
+            mask &= np.abs(self.year[rows] - year) <= 15
+        rows = rows[mask]
+        if not np.isnan(self.x[i]):
+            distance = np.hypot(self.x[rows] - self.x[i], self.y[rows] - self.y[i])
+            distance = np.where(np.isnan(distance), np.inf, distance)
+        else:
+            distance = np.abs(self.sqft[rows] - sqft) if not np.isnan(sqft) else np.zeros(len(rows))
+        nearest = rows[np.argsort(distance, kind="stable")[:limit]]
+        return nearest
+
+
+class Api:
+    def __init__(self, path):
+        self.path = path
+        self.data = Dataset(path)
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.requests = 0
+        self.watch_task = None  # set by serve(); the event loop only holds tasks weakly
+
+    # --- routing -------------------------------------------------------
+
+    def route(self, path, query):
+        """Return (status, payload) for a request path."""
+        parts = [unquote(p) for p in path.strip("/").split("/") if p]
+        data = self.data
+        if parts == ["version"]:
+            return 200, {"version": data.version, "rows": len(data.df), "source": data.path,
+                         "neighborhoods": len(data.stats), "load_seconds": round(data.load_seconds, 2),
+                         "requests": self.requests, "cache_hits": self.hits}
+        if parts == ["neighborhoods"]:
+            return 200, list(data.stats.values())
+        if len(parts) == 2 and parts[0] == "neighborhoods":
+            stats = data.stats.get(parts[1].upper())
+            return (200, stats) if stats else (404, {"error": f"Unknown neighborhood {parts[1]}"})
+        if parts == ["rankings"]:
+            metric = query.get("metric", "median_value")
+            if metric not in METRICS:
+                return 400, {"error": f"metric must be one of {', '.join(METRICS)}"}
+            min_count = int(query.get("min_count", 100))
+            limit = int(query.get("limit", 20))
+            ranked = [s for s in data.stats.values() if s["count"] >= min_count and s[metric] is not None]
+            ranked.sort(key=lambda s: s[metric], reverse=query.get("order", "desc") != "asc")
+            return 200, [{"rank": n, "neighborhood": s["neighborhood"], metric: s[metric], "count": s["count"]}
+                         for n, s in enumerate(ranked[:limit], 1)]
+        if len(parts) == 2 and parts[0] == "properties":
+            i = data.find_property(parts[1])
+            return (200, data.record(i)) if i is not None else (404, {"error": f"Unknown property {parts[1]}"})
+        if parts == ["properties"] and "address" in query:
+            rows = data.by_id.get_indexer(data.addresses.lookup(query["address"]))
+            return 200, [data.record(i) for i in rows if i >= 0]
+        if parts == ["addresses"] and "prefix" in query:
+            matches = data.addresses.prefix(query["prefix"], int(query.get("limit", 10)))
+            return 200, [{"address": address, "property_ids": ids} for address, ids in matches]
+        if len(parts) == 2 and parts[0] == "comps":
+            i = data.find_property(parts[1])
+            if i is None:
+                return 404, {"error": f"Unknown property {parts[1]}"}
+            comps = data.comps(i, int(query.get("limit", 10)))
+            return 200, {
+                "property": data.record(i),
+                "median_comp_value": _median(data.value[comps]) if len(comps) else None,
+                "comps": [data.record(c) for c in comps],
+            }
+        return 404, {"error": "Not found"}
+
+    def respond(self, target, if_none_match=None):
+        """(status, headers, body) with the response cache and ETag handling."""
+        self.requests += 1
+        url = urlsplit(target)
+        query = dict(parse_qsl(url.query))
+        key = (self.data.version, url.path.rstrip("/"), tuple(sorted(query.items())))
+        cached = self.cache.get(key)
+        if cached:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            status, etag, body = cached
+        else:
+            try:
+                status, payload = self.route(url.path, query)
+            except ValueError as e:
+                status, payload = 400, {"error": str(e)}
+            body = json.dumps(payload).encode()
+            etag = '"' + hashlib.sha1(repr(key).encode()).hexdigest()[:20] + '"'
+            if status == 200 and key[1] != "/version":
+                self.cache[key] = (status, etag, body)
+                if len(self.cache) > CACHE_SIZE:
+                    self.cache.popitem(last=False)
+
+        headers = {
+            "Content-Type": "application/json",
+            "Access-Control-Allow-Origin": "*",
+            "Cache-Control": "no-cache",
+            "X-Dataset-Version": self.data.version,
+        }
+        if status == 200:
+            headers["ETag"] = etag
+            if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+                return 304, headers, b""
+        return status, headers, body
+
+    # --- reloading -----------------------------------------------------
+
+    async def watch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(RELOAD_CHECK_SECONDS)
+            try:
+                if dataset_version(self.path) == self.data.version:
+                    continue
+                print("🔄 Dataset changed, reloading...")
+                self.data = await loop.run_in_executor(None, Dataset, self.path)
+                self.cache.clear()
+                print(f"✅ Now serving {self.data.version} ({len(self.data.df):,} properties)")
+            except Exception as e:
+                print(f"⚠️  Reload failed: {e}")
+
+
+STATUS_TEXT = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+async def handle_connection(api, reader, writer):
+    """Minimal HTTP/1.1 with keep-alive; GET and HEAD only."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, target, version = request_line.decode("latin-1").split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            if method not in ("GET", "HEAD"):
+                status, response_headers, body = 405, {"Allow": "GET, HEAD"}, b""
+            else:
+                status, response_headers, body = api.respond(target, headers.get("if-none-match"))
+            keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+            response_headers["Content-Length"] = str(len(body))
+            response_headers["Connection"] = "keep-alive" if keep_alive else "close"
+            head = f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            head += "".join(f"{k}: {v}\r\n" for k, v in response_headers.items()) + "\r\n"
+            writer.write(head.encode("latin-1") + (body if method == "GET" else b""))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(api, host, port):
+    server = await asyncio.start_server(lambda r, w: handle_connection(api, r, w), host, port)
+    api.watch_task = asyncio.get_running_loop().create_task(api.watch())
+    print(f"🌐 Serving {api.data.path} ({len(api.data.df):,} properties, version {api.data.version})")
+    print(f"   http://{host}:{port}/neighborhoods")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        # Stop the reload watcher with the server; awaiting it re-raises anything it died of
+        api.watch_task.cancel()
+        try:
+            await api.watch_task
+        except asyncio.CancelledError:
+            pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local JSON API over the assessor dataset")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET, help="Dataset CSV to serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args(argv)
+
+    print(f"📦 Loading {args.dataset}...")
+    api = Api(args.dataset)
+    print(f"   Ready in {api.data.load_seconds:.1f}s")
+    try:
+        asyncio.run(serve(api, args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+
+
+if __name__ == "__main__":
+    main()
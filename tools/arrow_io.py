@@ -0,0 +1,85 @@
+"""
+Arrow IPC (Feather v2) hand-off between pipeline stages.
+
+Every dataset a stage writes as CSV also gets an uncompressed Arrow file
+next to it (Portland_Assessor_AllNeighborhoods.arrow, subsets/*.arrow).
+Readers memory-map the Arrow file instead of parsing the CSV: numeric
+columns come back without a copy and the types are the ones the writer
+had, so no stage re-runs type inference. The CSVs are still written for
+people and tools that want them; an Arrow file older than its CSV (the
+CSV was edited by hand or by a tool that only writes CSV) is ignored.
+
+pyarrow is optional; without it only the CSVs are written and read.
+"""
+
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    from pyarrow import feather
+except ImportError:  # optional; CSV is used on its own
+    pa = None
+
+
+def arrow_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".arrow"
+
+
+def _to_table(df):
+    try:
+        return pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Object columns holding mixed types (e.g. numbers and text): store as text
+        mixed = {col: df[col].astype("string") for col in df.columns if df[col].dtype == object}
+        return pa.Table.from_pandas(df.assign(**mixed), preserve_index=False)
+
+
+def write_frame(df, csv_path, csv=True):
+    """Write a dataset as CSV (unless csv=False) and, with pyarrow, as Arrow IPC next to it."""
+    if csv:
+        df.to_csv(csv_path, index=False)
+    if pa is not None:
+        path = arrow_path(csv_path)
+        feather.write_feather(_to_table(df), path + ".tmp", compression="uncompressed")
+        os.replace(path + ".tmp", path)
+
+
+def has_fresh_arrow(csv_path):
+    path = arrow_path(csv_path)
+    if pa is None or not os.path.exists(path):
+        return False
+    return not os.path.exists(csv_path) or os.path.getmtime(path) >= os.path.getmtime(csv_path)
+
+
+def read_frame(csv_path, columns=None, **csv_kwargs):
+    """
+    Read a dataset written by write_frame: memory-mapped from its Arrow file
+    when that is current, otherwise parsed from the CSV.
+    """
+    if has_fresh_arrow(csv_path):
+        table = feather.read_table(arrow_path(csv_path), columns=columns, memory_map=True)
+        return table.to_pandas(split_blocks=True)
+    csv_kwargs.setdefault("low_memory", False)
+    return pd.read_csv(csv_path, usecols=columns, **csv_kwargs)
+
+
+def read_rows(csv_path, rows, columns=None, chunksize=200_000):
+    """
+    Only the given row positions of a dataset (in ascending order): taken from
+    the memory-mapped Arrow file when that is current, otherwise picked out
+    of the CSV chunk by chunk.
+    """
+    if has_fresh_arrow(csv_path):
+        table = feather.read_table(arrow_path(csv_path), columns=columns, memory_map=True)
+        return table.take(pa.array(rows)).to_pandas(split_blocks=True)
+    # Positions count parsed records, not file lines, so quoted newlines in
+    # LEGAL_DESCRIPTION can't shift them (a skiprows line counter would)
+    wanted = pd.Index(rows, dtype="int64").sort_values()
+    parts, start = [], 0
+    for chunk in pd.read_csv(csv_path, usecols=columns, low_memory=False, chunksize=chunksize):
+        positions = wanted[(wanted >= start) & (wanted < start + len(chunk))] - start
+        parts.append(chunk.iloc[positions])
+        start += len(chunk)
+    return pd.concat(parts, ignore_index=True) if parts else pd.read_csv(csv_path, usecols=columns, nrows=0)
@@ -0,0 +1,196 @@
+"""
+Canonical columns and types for PortlandMaps assessor exports.
+
+Raw page files are read with these types fixed up front, so pandas does
+not re-run type inference on each of the several hundred files and every
+page comes back with identical dtypes.
+
+Before any data is read, each file's header is fingerprinted and mapped
+onto the canonical columns through COLUMN_ALIASES, so a renamed or
+reordered export is read into the same columns instead of widening the
+merge with mostly-empty ones. Files missing a required column are
+rejected; files with columns we cannot map are flagged and those columns
+dropped. Every layout seen is kept in schema_fingerprints.json.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import re
+from collections import defaultdict
+from datetime import datetime
+from functools import lru_cache
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = "pyarrow"  # multithreaded reader
+except ImportError:  # pyarrow is optional; the C reader works too
+    CSV_ENGINE = "c"
+
+TEXT_COLUMNS = [
+    "ADDRESS", "CITY", "STATE", "ZIP_CODE_STRING", "COUNTY", "NEIGHBORHOOD",
+    "PROPERTY_ID", "STATE_ID", "PARENT_STATE_ID", "ALT_ACCOUNT_NUMBER",
+    "OWNER", "LEGAL_DESCRIPTION", "SALE_DATE",
+]
+INTEGER_COLUMNS = [
+    "ZIP_CODE", "SQUARE_FEET", "MARKET_VALUE", "SALE_PRICE", "YEAR_BUILT", "PRIMARY",
+    "validation_flags",  # added by the merge
+]
+FLOAT_COLUMNS = ["X_STATE_PLANE", "Y_STATE_PLANE", "LATITUDE", "LONGITUDE"]  # lat/lon added by the merge
+
+CANONICAL_COLUMNS = [
+    "ADDRESS", "CITY", "STATE", "ZIP_CODE", "ZIP_CODE_STRING", "COUNTY", "NEIGHBORHOOD",
+    "PROPERTY_ID", "STATE_ID", "PARENT_STATE_ID", "ALT_ACCOUNT_NUMBER", "OWNER",
+    "LEGAL_DESCRIPTION", "SQUARE_FEET", "MARKET_VALUE", "SALE_DATE", "SALE_PRICE",
+    "YEAR_BUILT", "PRIMARY", "X_STATE_PLANE", "Y_STATE_PLANE",
+]
+
+REQUIRED_COLUMNS = ["PROPERTY_ID", "ADDRESS"]
+
+# Other header spellings seen in (or expected from) PortlandMaps exports.
+# Bump ALIAS_VERSION whenever this table changes; it is recorded with each layout.
+ALIAS_VERSION = 1
+COLUMN_ALIASES = {
+    "SITE_ADDRESS": "ADDRESS", "SITEADDR": "ADDRESS", "PROPERTY_ADDRESS": "ADDRESS",
+    "SITE_CITY": "CITY", "SITECITY": "CITY",
+    "ZIP": "ZIP_CODE", "ZIPCODE": "ZIP_CODE", "SITE_ZIP": "ZIP_CODE", "ZIP_STRING": "ZIP_CODE_STRING",
+    "NEIGHBORHOOD_NAME": "NEIGHBORHOOD", "NBHD": "NEIGHBORHOOD",
+    "PROPERTYID": "PROPERTY_ID", "PROP_ID": "PROPERTY_ID", "PROPERTY_NUMBER": "PROPERTY_ID",
+    "STATEID": "STATE_ID", "PARENT_STATEID": "PARENT_STATE_ID", "ALT_ACCOUNT": "ALT_ACCOUNT_NUMBER",
+    "OWNER_NAME": "OWNER", "OWNERS": "OWNER", "OWNER1": "OWNER",
+    "LEGAL": "LEGAL_DESCRIPTION", "LEGAL_DESC": "LEGAL_DESCRIPTION",
+    "SQFT": "SQUARE_FEET", "SQ_FT": "SQUARE_FEET", "BLDG_SQFT": "SQUARE_FEET", "BUILDING_SQFT": "SQUARE_FEET",
+    "MARKET_VAL": "MARKET_VALUE", "TOTAL_MARKET_VALUE": "MARKET_VALUE", "REAL_MARKET_VALUE": "MARKET_VALUE",
+    "SALEDATE": "SALE_DATE", "LAST_SALE_DATE": "SALE_DATE",
+    "SALEPRICE": "SALE_PRICE", "LAST_SALE_PRICE": "SALE_PRICE",
+    "YEARBUILT": "YEAR_BUILT", "YR_BUILT": "YEAR_BUILT",
+    "X_COORD": "X_STATE_PLANE", "STATE_PLANE_X": "X_STATE_PLANE",
+    "Y_COORD": "Y_STATE_PLANE", "STATE_PLANE_Y": "Y_STATE_PLANE",
+}
+FINGERPRINT_REGISTRY = "schema_fingerprints.json"
+
+DTYPES = {
+    **{col: str for col in TEXT_COLUMNS},
+    **{col: "Int64" for col in INTEGER_COLUMNS},
+    **{col: "float64" for col in FLOAT_COLUMNS},
+}
+
+
+def read_dtypes():
+    """dtype mapping for pd.read_csv; columns we don't know about are read as text."""
+    return defaultdict(lambda: str, DTYPES)
+
+
+def coerce_types(df):
+    """Cast a frame read as text to the canonical types; unparseable numbers become NA."""
+    for col in df.columns:
+        if col in INTEGER_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors="coerce").round().astype("Int64")
+        elif col in FLOAT_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    return df
+
+
+def read_header(source):
+    """Column names from the first line of a CSV path or binary file object (nothing else is read)."""
+    if hasattr(source, "readline"):
+        line = source.readline().decode("utf-8-sig")
+        source.seek(0)
+        return next(csv.reader([line]), [])
+    with open(source, newline="", encoding="utf-8-sig") as f:
+        return next(csv.reader(f), [])
+
+
+def header_fingerprint(columns):
+    return hashlib.sha1("\x1f".join(columns).encode()).hexdigest()[:12]
+
+
+def _normalize_column(name):
+    return re.sub(r"[^A-Z0-9]+", "_", name.strip().upper()).strip("_")
+
+
+@lru_cache(maxsize=None)
+def _layout(columns):
+    rename, unknown, seen = {}, [], set()
+    for raw in columns:
+        name = _normalize_column(raw)
+        canonical = name if name in CANONICAL_COLUMNS else COLUMN_ALIASES.get(name)
+        if canonical is None or canonical in seen:  # unmappable, or a second source for one column
+            unknown.append(raw)
+            continue
+        seen.add(canonical)
+        if canonical != raw:
+            rename[raw] = canonical
+    missing = [col for col in CANONICAL_COLUMNS if col not in seen]
+    absent = [col for col in REQUIRED_COLUMNS if col not in seen]
+    if absent:
+        status, reason = "rejected", f"missing required {', '.join(absent)}"
+    elif unknown:
+        status, reason = "flagged", f"unknown columns dropped: {', '.join(unknown)}"
+    elif rename:
+        status, reason = "aliased", f"{len(rename)} columns renamed"
+    else:
+        status, reason = "ok", ""
+    return {
+        "fingerprint": header_fingerprint(columns),
+        "columns": list(columns),
+        "rename": rename,
+        "unknown": unknown,
+        "missing": missing,
+        "status": status,
+        "reason": reason,
+        "alias_version": ALIAS_VERSION,
+    }
+
+
+def header_layout(columns):
+    """
+    How a file's header maps onto the canonical schema: renames, unknown and
+    missing columns, and a status of ok / aliased / flagged / rejected.
+    """
+    return dict(_layout(tuple(columns)))
+
+
+def record_layouts(layouts, path=FINGERPRINT_REGISTRY):
+    """Add layouts to the fingerprint registry; returns the ones never seen before."""
+    registry = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            registry = json.load(f)
+    now = datetime.now().isoformat(timespec="seconds")
+    new = {}
+    for layout in layouts:
+        fingerprint = layout["fingerprint"]
+        if fingerprint not in registry:
+            entry = {key: layout[key] for key in ["columns", "status", "reason", "alias_version"]}
+            registry[fingerprint] = {**entry, "first_seen": now, "files": 0}
+            new[fingerprint] = layout
+        registry[fingerprint].update(last_seen=now, status=layout["status"], reason=layout["reason"],
+                                     alias_version=layout["alias_version"])
+        registry[fingerprint]["files"] += 1
+    with open(path, "w") as f:
+        json.dump(registry, f, indent=2)
+    return list(new.values())
+
+
+def read_page_csv(source, engine=None, layout=None):
+    """
+    Read one raw page CSV with the canonical types.
+    A file with junk in a numeric column is re-read as text and coerced, so
+    one bad cell does not cost the whole page. With a header layout whose
+    columns differ from the canonical names, the columns are renamed, put in
+    canonical order, and unknown ones dropped.
+    """
+    engine = engine or CSV_ENGINE
+    if layout and (layout["rename"] or layout["unknown"]):
+        df = pd.read_csv(source, dtype=str, engine="c").rename(columns=layout["rename"])
+        return coerce_types(df[[col for col in CANONICAL_COLUMNS if col in df.columns]])
+    try:
+        return pd.read_csv(source, dtype=read_dtypes(), engine=engine)
+    except (ValueError, TypeError):
+        if hasattr(source, "seek"):
+            source.seek(0)
+        return coerce_types(pd.read_csv(source, dtype=str, engine="c"))
@@ -1,103 +1,325 @@
+import argparse
+import json
 import os
 import pandas as pd
 import glob
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from address_index import build_index as build_address_index
+from arrow_io import read_frame, write_frame
+from assessor_schema import CSV_ENGINE, header_layout, read_header, read_page_csv, record_layouts
+from projection import add_lat_lon
+from raw_archive import ARCHIVE_DIR, RawArchive, parse_filename
+from sampling import build_index as build_sample_index
+from spatial_join import boundary_files, spatial_join
+from snapshot_store import SnapshotStore
+from text_index import build_index as build_text_index
+from validation import FLAGS_COLUMN, QUARANTINE_DIR, validate
 
-print("🧹 Cleaning up and organizing PDX assessor data...\n")
-
-# Remove old generic files
-old_files = glob.glob("downloads/Assessor-Search-Results*.csv")
-if old_files:
-    print(f"Removing {len(old_files)} old generic download files...")
-    for f in old_files:
-        os.remove(f)
-        
-# Get all properly named neighborhood files
-neighborhood_files = [f for f in glob.glob("downloads/*.csv") if "_page" in f]
-print(f"Found {len(neighborhood_files)} neighborhood data files\n")
-
-# Organize by neighborhood
-neighborhoods = {}
-for filepath in neighborhood_files:
-    filename = os.path.basename(filepath)
-    neighborhood = filename.split("_page")[0]
-    
-    if neighborhood not in neighborhoods:
-        neighborhoods[neighborhood] = []
-    neighborhoods[neighborhood].append(filepath)
-
-print(f"📊 Data Summary:")
-print(f"Total neighborhoods: {len(neighborhoods)}")
-multi_page = {n: len(files) for n, files in neighborhoods.items() if len(files) > 1}
-if multi_page:
-    print(f"Multi-page neighborhoods: {len(multi_page)}")
-    for n, count in sorted(multi_page.items())[:10]:
-        print(f"  - {n}: {count} pages")
-    if len(multi_page) > 10:
-        print(f"  ... and {len(multi_page) - 10} more")
-
-# Merge all data
-print("\n📦 Merging all neighborhood data...")
-all_frames = []
-
-for neighborhood, files in sorted(neighborhoods.items()):
-    print(f"  Processing {neighborhood}...")
-    for filepath in sorted(files):
+OUTPUT_FILE = "Portland_Assessor_AllNeighborhoods.csv"
+PAGE_PLAN = os.path.join("downloads", "page_plan.json")  # written by the scrapers (portlandmaps_common)
+COORDINATE_COLUMNS = ["X_STATE_PLANE", "Y_STATE_PLANE"]
+
+
+def backfill_coordinates(combined, previous_file=OUTPUT_FILE):
+    """
+    Fill missing state-plane coordinates from the previous merge by PROPERTY_ID
+    (pages scraped with --extract dom have none). Returns the number of rows filled.
+    """
+    for col in COORDINATE_COLUMNS:
+        if col not in combined.columns:
+            combined[col] = float("nan")
+    missing = combined[COORDINATE_COLUMNS].isna().any(axis=1)
+    if not missing.any() or not os.path.exists(previous_file):
+        return 0
+    previous = read_frame(previous_file, columns=["PROPERTY_ID"] + COORDINATE_COLUMNS)
+    previous = previous.dropna(subset=COORDINATE_COLUMNS).drop_duplicates("PROPERTY_ID").set_index("PROPERTY_ID")
+    ids = combined.loc[missing, "PROPERTY_ID"]
+    filled = ids.isin(previous.index)
+    for col in COORDINATE_COLUMNS:
+        combined.loc[ids[filled].index, col] = previous[col].reindex(ids[filled]).to_numpy()
+    return int(filled.sum())
+
+
+def load_page_plan(path=PAGE_PLAN):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {hood.upper(): entry for hood, entry in json.load(f).items()}
+
+
+def split_downloads(files, plan):
+    """
+    Split downloaded page files into those of neighborhoods with every page
+    on disk (the page plan's count, or 1..highest page without a plan entry)
+    and {neighborhood: missing pages} for neighborhoods still being scraped.
+    """
+    pages = {}
+    for path in files:
+        neighborhood, page, _ = parse_filename(path)
+        pages.setdefault(neighborhood.upper(), {}).setdefault(page, []).append(path)
+    ready, waiting = [], {}
+    for hood, found in pages.items():
+        entry = plan.get(hood)
+        if entry and entry.get("full_export"):
+            expected = {1}
+        else:
+            expected = set(range(1, (entry["pages"] if entry else max(found)) + 1))
+        missing = sorted(expected - set(found))
+        if missing:
+            waiting[hood] = missing
+        else:
+            ready += [path for page in sorted(found) for path in found[page]]
+    return ready, waiting
+
+
+def scrape_finished(files, plan):
+    """True when every neighborhood in the page plan has all its pages in downloads/."""
+    have = {}
+    for path in files:
+        neighborhood, page, _ = parse_filename(path)
+        have.setdefault(neighborhood.upper(), set()).add(page)
+    for hood, entry in plan.items():
+        expected = {1} if entry.get("full_export") else set(range(1, entry["pages"] + 1))
+        if not expected <= have.get(hood, set()):
+            return False
+    return True
+
+
+def merge(as_of=None):
+    """
+    Merge the downloaded pages (or, with as_of, an archived scrape) into
+    the main dataset, write it with its indexes and snapshot version, and
+    return the merged frame.
+
+    Neighborhoods whose pages are all downloaded are archived as a new
+    scrape; the dataset is then rebuilt from the latest complete scrape of
+    every neighborhood in the archive, so a merge during a scrape adds to
+    the dataset instead of replacing it with the pages downloaded so far.
+    Downloads are removed only once the page plan shows the whole scrape
+    finished, since the scrapers resume from the files in downloads/.
+    Returns None, leaving the dataset as it is, when no neighborhood has
+    finished since the last merge.
+    """
+    print("🧹 Cleaning up and organizing PDX assessor data...\n")
+    archive = RawArchive(ARCHIVE_DIR)
+
+    if as_of:
+        neighborhood_files = []
+        sources = archive.as_of(as_of)
+        if sources.empty:
+            raise SystemExit(f"❌ No complete scrape archived as of {as_of}")
+        print(f"Re-merging {len(sources)} archived pages as of {as_of}\n")
+    else:
+        # Remove old generic files
+        old_files = glob.glob("downloads/Assessor-Search-Results*.csv")
+        if old_files:
+            print(f"Removing {len(old_files)} old generic download files...")
+            for f in old_files:
+                os.remove(f)
+
+        # Get all properly named neighborhood files
+        neighborhood_files = sorted(f for f in glob.glob("downloads/*.csv") if "_page" in f)
+        print(f"Found {len(neighborhood_files)} neighborhood data files")
+        plan = load_page_plan()
+        ready_files, waiting = split_downloads(neighborhood_files, plan)
+        for hood, missing in sorted(waiting.items()):
+            print(f"   ⏳ {hood}: still waiting for page(s) {', '.join(map(str, missing))}; kept for the next merge")
+
+        # Nothing newly complete and the archive is no newer than the dataset: it is current
+        if (not ready_files and os.path.exists(OUTPUT_FILE) and os.path.exists(archive.index_path)
+                and os.path.getmtime(OUTPUT_FILE) >= os.path.getmtime(archive.index_path)):
+            print(f"\n⏳ No neighborhood finished since the last merge; {OUTPUT_FILE} is unchanged")
+            return None
+
+        # Store complete neighborhoods in the content-addressed archive (pages already there are only
+        # indexed once); the merge reads every neighborhood's latest complete scrape back from there
+        archive.add_files(ready_files)
+        sources = archive.as_of()
+        if sources.empty:
+            print("\n⏳ No complete neighborhood scrape in downloads/ or the archive yet; nothing to merge")
+            return None
+        # Downloads stay until the scrape is done, so an interrupted scraper still resumes where it was
+        neighborhood_files = ready_files if scrape_finished(neighborhood_files, plan) else []
+        stats = archive.stats()
+        print(f"📦 Archived in {ARCHIVE_DIR}/: {stats['blobs']:,} distinct pages, "
+              f"{stats['raw_bytes'] / 1e6:,.1f} MB of downloads stored in {stats['stored_bytes'] / 1e6:,.1f} MB\n")
+
+    # Pages per neighborhood
+    neighborhoods = sources.groupby("neighborhood").size().to_dict()
+
+    print(f"📊 Data Summary:")
+    print(f"Total neighborhoods: {len(neighborhoods)}")
+    multi_page = {n: count for n, count in neighborhoods.items() if count > 1}
+    if multi_page:
+        print(f"Multi-page neighborhoods: {len(multi_page)}")
+        for n, count in sorted(multi_page.items())[:10]:
+            print(f"  - {n}: {count} pages")
+        if len(multi_page) > 10:
+            print(f"  ... and {len(multi_page) - 10} more")
+
+    # Fingerprint every header before reading any data, so a changed export is
+    # mapped onto the canonical columns (or rejected) instead of widening the merge
+    print("\n📐 Checking file headers...")
+    layouts = {blob: header_layout(read_header(archive.open(blob))) for blob in sources["blob"].unique()}
+    for layout in record_layouts(layouts.values()):
+        print(f"   New header layout {layout['fingerprint']}: {layout['status']}"
+              + (f" ({layout['reason']})" if layout["reason"] else ""))
+    statuses = pd.Series([layout["status"] for layout in layouts.values()], dtype=object).value_counts()
+    print("   " + ", ".join(f"{count} {status}" for status, count in statuses.items()))
+    for filename, blob in sorted(zip(sources["filename"], sources["blob"])):
+        if layouts[blob]["status"] in ("rejected", "flagged"):
+            print(f"   ⚠️  {filename}: {layouts[blob]['status']}, {layouts[blob]['reason']}")
+
+    # Merge all data
+    print("\n📦 Merging all neighborhood data...")
+
+    def read_neighborhood_file(job):
+        neighborhood, filename, blob = job
         try:
-            df = pd.read_csv(filepath)
-            df["neighborhood"] = neighborhood
-            df["source_file"] = os.path.basename(filepath)
-            all_frames.append(df)
+            df = read_page_csv(archive.open(blob), layout=layouts[blob])
         except Exception as e:
-            print(f"    ⚠️  Error reading {filepath}: {e}")
-
-# Combine all data
-print("\n🔗 Combining data...")
-combined = pd.concat(all_frames, ignore_index=True)
-
-# Remove duplicates (in case of overlapping downloads)
-initial_rows = len(combined)
-combined = combined.drop_duplicates()
-final_rows = len(combined)
-if initial_rows > final_rows:
-    print(f"   Removed {initial_rows - final_rows} duplicate rows")
-
-# Save combined file
-output_file = "Portland_Assessor_AllNeighborhoods.csv"
-combined.to_csv(output_file, index=False)
-print(f"\n✅ Combined dataset saved: {output_file}")
-print(f"   Total rows: {len(combined):,}")
-print(f"   Total columns: {len(combined.columns)}")
-
-# Create summary report
-summary_file = "data_summary.txt"
-with open(summary_file, "w") as f:
-    f.write("Portland Assessor Data Collection Summary\n")
-    f.write("=" * 50 + "\n\n")
-    f.write(f"Collection Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-    f.write(f"Total Properties: {len(combined):,}\n")
-    f.write(f"Total Neighborhoods: {len(neighborhoods)}\n")
-    f.write(f"Total Files Processed: {len(neighborhood_files)}\n\n")
-    
-    f.write("Properties by Neighborhood:\n")
-    f.write("-" * 50 + "\n")
-    neighborhood_counts = combined.groupby('neighborhood').size().sort_values(ascending=False)
-    for hood, count in neighborhood_counts.items():
-        f.write(f"{hood}: {count:,}\n")
-
-print(f"📝 Summary report saved: {summary_file}")
-
-# Create a clean data folder
-print("\n📁 Organizing files...")
-os.makedirs("raw_downloads", exist_ok=True)
-
-for f in neighborhood_files:
-    new_path = f.replace("downloads/", "raw_downloads/")
-    os.rename(f, new_path)
-
-print(f"   Moved {len(neighborhood_files)} files to raw_downloads/")
-
-print("\n🎉 All done! Your data is ready.")
-print(f"\nMain dataset: {output_file}")
-print(f"Raw files: raw_downloads/")
-print(f"Summary: {summary_file}")
+            print(f"    ⚠️  Error reading {filename}: {e}")
+            return None
+        df["neighborhood"] = neighborhood
+        df["source_file"] = filename
+        return df
+
+    # Parse files concurrently; map() keeps the sorted order so the merge is reproducible
+    jobs = sorted((n, filename, blob) for n, filename, blob in zip(sources["neighborhood"], sources["filename"],
+                                                                   sources["blob"])
+                  if layouts[blob]["status"] != "rejected")
+    workers = min(32, (os.cpu_count() or 1) * 2)
+    print(f"  Reading {len(jobs)} files with {workers} threads ({CSV_ENGINE} CSV engine)...")
+    all_frames = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for i, df in enumerate(executor.map(read_neighborhood_file, jobs), 1):
+            if df is not None:
+                all_frames.append(df)
+            if i % 50 == 0 or i == len(jobs):
+                print(f"  {i}/{len(jobs)} files read")
+
+    # Combine all data
+    print("\n🔗 Combining data...")
+    combined = pd.concat(all_frames, ignore_index=True)
+
+    # Remove duplicates (in case of overlapping downloads)
+    initial_rows = len(combined)
+    combined = combined.drop_duplicates()
+    final_rows = len(combined)
+    if initial_rows > final_rows:
+        print(f"   Removed {initial_rows - final_rows} duplicate rows")
+
+    # Results-table pages (--extract dom) carry no coordinates; reuse the last merge's where there are some
+    if combined.reindex(columns=COORDINATE_COLUMNS).isna().any(axis=1).any():
+        filled = backfill_coordinates(combined)
+        still_missing = int(combined[COORDINATE_COLUMNS].isna().any(axis=1).sum())
+        print(f"\n📍 Coordinates: {filled:,} filled from {OUTPUT_FILE}, {still_missing:,} properties still without")
+
+    # Project state-plane coordinates to latitude/longitude in one batch
+    print("\n🌐 Adding LATITUDE/LONGITUDE...")
+    projected = add_lat_lon(combined)
+    print(f"   {combined['LATITUDE'].notna().sum():,} properties located ({projected:,} new coordinate pairs projected)")
+
+    # Attribute properties to any local boundary files (ZIP areas, tracts, districts...)
+    for boundary_file in boundary_files():
+        column = os.path.splitext(os.path.basename(boundary_file))[0]
+        try:
+            matched = spatial_join(combined, boundary_file)
+            print(f"   {column}: {matched:,} properties matched from {boundary_file}")
+        except Exception as e:
+            print(f"   ⚠️  Skipping {boundary_file}: {e}")
+
+    # Check every row against the validation rules once, here; analyses select rows with valid_rows()
+    print("\n🔍 Validating...")
+    rule_counts = validate(combined)
+    flagged = int((combined[FLAGS_COLUMN] != 0).sum())
+    print(f"   {flagged:,} rows break at least one rule (kept and flagged in {FLAGS_COLUMN}, copied to {QUARANTINE_DIR}/)")
+    for rule, count in rule_counts.items():
+        if count:
+            print(f"   - {rule}: {count:,}")
+
+    # Save combined file
+    output_file = OUTPUT_FILE
+    write_frame(combined, output_file)
+    print(f"\n✅ Combined dataset saved: {output_file}")
+    print(f"   Total rows: {len(combined):,}")
+    print(f"   Total columns: {len(combined.columns)}")
+
+    # Address lookups (exact and autocomplete) without reading the CSV
+    address_index = build_address_index(output_file, combined)
+    print(f"   Address index: {len(address_index):,} addresses")
+
+    # Word index over OWNER / LEGAL_DESCRIPTION for keyword and plat searches
+    text_index = build_text_index(output_file, combined)
+    vocabulary = sum(len(terms) for terms, _, _ in text_index.fields.values())
+    print(f"   Text index: {vocabulary:,} distinct words")
+
+    # Strata and hash numbers per row, so stratified samples read only the sampled rows
+    sample_index = build_sample_index(output_file, combined)
+    print(f"   Sample index: {len(sample_index.labels):,} strata (neighborhood x value tier)")
+
+    # Keep this refresh as a version so earlier values are not lost
+    print("\n🗂️  Recording snapshot version...")
+    version = SnapshotStore("snapshots").commit(combined, label=output_file, feed_dir="changes")
+    if "feed" not in version:
+        print(f"   Version {version['version']}: first full snapshot ({version['rows']:,} properties)")
+    else:
+        print(f"   Version {version['version']}: {version['changed_cells']:,} changed cells "
+              f"({version['kind']}, {version['rows']:,} properties)")
+        print(f"   Change feed: {version['feed']}")
+    if version.get("duplicate_rows"):
+        print(f"   ⚠️  {version['duplicate_rows']:,} rows repeat a PROPERTY_ID (listed under more than one "
+              "search neighborhood); the snapshot and change feed keep the last of each")
+
+    # Create summary report
+    summary_file = "data_summary.txt"
+    with open(summary_file, "w") as f:
+        f.write("Portland Assessor Data Collection Summary\n")
+        f.write("=" * 50 + "\n\n")
+        f.write(f"Collection Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        f.write(f"Total Properties: {len(combined):,}\n")
+        f.write(f"Total Neighborhoods: {len(neighborhoods)}\n")
+        f.write(f"Total Files Processed: {len(sources)}\n\n")
+
+        f.write("Properties by Neighborhood:\n")
+        f.write("-" * 50 + "\n")
+        neighborhood_counts = combined.groupby('neighborhood').size().sort_values(ascending=False)
+        for hood, count in neighborhood_counts.items():
+            f.write(f"{hood}: {count:,}\n")
+
+    print(f"📝 Summary report saved: {summary_file}")
+
+    # The downloads are safely in the archive now
+    if neighborhood_files:
+        print("\n📁 Organizing files...")
+        for f in neighborhood_files:
+            os.remove(f)
+        print(f"   Removed {len(neighborhood_files)} downloaded files (archived in {ARCHIVE_DIR}/)")
+
+    print("\n🎉 All done! Your data is ready.")
+    print(f"\nMain dataset: {output_file}")
+    print(f"Raw files: {ARCHIVE_DIR}/ (python tools/raw_archive.py stats)")
+    print(f"Summary: {summary_file}")
+    print(f"History: snapshots/ (change feeds in changes/)")
+    print(f"Quarantine: {QUARANTINE_DIR}/ (rows breaking validation rules)")
+
+    return combined
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge downloaded neighborhood pages into one dataset")
+    parser.add_argument("--as-of", help="Re-merge the archived scrape as of YYYYMMDD[_HHMMSS] instead of downloads/")
+    parser.add_argument("--subsets", action="store_true",
+                        help="Also build the quality subsets in this process from the merged frame")
+    args = parser.parse_args(argv)
+
+    combined = merge(args.as_of)
+    if combined is not None and args.subsets:
+        from create_quality_subsets import create_subsets
+        print()
+        create_subsets(combined)
+
+
+if __name__ == "__main__":
+    main()
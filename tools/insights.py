@@ -0,0 +1,248 @@
+"""
+Structured, cached results for the analysis reports.
+
+Each insight in examples/deep_analysis.py and examples/advanced_analysis.py
+returns an Insight: named scalars plus named tables (DataFrames). A whole
+run is kept as a Report in .insight_cache/<report>.pkl, keyed on the
+dataset file and the source of the script that computed it, so printing
+the report again, or in another format, reads the cache instead of
+re-running the analysis.
+
+Renderers turn a Report into text: "text" (the terminal report; scripts
+pass their own per-insight formatters), "markdown", "json" and "summary"
+(the short key: value files kept in data/). Add one with @renderer("name").
+
+Usage:
+    python tools/insights.py                              # cached reports
+    python tools/insights.py deep_analysis -f markdown -o deep_analysis.md
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import pickle
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from arrow_io import arrow_path
+
+CACHE_DIR = ".insight_cache"
+
+
+@dataclass
+class Insight:
+    key: str
+    title: str
+    scalars: dict = field(default_factory=dict)
+    tables: dict = field(default_factory=dict)
+
+
+@dataclass
+class Report:
+    name: str
+    title: str
+    dataset: str
+    signature: tuple
+    generated_at: str
+    insights: list
+    summary: dict = field(default_factory=dict)
+
+    def __getitem__(self, key):
+        return next(insight for insight in self.insights if insight.key == key)
+
+
+def _file_signature(path):
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def report_signature(dataset, script):
+    """What a cached report depends on: the dataset (CSV and Arrow copy) and the script's code."""
+    with open(script, "rb") as f:
+        code = hashlib.sha1(f.read()).hexdigest()
+    return _file_signature(dataset), _file_signature(arrow_path(dataset)), code
+
+
+def cache_path(name, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, name + ".pkl")
+
+
+def load_report(name, cache_dir=CACHE_DIR):
+    """The cached report, whatever data it was computed from (None if there is none)."""
+    path = cache_path(name, cache_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def save_report(report, cache_dir=CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = cache_path(report.name, cache_dir)
+    with open(path + ".tmp", "wb") as f:
+        pickle.dump(report, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + ".tmp", path)
+
+
+def run_report(name, title, dataset, script, load, insights, summarize=None, refresh=False, cache_dir=CACHE_DIR):
+    """
+    The report from the cache when it was computed from this dataset by this
+    version of the script; otherwise load() the data, run every insight
+    function on it, cache the result and return it.
+    """
+    signature = report_signature(dataset, script)
+    if not refresh:
+        cached = load_report(name, cache_dir)
+        if cached is not None and cached.signature == signature:
+            return cached
+    df = load()
+    report = Report(
+        name=name, title=title, dataset=dataset, signature=signature,
+        generated_at=datetime.now().strftime("%Y-%m-%d %H:%M"),
+        insights=[compute(df) for compute in insights],
+        summary=summarize(df) if summarize else {},
+    )
+    save_report(report, cache_dir)
+    return report
+
+
+def _plain(value):
+    """Scalars as JSON-ready Python values (numpy numbers unwrapped, NaN as None)."""
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def _records(table):
+    return json.loads(table.reset_index().to_json(orient="records", date_format="iso"))
+
+
+RENDERERS = {}
+
+
+def renderer(name):
+    """Register a function(report, **options) -> str as an output format."""
+    def register(render_fn):
+        RENDERERS[name] = render_fn
+        return render_fn
+    return register
+
+
+def render(report, fmt="text", **options):
+    return RENDERERS[fmt](report, **options)
+
+
+def _plain_text(insight):
+    for key, value in insight.scalars.items():
+        yield f"{key}: {_plain(value)}"
+    for name, table in insight.tables.items():
+        yield f"\n{name}:\n"
+        yield table.to_string()
+
+
+@renderer("text")
+def render_text(report, formatters=None, width=80, footer=""):
+    """The terminal report; formatters maps insight keys to functions yielding its lines."""
+    formatters = formatters or {}
+    lines = [report.title, "=" * width]
+    for insight in report.insights:
+        lines += ["\n" + "=" * width, insight.title, "=" * width]
+        lines += list(formatters.get(insight.key, _plain_text)(insight))
+        lines.append("\n")
+    if footer:
+        lines.append(footer)
+    return "\n".join(lines)
+
+
+def _markdown_table(table):
+    table = table.reset_index()
+    rows = [[str(col) for col in table.columns], ["---"] * len(table.columns)]
+    for values in table.itertuples(index=False):
+        rows.append([f"{v:.2f}".rstrip("0").rstrip(".") if isinstance(v, float) else str(v) for v in values])
+    return "\n".join("| " + " | ".join(row) + " |" for row in rows)
+
+
+@renderer("markdown")
+def render_markdown(report):
+    lines = [f"# {report.title}", "", f"*{report.dataset}, generated {report.generated_at}*", ""]
+    for key, value in report.summary.items():
+        lines.append(f"- **{key}**: {_plain(value)}")
+    for insight in report.insights:
+        lines += ["", f"## {insight.title}", ""]
+        lines += [f"- **{key}**: {_plain(value)}" for key, value in insight.scalars.items()]
+        for name, table in insight.tables.items():
+            lines += ["", f"### {name}", "", _markdown_table(table)]
+    return "\n".join(lines) + "\n"
+
+
+@renderer("json")
+def render_json(report):
+    return json.dumps({
+        "report": report.name,
+        "title": report.title,
+        "dataset": report.dataset,
+        "generated_at": report.generated_at,
+        "summary": {key: _plain(value) for key, value in report.summary.items()},
+        "insights": [{
+            "key": insight.key,
+            "title": insight.title,
+            "scalars": {key: _plain(value) for key, value in insight.scalars.items()},
+            "tables": {name: _records(table) for name, table in insight.tables.items()},
+        } for insight in report.insights],
+    }, indent=2, ensure_ascii=False)
+
+
+@renderer("summary")
+def render_summary(report, heading=None):
+    """The data/*_summary.txt layout: a heading and one key: value line per summary figure."""
+    lines = [heading or report.title, "=" * 80, ""]
+    lines += [f"{key}: {_plain(value)}" for key, value in report.summary.items()]
+    lines.append(f"date_analyzed: {report.generated_at}")
+    return "\n".join(lines) + "\n"
+
+
+def write_output(text, output=None):
+    """Print rendered text, or write it to a file."""
+    if output:
+        with open(output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render cached analysis reports")
+    parser.add_argument("report", nargs="?", help="Report name, e.g. deep_analysis (omit to list)")
+    parser.add_argument("-f", "--format", default="markdown", choices=sorted(RENDERERS))
+    parser.add_argument("-o", "--output", help="Write to a file instead of stdout")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    if not args.report:
+        names = sorted(os.path.splitext(n)[0] for n in os.listdir(args.cache_dir) if n.endswith(".pkl")) \
+            if os.path.isdir(args.cache_dir) else []
+        for name in names:
+            report = load_report(name, args.cache_dir)
+            print(f"{name:<24} {len(report.insights):>3} insights  {report.generated_at}  ({report.dataset})")
+        if not names:
+            print(f"No cached reports in {args.cache_dir}/ (run examples/deep_analysis.py first)")
+        return
+
+    report = load_report(args.report, args.cache_dir)
+    if report is None:
+        parser.error(f"no cached report named {args.report}")
+    write_output(render(report, args.format), args.output)
+
+
+if __name__ == "__main__":
+    main()
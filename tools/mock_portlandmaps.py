@@ -0,0 +1,328 @@
+"""
+Local stand-in for the PortlandMaps assessor search page.
+
+Serves a page with the same controls the scrapers drive (neighborhood
+<select>, Search/Clear/CSV buttons, "Go to page N" / "Go to next page"
+pagination, the "1 - 1000 of 1753" results counter and #results-table),
+backed by synthetic, reproducible property data. Latency and failure
+rates are configurable, so scraper changes can be benchmarked offline.
+
+Usage:
+    python tools/mock_portlandmaps.py --port 8765 --latency 0.2 --failure-rate 0.05
+    python tools/portlandmaps_scrape.py --base-url http://localhost:8765
+"""
+
+import argparse
+import csv
+import io
+import json
+import random
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+COLUMNS = [
+    "ADDRESS", "CITY", "STATE", "ZIP_CODE", "ZIP_CODE_STRING", "COUNTY", "NEIGHBORHOOD",
+    "PROPERTY_ID", "STATE_ID", "PARENT_STATE_ID", "ALT_ACCOUNT_NUMBER", "OWNER",
+    "LEGAL_DESCRIPTION", "SQUARE_FEET", "MARKET_VALUE", "SALE_DATE", "SALE_PRICE",
+    "YEAR_BUILT", "X_STATE_PLANE", "Y_STATE_PLANE",
+]
+
+NEIGHBORHOOD_NAMES = [
+    "ALAMEDA", "ARBOR LODGE", "BEAUMONT-WILSHIRE", "BRENTWOOD-DARLINGTON", "BUCKMAN",
+    "CENTENNIAL", "CULLY", "HAZELWOOD", "HOSFORD-ABERNETHY", "KENTON", "LENTS",
+    "MONTAVILLA", "PEARL DISTRICT", "POWELLHURST-GILBERT", "RICHMOND",
+    "SELLWOOD-MORELAND", "SOUTH PORTLAND", "ST. JOHNS", "SUNNYSIDE", "WOODSTOCK",
+]
+
+STREETS = ["MAIN", "ALDER", "BELMONT", "DIVISION", "HAWTHORNE", "KILLINGSWORTH", "LOMBARD", "STARK"]
+SUFFIXES = ["ST", "AVE", "BLVD", "DR", "CT", "PL"]
+DIRECTIONS = ["N", "NE", "SE", "SW", "NW"]
+SURNAMES = ["SMITH", "NGUYEN", "JOHNSON", "GARCIA", "LEE", "MILLER", "DAVIS", "WONG", "BROWN", "PATEL"]
+COMPANIES = ["ROSE CITY HOLDINGS LLC", "PDX RENTALS INC", "CASCADE PROPERTIES LP", "WILLAMETTE TRUST"]
+
+
+class MockConfig:
+    neighborhoods = 12
+    max_results = 4500
+    page_size = 1000
+    latency = 0.0
+    jitter = 0.0
+    failure_rate = 0.0
+    full_export = False
+    seed = 1
+
+
+@lru_cache(maxsize=None)
+def neighborhood_rows(name):
+    """Generate a neighborhood's properties (same seed, same data)."""
+    rng = random.Random(f"{MockConfig.seed}-{name}")
+    count = rng.randint(max(1, MockConfig.max_results // 20), MockConfig.max_results)
+    base_x = rng.uniform(7_620_000, 7_690_000)
+    base_y = rng.uniform(660_000, 720_000)
+    base_value = rng.uniform(300_000, 900_000)
+    zip_code = rng.randint(97201, 97236)
+
+    rows = []
+    for i in range(count):
+        number = rng.randint(100, 9999)
+        address = f"{number} {rng.choice(DIRECTIONS)} {rng.choice(STREETS)} {rng.choice(SUFFIXES)}"
+        owner = rng.choice(COMPANIES) if rng.random() < 0.15 else f"{rng.choice(SURNAMES)},{rng.choice(SURNAMES)}"
+        year_built = rng.randint(1890, 2023) if rng.random() < 0.85 else ""
+        sqft = rng.randint(500, 4500) if rng.random() < 0.8 else ""
+        value = int(base_value * rng.lognormvariate(0, 0.35))
+        sold = rng.random() < 0.6
+        sale_date = f"{rng.randint(1995, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" if sold else ""
+        sale_price = int(value * rng.uniform(0.6, 1.1)) if sold else ""
+        state_id = f"1N1E{rng.randint(10, 36)}DD  {rng.randint(100, 99999):05d}"
+        rows.append([
+            address, "PORTLAND", "OR", zip_code, str(zip_code), "Multnomah", name,
+            f"R{(NEIGHBORHOOD_NAMES.index(name) + 1) * 100000 + i}", state_id, state_id,
+            f"R{rng.randint(100000000, 999999999)}", owner,
+            f"SYNTHETIC ADDITION, BLOCK {rng.randint(1, 40)}, LOT {rng.randint(1, 30)}",
+            sqft, value, sale_date, sale_price, year_built,
+            round(base_x + rng.gauss(0, 3000), 2), round(base_y + rng.gauss(0, 3000), 2),
+        ])
+    return rows
+
+
+def neighborhoods():
+    return NEIGHBORHOOD_NAMES[:MockConfig.neighborhoods]
+
+
+SEARCH_PAGE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>PortlandMaps Advanced Search - Assessor (mock)</title>
+<style>
+  body { font-family: sans-serif; margin: 20px; }
+  #paginator { list-style: none; padding: 0; display: inline-flex; gap: 6px; }
+  #paginator a { cursor: pointer; padding: 2px 6px; border: 1px solid #ccc; }
+  #paginator li.active a { background: #337ab7; color: #fff; }
+  #results-table-wrapper { max-height: 400px; overflow: auto; }
+</style>
+</head>
+<body>
+  <form onsubmit="return false;">
+    <select id="neighborhood">
+      <option value="">-- Neighborhood --</option>
+      __OPTIONS__
+    </select>
+    <button type="button" id="search">Search</button>
+    <button type="button" id="clear">Clear</button>
+  </form>
+  <div id="results-actions">
+    <ul id="paginator" class="pagination"></ul>
+    <button title="Total" id="results-total" type="button"></button>
+    <button type="button" class="download" value="csv">CSV</button>
+    <span id="status"></span>
+  </div>
+  <div id="results-table-wrapper">
+    <table id="results-table">
+      <thead><tr id="results-table-head"></tr></thead>
+      <tbody id="results-table-body"></tbody>
+    </table>
+  </div>
+<script>
+var state = { neighborhood: "", page: 1, pages: 0 };
+
+function el(tag, attrs, text) {
+  var node = document.createElement(tag);
+  for (var k in attrs) node.setAttribute(k, attrs[k]);
+  if (text !== undefined) node.textContent = text;
+  return node;
+}
+
+function pageLink(title, label, page) {
+  var li = el("li");
+  var a = el("a", { title: title }, label);
+  a.onclick = function () { load(page); };
+  li.appendChild(a);
+  return li;
+}
+
+function renderPaginator() {
+  var ul = document.getElementById("paginator");
+  ul.innerHTML = "";
+  if (state.pages <= 1) return;
+  if (state.page > 1) {
+    ul.appendChild(pageLink("Go to first page", "<<", 1));
+    ul.appendChild(pageLink("Go to previous page", "<", state.page - 1));
+  }
+  var start = Math.max(1, state.page - 2), end = Math.min(state.pages, start + 4);
+  for (var p = start; p <= end; p++) {
+    if (p === state.page) {
+      var li = el("li", { "class": "active" });
+      li.appendChild(el("a", { title: "Current page is " + p }, String(p)));
+      ul.appendChild(li);
+    } else {
+      ul.appendChild(pageLink("Go to page " + p, String(p), p));
+    }
+  }
+  if (state.page < state.pages) {
+    ul.appendChild(pageLink("Go to next page", ">", state.page + 1));
+    ul.appendChild(pageLink("Go to last page", ">>", state.pages));
+  }
+}
+
+function render(data) {
+  var head = document.getElementById("results-table-head");
+  var body = document.getElementById("results-table-body");
+  head.innerHTML = "";
+  body.innerHTML = "";
+  data.columns.forEach(function (c) { head.appendChild(el("th", {}, c.replace(/_/g, " "))); });
+  data.rows.forEach(function (row) {
+    var tr = el("tr", { "data-id": row[7] });
+    row.forEach(function (v, i) { tr.appendChild(el("td", { title: data.columns[i] }, v === "" ? "" : String(v))); });
+    body.appendChild(tr);
+  });
+  state.page = data.page;
+  state.pages = Math.ceil(data.total / data.page_size);
+  var first = data.total ? (data.page - 1) * data.page_size + 1 : 0;
+  var last = first ? first + data.rows.length - 1 : 0;
+  document.getElementById("results-total").textContent = first + " - " + last + " of " + data.total;
+  renderPaginator();
+}
+
+function load(page) {
+  document.getElementById("status").textContent = "Loading...";
+  fetch("/api/assessor?neighborhood=" + encodeURIComponent(state.neighborhood) + "&page=" + page)
+    .then(function (r) { if (!r.ok) throw new Error("HTTP " + r.status); return r.json(); })
+    .then(function (data) { render(data); document.getElementById("status").textContent = ""; })
+    .catch(function (e) { document.getElementById("status").textContent = "Error: " + e.message; });
+}
+
+document.getElementById("search").onclick = function () {
+  state.neighborhood = document.getElementById("neighborhood").value;
+  if (state.neighborhood) load(1);
+};
+
+document.getElementById("clear").onclick = function () {
+  document.getElementById("neighborhood").value = "";
+  document.getElementById("results-table-head").innerHTML = "";
+  document.getElementById("results-table-body").innerHTML = "";
+  document.getElementById("paginator").innerHTML = "";
+  document.getElementById("results-total").textContent = "";
+  state = { neighborhood: "", page: 1, pages: 0 };
+};
+
+document.querySelector("button.download[value=csv]").onclick = function () {
+  if (!state.neighborhood) return;
+  window.location = "/api/assessor.csv?neighborhood=" + encodeURIComponent(state.neighborhood) + "&page=" + state.page;
+};
+</script>
+</body>
+</html>
+"""
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status, body, content_type, headers=None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def simulate_server(self):
+        """Apply the configured latency, and fail the request now and then. Returns False on failure."""
+        delay = MockConfig.latency + random.uniform(0, MockConfig.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if random.random() < MockConfig.failure_rate:
+            self.send_body(503, "Service Unavailable", "text/plain")
+            return False
+        return True
+
+    def page_of_results(self, query):
+        name = query.get("neighborhood", [""])[0]
+        page = max(int(query.get("page", ["1"])[0]), 1)
+        rows = neighborhood_rows(name) if name in neighborhoods() else []
+        size = MockConfig.page_size
+        return name, page, rows, rows[(page - 1) * size:page * size]
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+
+        if url.path in ("/advanced/", "/advanced") and query.get("action") == ["assessor"]:
+            options = "\n      ".join(f'<option value="{n}">{n.title()}</option>' for n in neighborhoods())
+            self.send_body(200, SEARCH_PAGE.replace("__OPTIONS__", options), "text/html; charset=utf-8")
+
+        elif url.path == "/api/assessor":
+            if not self.simulate_server():
+                return
+            name, page, rows, page_rows = self.page_of_results(query)
+            payload = {
+                "neighborhood": name,
+                "page": page,
+                "page_size": MockConfig.page_size,
+                "total": len(rows),
+                "columns": COLUMNS,
+                "rows": page_rows,
+            }
+            self.send_body(200, json.dumps(payload), "application/json")
+
+        elif url.path == "/api/assessor.csv":
+            if not self.simulate_server():
+                return
+            _, _, rows, page_rows = self.page_of_results(query)
+            out = io.StringIO()
+            writer = csv.writer(out)
+            writer.writerow(COLUMNS)
+            writer.writerows(rows if MockConfig.full_export else page_rows)
+            self.send_body(200, out.getvalue(), "text/csv", {
+                "Content-Disposition": 'attachment; filename="Assessor-Search-Results.csv"',
+            })
+
+        else:
+            self.send_body(404, "Not Found", "text/plain")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the PortlandMaps assessor search")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--neighborhoods", type=int, default=MockConfig.neighborhoods,
+                        help=f"Number of neighborhoods to offer (max {len(NEIGHBORHOOD_NAMES)})")
+    parser.add_argument("--max-results", type=int, default=MockConfig.max_results,
+                        help="Largest neighborhood size; sizes are drawn between 5%% and 100%% of this")
+    parser.add_argument("--page-size", type=int, default=MockConfig.page_size)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every data request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, up to this many seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of data requests answered with 503")
+    parser.add_argument("--full-export", action="store_true",
+                        help="CSV button exports the whole result set instead of the current page")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    MockConfig.neighborhoods = min(args.neighborhoods, len(NEIGHBORHOOD_NAMES))
+    MockConfig.max_results = args.max_results
+    MockConfig.page_size = args.page_size
+    MockConfig.latency = args.latency
+    MockConfig.jitter = args.jitter
+    MockConfig.failure_rate = args.failure_rate
+    MockConfig.full_export = args.full_export
+    MockConfig.seed = args.seed
+
+    server = ThreadingHTTPServer((args.host, args.port), MockHandler)
+    print(f"🧪 Mock PortlandMaps running at http://{args.host}:{args.port}/advanced/?action=assessor")
+    print(f"   {MockConfig.neighborhoods} neighborhoods, latency {args.latency}s (+{args.jitter}s jitter), "
+          f"failure rate {args.failure_rate:.0%}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Run the data pipeline, rebuilding only what is out of date.
+
+Each stage names the files it reads and writes. A stage runs when one of
+its outputs is missing or the content of its inputs (including its own
+script) has changed since it last ran; otherwise it is skipped. Content
+hashes are kept in .pipeline_state.json, and a file is only re-hashed when
+its size or modification time changes, so re-merging identical downloads
+doesn't rebuild anything downstream of the merged CSV.
+
+Stages run in their own processes (through pdx.py), and stages that don't
+depend on each other run side by side: the subsets and the map tiles
+after the merge, then the viz data and both analyses after the subsets.
+
+    scrape (only when asked for) -> merge -> subsets -> viz, deep, advanced
+                                          -> tiles
+
+Watch mode polls downloads/ and runs the pipeline once new pages have
+stopped changing, so a scrape in another terminal is merged as it lands.
+Each merge adds the neighborhoods whose pages are all downloaded to the
+archive and rebuilds the dataset from every neighborhood's latest complete
+scrape, so the dataset never shrinks to the pages downloaded so far; pages
+of a neighborhood still being scraped wait in downloads/ for a later merge
+(see cleanup_and_merge.merge). The page plan and the archive index are
+merge inputs too, and a merge with no newly finished neighborhood leaves
+the dataset (and everything after it) as it is.
+
+Usage:
+    python tools/pipeline.py                  # everything that is out of date
+    python tools/pipeline.py viz --dry-run    # what rebuilding viz would run
+    python tools/pipeline.py --force deep     # rerun deep (and anything stale before it)
+    python tools/pipeline.py --watch --interval 60
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+STATE_FILE = ".pipeline_state.json"
+MAIN_DATASET = "Portland_Assessor_AllNeighborhoods.csv"
+CORE_SUBSET = "subsets/complete_core_fields.csv"
+DOWNLOADS = "downloads/*_page*.csv"
+PAGE_PLAN = "downloads/page_plan.json"
+ARCHIVE_INDEX = "raw_archive/index.csv"
+
+
+def _script(path):
+    return os.path.join(ROOT, path)
+
+
+@dataclass
+class Stage:
+    name: str
+    command: list  # pdx.py arguments
+    inputs: list  # paths or glob patterns
+    outputs: list
+    needs: tuple = ()
+    # Only run when asked for by name (the scrape takes hours)
+    on_request: bool = False
+    # Inputs the stage eventually removes (the merge clears downloads/ once a scrape is done):
+    # recorded as they are after it runs, less any that arrived meanwhile
+    consumes_inputs: bool = False
+    # Files the stage reads that may not exist yet and that it may rewrite itself
+    # (the merge's page plan and archive index); hashed as they are after it runs
+    state_files: tuple = ()
+
+
+STAGES = [
+    Stage("scrape", ["scrape"], [_script("tools/portlandmaps_scrape.py")], [], on_request=True),
+    Stage("merge", ["merge"], [DOWNLOADS], [MAIN_DATASET], needs=("scrape",), consumes_inputs=True,
+          state_files=(PAGE_PLAN, ARCHIVE_INDEX)),
+    Stage("subsets", ["subsets"], [MAIN_DATASET, _script("tools/create_quality_subsets.py")],
+          [CORE_SUBSET, "subsets/high_quality_80pct.csv", "subsets/medium_quality_60pct.csv",
+           "subsets/portland_focused.csv", "subsets/residential_high_quality.csv"], needs=("merge",)),
+    Stage("tiles", ["viz", "tiles"], [MAIN_DATASET, _script("scripts/generate_map_tiles.py")],
+          [_script("scripts/viz/tiles/index.json")], needs=("merge",)),
+    Stage("viz", ["viz", "data"], [CORE_SUBSET, _script("scripts/generate_viz_data.py")],
+          ["viz_data.json", _script("scripts/viz/manifest.json")], needs=("subsets",)),
+    Stage("deep", ["analyze", "deep", "-o", "deep_analysis.txt"],
+          [CORE_SUBSET, _script("examples/deep_analysis.py")],
+          ["deep_analysis.txt", "deep_analysis_summary.txt"], needs=("subsets",)),
+    Stage("advanced", ["analyze", "advanced", "-o", "advanced_analysis_results.txt"],
+          [CORE_SUBSET, _script("examples/advanced_analysis.py")],
+          ["advanced_analysis_results.txt"], needs=("subsets",)),
+]
+STAGES_BY_NAME = {stage.name: stage for stage in STAGES}
+
+
+def load_state(path=STATE_FILE):
+    if not os.path.exists(path):
+        return {"files": {}, "stages": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(state, path=STATE_FILE):
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def file_hash(path, state):
+    """sha256 of a file, re-read only when its size or modification time changed."""
+    stat = os.stat(path)
+    key = os.path.normpath(path)
+    cached = state["files"].get(key)
+    if cached and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+        return cached[2]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    state["files"][key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+    return digest.hexdigest()
+
+
+def expand(patterns):
+    files = []
+    for pattern in patterns:
+        files += sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+    return files
+
+
+def input_digest(stage, state, only=None):
+    """
+    One hash over the names and contents of a stage's inputs and state files
+    (None if an input is missing); with `only`, just the inputs in it.
+    """
+    digest = hashlib.sha256()
+    for path in expand(stage.inputs):
+        if only is not None and path not in only:
+            continue
+        if not os.path.exists(path):
+            return None
+        digest.update(f"{os.path.normpath(os.path.relpath(path))}\0{file_hash(path, state)}\n".encode())
+    for path in stage.state_files:
+        content = file_hash(path, state) if os.path.exists(path) else "absent"
+        digest.update(f"{os.path.normpath(os.path.relpath(path))}\0{content}\n".encode())
+    return digest.hexdigest()
+
+
+def why_stale(stage, state, force=False):
+    """Reason the stage has to run, or None when its outputs are current."""
+    if force or stage.on_request:
+        return "requested"
+    missing = [path for path in stage.outputs if not os.path.exists(path)]
+    if missing:
+        return f"{os.path.relpath(missing[0])} missing"
+    digest = input_digest(stage, state)
+    if digest is None:
+        return None  # an upstream stage failed or hasn't produced it; reported there
+    if state["stages"].get(stage.name) != digest:
+        return "inputs changed"
+    return None
+
+
+def plan(targets=None):
+    """The stages to consider, in dependency order: the targets and everything upstream of them."""
+    if not targets:
+        return [stage for stage in STAGES if not stage.on_request]
+    wanted = set()
+
+    def add(name):
+        if name not in wanted:
+            wanted.add(name)
+            for need in STAGES_BY_NAME[name].needs:
+                # A hours-long scrape is never pulled in as a dependency
+                if not STAGES_BY_NAME[need].on_request or need in targets:
+                    add(need)
+
+    for name in targets:
+        add(name)
+    return [stage for stage in STAGES if stage.name in wanted]
+
+
+def run_stage(stage):
+    """Run one stage in its own process; returns (exit code, captured output, seconds)."""
+    started = time.time()
+    result = subprocess.run([sys.executable, _script("pdx.py")] + stage.command,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    return result.returncode, result.stdout, time.time() - started
+
+
+def run(targets=None, force=(), jobs=4, dry_run=False, verbose=False, state_file=STATE_FILE):
+    """
+    Bring the targets (default: every stage but the scrape) up to date.
+    Returns the names of the stages that ran, or None if one failed.
+    """
+    stages = plan(targets)
+    state = load_state(state_file)
+    pending = {stage.name: stage for stage in stages}
+    ran, failed = [], []
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            # Decide on every stage whose upstream stages have finished; inputs are final by then
+            active = {stage.name for stage, _, _ in running.values()}
+            for name, stage in list(pending.items()):
+                if any(need in pending or need in active for need in stage.needs):
+                    continue
+                del pending[name]
+                if any(need in failed for need in stage.needs):
+                    failed.append(name)
+                    print(f"⏭️  {name}: skipped (upstream failed)")
+                    continue
+                reason = why_stale(stage, state, force=name in force)
+                if reason is None:
+                    if verbose:
+                        print(f"✓  {name}: up to date")
+                    continue
+                print(f"▶️  {name}: {reason} → pdx {' '.join(stage.command)}")
+                if dry_run:
+                    continue
+                future = pool.submit(run_stage, stage)
+                running[future] = (stage, input_digest(stage, state), set(expand(stage.inputs)))
+                active.add(name)
+
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, digest, inputs = running.pop(future)
+                code, output, elapsed = future.result()
+                if code == 0:
+                    ran.append(stage.name)
+                    if stage.consumes_inputs or stage.state_files:
+                        # What the stage left behind (downloads it kept, the archive index it
+                        # wrote), without files that landed while it ran: those still need it
+                        digest = input_digest(stage, state, only=inputs)
+                    if digest is not None and not stage.on_request:
+                        state["stages"][stage.name] = digest
+                    save_state(state, state_file)
+                    print(f"✅ {stage.name}: done in {elapsed:.1f}s")
+                    if verbose:
+                        print(output.rstrip())
+                else:
+                    failed.append(stage.name)
+                    print(f"❌ {stage.name}: exit code {code} after {elapsed:.1f}s\n{output.rstrip()}")
+
+    save_state(state, state_file)
+    return None if failed else ran
+
+
+def downloads_signature():
+    return sorted((path, os.path.getsize(path), os.path.getmtime(path)) for path in glob.glob(DOWNLOADS))
+
+
+def watch(interval=30, jobs=4, verbose=False, state_file=STATE_FILE):
+    """Poll downloads/ and rebuild whatever the new pages affect once they stop changing."""
+    print(f"👀 Watching downloads/ every {interval}s (Ctrl+C to stop)")
+    run(jobs=jobs, verbose=verbose, state_file=state_file)
+    previous = handled = downloads_signature()
+    try:
+        while True:
+            time.sleep(interval)
+            current = downloads_signature()
+            # Wait for a quiet interval so pages still being written aren't merged half-way,
+            # and don't retry a set of pages the merge has already failed on
+            if current and current == previous and current != handled:
+                print(f"\n📥 {len(current)} new page files in downloads/")
+                run(jobs=jobs, verbose=verbose, state_file=state_file)
+                handled = current = downloads_signature()
+            previous = current
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the out-of-date pipeline stages")
+    parser.add_argument("targets", nargs="*", metavar="STAGE",
+                        help=f"Stages to bring up to date, with what they depend on ({', '.join(STAGES_BY_NAME)})")
+    parser.add_argument("--force", action="store_true", help="Rerun the named stages even if they are current")
+    parser.add_argument("-j", "--jobs", type=int, default=4, help="Stages to run at once")
+    parser.add_argument("-n", "--dry-run", action="store_true", help="Show what would run")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show up-to-date stages and stage output")
+    parser.add_argument("--watch", action="store_true", help="Keep running as new downloads land")
+    parser.add_argument("--interval", type=int, default=30, help="Seconds between checks in watch mode")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.targets if name not in STAGES_BY_NAME]
+    if unknown:
+        parser.error(f"unknown stage {unknown[0]!r} (choose from {', '.join(STAGES_BY_NAME)})")
+
+    if args.watch:
+        watch(args.interval, args.jobs, args.verbose)
+        return
+    started = time.time()
+    force = set(args.targets) or {stage.name for stage in plan()} if args.force else ()
+    ran = run(args.targets, force=force, jobs=args.jobs,
+              dry_run=args.dry_run, verbose=args.verbose)
+    if ran is None:
+        sys.exit(1)
+    if not args.dry_run:
+        print(f"\n🎉 {len(ran)} stage(s) run, everything else up to date ({time.time() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,536 @@
+import csv
+import glob
+import json
+import math
+import os
+import queue
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+from html.parser import HTMLParser
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import Select
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+try:
+    from lxml import html as lxml_html
+except ImportError:  # lxml is optional; fall back to the stdlib parser
+    lxml_html = None
+
+DEFAULT_BASE_URL = "https://www.portlandmaps.com"
+ASSESSOR_PATH = "/advanced/?action=assessor"
+PAGE_PLAN_FILE = "page_plan.json"
+DRIVER_CACHE_FILE = os.path.expanduser("~/.cache/pdx-data/chromedriver_path")
+
+# Requests the scraper never needs: images, fonts, stylesheets, map tiles and trackers
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.ico", "*.webp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.css", "*.css?*",
+    "*/tile/*", "*/MapServer/export*", "*/ImageServer/*",
+    "*arcgisonline.com*", "*typekit.net*", "*bootstrapcdn.com*/css/*",
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*",
+]
+
+_plan_lock = threading.Lock()
+
+SEARCH_BUTTON = "//button[contains(text(),'Search')]"
+CSV_BUTTON = "//button[contains(text(),'CSV')]"
+CLEAR_BUTTON = "//button[contains(text(),'Clear')]"
+PAGE_LINKS = "//ul[@id='paginator']//a[starts-with(@title,'Go to page ')]"
+
+
+def assessor_url(base_url=DEFAULT_BASE_URL):
+    """Assessor search URL on the live site or a stand-in (see mock_portlandmaps.py)."""
+    return base_url.rstrip("/") + ASSESSOR_PATH
+
+
+def get_chromedriver_path():
+    """
+    Resolve the chromedriver binary once and reuse it on later starts.
+    ChromeDriverManager().install() checks online for the latest version
+    every time it is called, which adds seconds to each browser start.
+    """
+    if os.path.exists(DRIVER_CACHE_FILE):
+        with open(DRIVER_CACHE_FILE) as f:
+            path = f.read().strip()
+        if os.path.exists(path):
+            return path
+
+    path = ChromeDriverManager().install()
+    os.makedirs(os.path.dirname(DRIVER_CACHE_FILE), exist_ok=True)
+    with open(DRIVER_CACHE_FILE, "w") as f:
+        f.write(path)
+    return path
+
+
+def make_driver(download_dir, profile="lean"):
+    """
+    Start Chrome for scraping.
+
+    profile="lean" runs headless and blocks images, fonts, stylesheets, map
+    tiles and trackers; profile="headed" is the plain visible browser, which
+    is handy for watching a run or debugging selectors.
+    """
+    download_dir = os.path.abspath(download_dir)
+    options = webdriver.ChromeOptions()
+    prefs = {"download.default_directory": download_dir}
+
+    if profile == "lean":
+        options.add_argument("--headless=new")
+        options.add_argument("--window-size=1400,1000")
+        options.add_argument("--disable-gpu")
+        options.add_argument("--disable-extensions")
+        options.add_argument("--no-first-run")
+        options.add_argument("--mute-audio")
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        prefs["profile.managed_default_content_settings.images"] = 2
+
+    options.add_experimental_option("prefs", prefs)
+    driver = webdriver.Chrome(service=Service(get_chromedriver_path()), options=options)
+
+    if profile == "lean":
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+        driver.execute_cdp_cmd("Browser.setDownloadBehavior", {"behavior": "allow", "downloadPath": download_dir})
+    return driver
+
+
+def open_search_page(driver, url):
+    """Load the assessor search page and return its neighborhood <select>."""
+    driver.get(url)
+    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "select")))
+    return Select(driver.find_element(By.TAG_NAME, "select"))
+
+
+class DriverPool:
+    """
+    A fixed set of browser sessions, started in parallel and already sitting
+    on the search page, so workers never wait for a cold browser.
+
+    Each session downloads into its own folder under download_dir so
+    concurrent CSV downloads cannot be mixed up.
+    """
+
+    def __init__(self, size, download_dir, url, profile="lean"):
+        self.url = url
+        self._idle = queue.Queue()
+        self.sessions = []
+
+        def start(index):
+            session_dir = os.path.join(download_dir, f".session{index}")
+            os.makedirs(session_dir, exist_ok=True)
+            driver = make_driver(session_dir, profile)
+            select = open_search_page(driver, url)
+            return driver, select, session_dir
+
+        with ThreadPoolExecutor(max_workers=size) as executor:
+            self.sessions = list(executor.map(start, range(size)))
+        for session in self.sessions:
+            self._idle.put(session)
+        print(f"Started {size} browser session(s) ({profile} profile)")
+
+    def acquire(self):
+        """Return (driver, select, session_dir) for an idle session."""
+        return self._idle.get()
+
+    def release(self, session):
+        self._idle.put(session)
+
+    def close(self):
+        for driver, _, _ in self.sessions:
+            driver.quit()
+
+
+def rename_latest_csv(download_dir, neighborhood, page_num, target_dir=None):
+    """Rename the most recently downloaded CSV file (moving it into target_dir if given)"""
+    # Find the most recent CSV in downloads folder
+    csv_files = [f for f in glob.glob(os.path.join(download_dir, "*.csv")) if "_page" not in os.path.basename(f)]
+    if not csv_files:
+        return None
+
+    latest_file = max(csv_files, key=os.path.getctime)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+    # Create new filename
+    new_filename = f"{neighborhood}_page{page_num}_{timestamp}.csv"
+    new_path = os.path.join(target_dir or download_dir, new_filename)
+
+    # Rename the file
+    os.rename(latest_file, new_path)
+    print(f"    Renamed to: {new_filename}")
+    return new_path
+
+
+def get_result_window(driver):
+    """
+    Read the results counter, e.g. "1 - 1000 of 1753".
+    Returns (first_row, last_row, total_rows), or None if there are no results.
+    """
+    text = driver.find_element(By.ID, "results-total").text
+    match = re.search(r"([\d,]+)\s*-\s*([\d,]+)\s+of\s+([\d,]+)", text)
+    if not match:
+        return None
+    first, last, total = (int(g.replace(",", "")) for g in match.groups())
+    return first, last, total
+
+
+def plan_pages(total_rows, page_size):
+    """
+    Work out every page of a result set up front.
+    Returns {page_num: expected_rows}.
+    """
+    if total_rows <= 0 or page_size <= 0:
+        return {}
+    page_count = math.ceil(total_rows / page_size)
+    return {
+        page: min(page_size, total_rows - (page - 1) * page_size)
+        for page in range(1, page_count + 1)
+    }
+
+
+def page_belongs_to_worker(neighborhood, page_num, worker):
+    """
+    Split pages across workers. `worker` is (index, count), e.g. (0, 3).
+    The neighborhood name is hashed so single-page neighborhoods spread out too.
+    """
+    index, count = worker
+    return (zlib.crc32(neighborhood.encode()) + page_num) % count == index
+
+
+def go_to_page(driver, page_num, page_size, timeout=10):
+    """
+    Jump straight to a page of the current result set.
+
+    The paginator only shows a window of page numbers, so when the target
+    is not visible we click the visible page closest to it (or first/last)
+    and repeat. Each click waits for the results counter to change instead
+    of sleeping.
+    """
+    while True:
+        window = get_result_window(driver)
+        if window is None:
+            raise RuntimeError("No results loaded")
+        first, _, total = window
+        current = (first - 1) // page_size + 1
+        if current == page_num:
+            return
+
+        visible = {}
+        for link in driver.find_elements(By.XPATH, PAGE_LINKS):
+            number = link.get_attribute("title").rsplit(" ", 1)[-1]
+            if number.isdigit():
+                visible[int(number)] = link
+
+        if page_num in visible:
+            target = visible[page_num]
+        elif page_num > current:
+            closer = [p for p in visible if current < p < page_num]
+            if closer:
+                target = visible[max(closer)]
+            elif page_num == math.ceil(total / page_size):
+                target = driver.find_element(By.XPATH, "//a[@title='Go to last page']")
+            else:
+                target = driver.find_element(By.XPATH, "//a[@title='Go to next page']")
+        else:
+            closer = [p for p in visible if page_num < p < current]
+            if closer:
+                target = visible[min(closer)]
+            elif page_num == 1:
+                target = driver.find_element(By.XPATH, "//a[@title='Go to first page']")
+            else:
+                target = driver.find_element(By.XPATH, "//a[@title='Go to previous page']")
+
+        counter = driver.find_element(By.ID, "results-total").text
+        target.click()
+        WebDriverWait(driver, timeout).until(
+            lambda d: d.find_element(By.ID, "results-total").text != counter
+        )
+
+
+def count_csv_rows(filepath):
+    """Count data rows in a CSV (quoted newlines in LEGAL_DESCRIPTION are handled)."""
+    with open(filepath, newline="", encoding="utf-8", errors="replace") as f:
+        return max(sum(1 for _ in csv.reader(f)) - 1, 0)
+
+
+def check_page_rows(rows, expected_rows, total_rows):
+    """
+    Compare a downloaded page against the plan.
+    Returns "page" if it matches the page size, "full" if the export held the
+    whole result set, or "mismatch".
+    """
+    if rows == expected_rows:
+        return "page"
+    if rows == total_rows:
+        return "full"
+    return "mismatch"
+
+
+def load_page_plan(download_dir):
+    """Load {neighborhood: {"total": n, "page_size": n, "pages": n}} from earlier runs."""
+    path = os.path.join(download_dir, PAGE_PLAN_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_page_plan(download_dir, plan):
+    path = os.path.join(download_dir, PAGE_PLAN_FILE)
+    tmp_path = path + ".tmp"
+    # Sessions share one plan, so write a copy under a lock
+    with _plan_lock:
+        with open(tmp_path, "w") as f:
+            json.dump(dict(plan), f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
+
+
+def get_downloaded_pages(download_dir):
+    """
+    Map each neighborhood to the page numbers already on disk.
+    Files are named NEIGHBORHOOD_pageX_timestamp.csv.
+    """
+    downloaded = {}
+    if not os.path.exists(download_dir):
+        return downloaded
+
+    for f in os.listdir(download_dir):
+        match = re.match(r"(.+)_page(\d+)_", f)
+        if f.endswith(".csv") and match:
+            downloaded.setdefault(match.group(1).upper(), set()).add(int(match.group(2)))
+    return downloaded
+
+
+def missing_pages(neighborhood, plan, downloaded, worker=None):
+    """
+    Pages of a neighborhood still to fetch, or None if the neighborhood has
+    never been searched (its page count is unknown).
+    """
+    entry = plan.get(neighborhood)
+    if entry is None:
+        return None
+    if entry.get("full_export") and 1 in downloaded.get(neighborhood, set()):
+        return []
+    have = downloaded.get(neighborhood, set())
+    pages = [p for p in range(1, entry["pages"] + 1) if p not in have]
+    if worker:
+        pages = [p for p in pages if page_belongs_to_worker(neighborhood, p, worker)]
+    return pages
+
+
+def download_current_page(driver, download_dir, neighborhood, page_num, session_dir=None):
+    """Click CSV for the page on screen and give the file its final name."""
+    csv_button = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, CSV_BUTTON)))
+    source_dir = session_dir or download_dir
+    before = set(os.listdir(source_dir))
+    csv_button.click()
+    wait_for_download(source_dir, before)
+    return rename_latest_csv(source_dir, neighborhood, page_num, target_dir=download_dir)
+
+
+def wait_for_download(download_dir, before, timeout=30):
+    """Wait until a new, finished CSV appears in download_dir (instead of a fixed sleep)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        names = set(os.listdir(download_dir)) - before
+        if any(n.endswith(".csv") for n in names) and not any(n.endswith(".crdownload") for n in names):
+            return True
+        time.sleep(0.1)
+    return False
+
+
+class ResultsTableParser(HTMLParser):
+    """Collect the header and body rows of the #results-table element."""
+
+    def __init__(self):
+        super().__init__()
+        self.header = []
+        self.rows = []
+        self._depth = 0
+        self._row = None
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "table":
+            if self._depth or dict(attrs).get("id") == "results-table":
+                self._depth += 1
+            return
+        if not self._depth:
+            return
+        if tag == "tr":
+            self._row = []
+        elif tag in ("th", "td") and self._row is not None:
+            self._cell = []
+
+    def handle_endtag(self, tag):
+        if not self._depth:
+            return
+        if tag == "table":
+            self._depth -= 1
+        elif tag in ("th", "td") and self._cell is not None:
+            self._row.append("".join(self._cell).strip())
+            self._cell = None
+        elif tag == "tr" and self._row is not None:
+            if not self.header:
+                self.header = self._row
+            elif self._row:
+                self.rows.append(self._row)
+            self._row = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+# Columns of the CSV export that the results table doesn't show, so --extract dom pages lack them
+DOM_MISSING_COLUMNS = ["X_STATE_PLANE", "Y_STATE_PLANE"]
+DOM_WARNING = (f"⚠️  --extract dom: the results table has no {'/'.join(DOM_MISSING_COLUMNS)}. The merge fills "
+               "them in from the previous dataset by PROPERTY_ID; new properties stay without coordinates "
+               "(no lat/lon, map tiles or spatial joins) until they are scraped with --extract csv.")
+
+
+def parse_results_table(html):
+    """
+    Parse the rendered results table into (columns, rows).
+    Column names are converted to the CSV export's style ("PROPERTY ID" -> "PROPERTY_ID").
+    Accepts the whole page source or just the table's outerHTML. The table has
+    no state-plane coordinates (DOM_MISSING_COLUMNS).
+    """
+    # Only feed the results table to the parser, not the whole ~1MB page
+    start = html.find('id="results-table"')
+    if start != -1:
+        start = html.rfind("<table", 0, start)
+        end = html.find("</table>", start)
+        html = html[start:end + len("</table>")]
+
+    if lxml_html is not None:
+        table = lxml_html.fromstring(html)
+        header = [th.text_content().strip() for th in table.xpath(".//thead//th")]
+        rows = [
+            [td.text_content().strip() for td in tr.xpath("./td")]
+            for tr in table.xpath(".//tbody/tr")
+        ]
+    else:
+        parser = ResultsTableParser()
+        parser.feed(html)
+        parser.close()
+        header, rows = parser.header, parser.rows
+    columns = [name.replace(" ", "_") for name in header]
+    return columns, rows
+
+
+def write_page_rows(download_dir, neighborhood, page_num, columns, rows):
+    """Write parsed rows straight to NEIGHBORHOOD_pageX_timestamp.csv for the merge step."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    new_filename = f"{neighborhood}_page{page_num}_{timestamp}.csv"
+    new_path = os.path.join(download_dir, new_filename)
+
+    # Write under a temporary name so a half-written page is never merged
+    tmp_path = new_path + ".tmp"
+    with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(rows)
+    os.replace(tmp_path, new_path)
+    print(f"    Saved {len(rows):,} rows to: {new_filename}")
+    return new_path
+
+
+def extract_current_page(driver, download_dir, neighborhood, page_num):
+    """Parse the page on screen from the DOM instead of downloading its CSV."""
+    table_html = driver.find_element(By.ID, "results-table").get_attribute("outerHTML")
+    columns, rows = parse_results_table(table_html)
+    return write_page_rows(download_dir, neighborhood, page_num, columns, rows), len(rows)
+
+
+def search_neighborhood(driver, select, hood, download_dir, plan, limiter=None):
+    """
+    Run the search for one neighborhood and record its page plan.
+    Returns (page_size, {page_num: expected_rows}, total_rows).
+    """
+    with limiter.slot() if limiter else nullcontext():
+        select.select_by_value(hood)
+        WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, SEARCH_BUTTON)))
+        driver.find_element(By.XPATH, SEARCH_BUTTON).click()
+        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.XPATH, CSV_BUTTON)))
+        WebDriverWait(driver, 10).until(lambda d: get_result_window(d) is not None)
+
+    first, last, total = get_result_window(driver)
+    page_size = last - first + 1
+    pages = plan_pages(total, page_size)
+    if hood not in plan or plan[hood]["total"] != total:
+        plan[hood] = {"total": total, "page_size": page_size, "pages": len(pages)}
+        save_page_plan(download_dir, plan)
+    print(f"  {total:,} results in {len(pages)} page(s) of {page_size:,}")
+    return page_size, pages, total
+
+
+def fetch_pages(driver, hood, todo, page_size, pages, total, download_dir, plan, downloaded,
+                extract="csv", session_dir=None, limiter=None):
+    """
+    Fetch the listed pages of the neighborhood currently on screen.
+
+    extract="csv" clicks the CSV button for every page; extract="dom" reads
+    the rendered results table instead, skipping the browser download.
+    session_dir is where this browser saves its downloads (pooled sessions
+    each have their own); finished pages always end up in download_dir.
+    Returns the number of pages downloaded.
+    """
+    fetched = 0
+    for page_num in todo:
+        print(f"  Downloading page {page_num}/{len(pages)} for {hood}")
+        with limiter.slot() if limiter else nullcontext():
+            go_to_page(driver, page_num, page_size)
+            if extract == "dom":
+                path, rows = extract_current_page(driver, download_dir, hood, page_num)
+            else:
+                path = download_current_page(driver, download_dir, hood, page_num, session_dir)
+                if path is None:
+                    raise RuntimeError(f"No file downloaded for page {page_num}")
+                rows = count_csv_rows(path)
+        fetched += 1
+        downloaded.setdefault(hood, set()).add(page_num)
+
+        status = check_page_rows(rows, pages[page_num], total)
+        if status == "full":
+            # The export holds the whole result set, so the other pages are redundant
+            print(f"    Export contains all {total:,} rows; skipping remaining pages")
+            plan[hood]["full_export"] = True
+            save_page_plan(download_dir, plan)
+            break
+        if status == "mismatch":
+            print(f"    ⚠️  Page {page_num} has {rows:,} rows, expected {pages[page_num]:,}")
+
+    return fetched
+
+
+def scrape_neighborhood(driver, select, hood, download_dir, plan, downloaded, worker=None, extract="csv",
+                        session_dir=None):
+    """
+    Search one neighborhood, plan its pages from the result count and fetch
+    the ones that are missing (and assigned to this worker).
+    Returns the number of pages downloaded.
+    """
+    page_size, pages, total = search_neighborhood(driver, select, hood, download_dir, plan)
+    todo = missing_pages(hood, plan, downloaded, worker)
+    return fetch_pages(driver, hood, todo, page_size, pages, total, download_dir, plan, downloaded,
+                       extract, session_dir)
+
+
+def clear_search(driver, timeout=5):
+    """Press Clear and wait for the results counter to empty."""
+    WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, CLEAR_BUTTON))).click()
+    try:
+        WebDriverWait(driver, timeout).until(lambda d: get_result_window(d) is None)
+    except TimeoutException:
+        pass  # Some result views keep the counter; the next search replaces it anyway
@@ -1,146 +1,151 @@
-import time
+import argparse
 import os
+import threading
 import pandas as pd
-import glob
-from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import Select
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-
-url = "https://www.portlandmaps.com/advanced/?action=assessor"
-
-def rename_latest_csv(download_dir, neighborhood, page_num):
-    """Rename the most recently downloaded CSV file"""
-    # Find the most recent CSV in downloads folder
-    csv_files = glob.glob(os.path.join(download_dir, "*.csv"))
-    if not csv_files:
-        return None
-    
-    latest_file = max(csv_files, key=os.path.getctime)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    
-    # Create new filename
-    new_filename = f"{neighborhood}_page{page_num}_{timestamp}.csv"
-    new_path = os.path.join(download_dir, new_filename)
-    
-    # Rename the file
-    os.rename(latest_file, new_path)
-    print(f"    Renamed to: {new_filename}")
-    return new_path
-
-# Setup browser
-options = webdriver.ChromeOptions()
-prefs = {"download.default_directory": os.getcwd() + "/downloads"}
-options.add_experimental_option("prefs", prefs)
-
-driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-driver.get(url)
-WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.TAG_NAME, "select")))
-
-# Grab neighborhood names
-select = Select(driver.find_element(By.TAG_NAME, "select"))
-neighborhoods = [o.get_attribute("value") for o in select.options if o.get_attribute("value") != ""]
-
-print(f"Found {len(neighborhoods)} neighborhoods")
-
-os.makedirs("downloads", exist_ok=True)
-
-# Check which neighborhoods already have downloads
-existing_files = set()
-if os.path.exists("downloads"):
-    for f in os.listdir("downloads"):
-        if f.endswith(".csv"):
-            # Extract neighborhood name from filename (format: NEIGHBORHOOD_pageX_timestamp.csv)
-            neighborhood_name = f.split("_page")[0] if "_page" in f else f.split("_")[0]
-            existing_files.add(neighborhood_name.upper())
-
-print(f"Found {len(existing_files)} neighborhoods already downloaded")
-
-for hood in neighborhoods:
-    if hood in existing_files:
-        print(f"Skipping {hood} (already downloaded)")
-        continue
-        
-    print(f"Processing: {hood}")
-
-    # Select neighborhood
-    select.select_by_value(hood)
-    WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, "//button[contains(text(),'Search')]" )))
-    driver.find_element(By.XPATH, "//button[contains(text(),'Search')]").click()
-    WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.XPATH, "//button[contains(text(),'CSV')]" )))
-
-    # Check if results exist and handle pagination
-    try:
-        page_num = 1
-        
-        # First, check if pagination exists by looking for page links
-        has_pagination = False
-        try:
-            # Look for numbered page links (they're <a> tags, not buttons!)
-            page_links = driver.find_elements(By.XPATH, "//a[text()='2' or text()='3' or text()='4' or text()='5']")
-            if len(page_links) > 0:
-                has_pagination = True
-                print(f"  Found multiple pages for {hood}")
-        except:
-            pass
-        
-        if not has_pagination:
-            # Single page - just download once
-            print(f"  Single page result for {hood}")
-            csv_button = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, "//button[contains(text(),'CSV')]" )))
-            csv_button.click()
-            time.sleep(3) # Wait for download to initiate
-            rename_latest_csv("downloads", hood, 1)
-        else:
-            # Multiple pages - download each page
-            while True:
-                print(f"  Downloading page {page_num} for {hood}")
-                
-                # Click CSV download for current page
-                csv_button = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, "//button[contains(text(),'CSV')]" )))
-                csv_button.click()
-                time.sleep(3)  # Wait for download to initiate
-                rename_latest_csv("downloads", hood, page_num)
-                
-                # Try to find and click the next page link
+from portlandmaps_common import (
+    DEFAULT_BASE_URL,
+    DOM_WARNING,
+    DriverPool,
+    assessor_url,
+    clear_search,
+    fetch_pages,
+    get_downloaded_pages,
+    load_page_plan,
+    missing_pages,
+    open_search_page,
+    search_neighborhood,
+)
+from raw_archive import RawArchive
+from scrape_scheduler import (
+    AdaptiveLimiter,
+    WorkItem,
+    WorkQueue,
+    backoff_delay,
+    build_work_items,
+    last_scraped_times,
+    load_previous_counts,
+    split_pages,
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download assessor CSVs for every neighborhood")
+    parser.add_argument("--worker", default=None,
+                        help="Only fetch this worker's share of pages, e.g. 0/3 (run one process per worker)")
+    parser.add_argument("--extract", choices=["csv", "dom"], default="csv",
+                        help="csv: click the CSV download for each page; dom: parse the results table from the page")
+    parser.add_argument("--sessions", type=int, default=1,
+                        help="Number of browser sessions to run side by side")
+    parser.add_argument("--profile", choices=["lean", "headed"], default="lean",
+                        help="lean: headless with images/CSS/map tiles blocked; headed: visible browser")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL,
+                        help="Site to scrape, e.g. http://localhost:8765 for tools/mock_portlandmaps.py")
+    parser.add_argument("--order", choices=["largest", "stalest"], default="largest",
+                        help="Fetch the biggest neighborhoods first, or the ones scraped longest ago")
+    parser.add_argument("--chunk-pages", type=int, default=5,
+                        help="Split neighborhoods into work items of this many pages")
+    parser.add_argument("--retries", type=int, default=4,
+                        help="Attempts per work item before giving up")
+    args = parser.parse_args(argv)
+    url = assessor_url(args.base_url)
+    worker = tuple(int(n) for n in args.worker.split("/")) if args.worker else None
+    if args.extract == "dom":
+        print(DOM_WARNING)
+
+    # Setup browsers
+    os.makedirs("downloads", exist_ok=True)
+    pool = DriverPool(args.sessions, "downloads", url, args.profile)
+
+    # Grab neighborhood names
+    _, select, _ = pool.sessions[0]
+    neighborhoods = [o.get_attribute("value") for o in select.options if o.get_attribute("value") != ""]
+
+    print(f"Found {len(neighborhoods)} neighborhoods")
+
+    # Pages already on disk, and page counts from earlier searches
+    downloaded = get_downloaded_pages("downloads")
+    plan = load_page_plan("downloads")
+
+    todo_pages = {hood: missing_pages(hood, plan, downloaded, worker) for hood in neighborhoods}
+    for hood, pages in todo_pages.items():
+        if pages == []:
+            print(f"Skipping {hood} (already downloaded)")
+
+    # Biggest (or stalest) work first; big neighborhoods are split into page ranges
+    last_scraped = last_scraped_times("downloads", "raw_downloads")
+    for hood, scraped_at in RawArchive().latest_scrapes().items():
+        last_scraped[hood] = max(last_scraped.get(hood, ""), scraped_at)
+    items = build_work_items(neighborhoods, plan, todo_pages, load_previous_counts(), last_scraped, args.chunk_pages)
+    work = WorkQueue(items, order=args.order)
+    limiter = AdaptiveLimiter(initial=max(1, args.sessions // 2), maximum=args.sessions)
+    print(f"Queued {len(items)} work items across {args.sessions} session(s)")
+
+    def run_session():
+        session = pool.acquire()
+        driver, select, session_dir = session
+        while True:
+            item = work.get()
+            if item is None:
+                break
+            hood = item.neighborhood
+
+            print(f"Processing: {hood}" + (f" pages {item.pages[0]}-{item.pages[-1]}" if item.pages else ""))
+
+            try:
+                page_size, pages, total = search_neighborhood(driver, select, hood, "downloads", plan, limiter)
+                todo = missing_pages(hood, plan, downloaded, worker)
+                if item.pages is not None:
+                    todo = [p for p in todo if p in item.pages]
+                elif len(todo) > args.chunk_pages:
+                    # First search of a big neighborhood: hand the rest to other sessions
+                    chunks = split_pages(todo, args.chunk_pages)
+                    todo = item.pages = chunks[0]
+                    for chunk in chunks[1:]:
+                        work.put(WorkItem(hood, chunk, len(chunk) * page_size, item.last_scraped))
+                fetch_pages(driver, hood, todo, page_size, pages, total, "downloads", plan, downloaded,
+                            args.extract, session_dir, limiter)
+                work.done(item)
+            except Exception as e:
+                if item.attempts + 1 < args.retries:
+                    delay = backoff_delay(item.attempts)
+                    print(f"  ⚠️  {hood} failed ({e.__class__.__name__}); retrying in {delay:.1f}s")
+                    work.retry(item, delay)
+                else:
+                    print(f"No results or error for {hood}: {e}")
+                    work.done(item)
+                # Start the next item from a freshly loaded search page
                 try:
-                    # Look for <a> tag with title="Go to next page"
-                    next_link = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, "//a[@title='Go to next page']")))
-                    
-                    print(f"  Moving to page {page_num + 1}")
-                    next_link.click()
-                    WebDriverWait(driver, 10).until(EC.staleness_of(next_link)) # Wait for the page to change
-                    time.sleep(2) # Give a little extra time for content to load
-                    page_num += 1
-                        
-                except:
-                    # No next link found - we're on the last page
-                    print(f"  Last page reached for {hood}")
-                    break
-                
-    except Exception as e:
-        print(f"No results or error for {hood}: {e}")
-
-    # Reset
-    WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.XPATH, "//button[contains(text(),'Clear')]" ))).click()
-    time.sleep(2)
-
-driver.quit()
-
-# Combine CSVs
-files = [f"downloads/{f}" for f in os.listdir("downloads") if f.endswith(".csv")]
-frames = []
-
-for f in files:
-    df = pd.read_csv(f)
-    df["neighborhood"] = os.path.basename(f).replace(".csv","")
-    frames.append(df)
-
-combined = pd.concat(frames, ignore_index=True)
-combined.to_csv("Portland_Assessor_AllNeighborhoods.csv", index=False)
-
-print("✅ All done. Combined file ready.")
+                    select = open_search_page(driver, pool.url)
+                except Exception:
+                    pass
+                continue
+
+            # Reset
+            clear_search(driver)
+        pool.release((driver, select, session_dir))
+
+    threads = [threading.Thread(target=run_session) for _ in range(args.sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    pool.close()
+
+    # Combine CSVs
+    files = [f"downloads/{f}" for f in os.listdir("downloads") if f.endswith(".csv")]
+    frames = []
+
+    for f in files:
+        df = pd.read_csv(f)
+        df["neighborhood"] = os.path.basename(f).replace(".csv","")
+        frames.append(df)
+
+    combined = pd.concat(frames, ignore_index=True)
+    combined.to_csv("Portland_Assessor_AllNeighborhoods.csv", index=False)
+
+    print("✅ All done. Combined file ready.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+State-plane to latitude/longitude projection for the merged dataset.
+
+X_STATE_PLANE / Y_STATE_PLANE are NAD83(2011) Oregon North (EPSG:6559,
+Lambert Conformal Conic, international feet). The whole column is
+projected in one vectorized batch: only distinct coordinate pairs are
+projected, and results are kept in a small on-disk cache keyed by the
+pair, so a refresh only projects properties whose coordinates are new.
+
+pyproj is used when installed; otherwise the Lambert inverse is computed
+with numpy (agrees with pyproj to well under a meter). NAD83(2011) and
+WGS84 differ by about a meter here, which is ignored.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    from pyproj import Transformer
+except ImportError:  # optional; the numpy Lambert inverse below is used instead
+    Transformer = None
+
+CACHE_FILE = ".projection_cache.npz"
+
+# EPSG:6559 NAD83(2011) / Oregon North (ft)
+FOOT = 0.3048
+A = 6378137.0                 # GRS80
+INV_F = 298.257222101
+LAT_1, LAT_2 = 46.0, 44 + 20 / 60
+LAT_0, LON_0 = 43 + 40 / 60, -(120 + 30 / 60)
+FALSE_EASTING = 2500000.0     # meters
+FALSE_NORTHING = 0.0
+
+
+def _lcc_constants():
+    f = 1 / INV_F
+    e = np.sqrt(2 * f - f * f)
+
+    def m(phi):
+        return np.cos(phi) / np.sqrt(1 - (e * np.sin(phi)) ** 2)
+
+    def t(phi):
+        s = e * np.sin(phi)
+        return np.tan(np.pi / 4 - phi / 2) / ((1 - s) / (1 + s)) ** (e / 2)
+
+    phi1, phi2, phi0 = np.radians([LAT_1, LAT_2, LAT_0])
+    n = (np.log(m(phi1)) - np.log(m(phi2))) / (np.log(t(phi1)) - np.log(t(phi2)))
+    big_f = m(phi1) / (n * t(phi1) ** n)
+    rho0 = A * big_f * t(phi0) ** n
+    return e, n, big_f, rho0
+
+
+def lcc_inverse(x_ft, y_ft):
+    """Vectorized Lambert Conformal Conic inverse: state-plane feet -> (lat, lon) degrees."""
+    e, n, big_f, rho0 = _lcc_constants()
+    x = np.asarray(x_ft, dtype=float) * FOOT - FALSE_EASTING
+    y = rho0 - (np.asarray(y_ft, dtype=float) * FOOT - FALSE_NORTHING)
+    rho = np.sign(n) * np.hypot(x, y)
+    theta = np.arctan2(x, y)
+    t = (rho / (A * big_f)) ** (1 / n)
+
+    phi = np.pi / 2 - 2 * np.arctan(t)
+    for _ in range(6):  # converges to < 1e-12 rad
+        s = e * np.sin(phi)
+        phi = np.pi / 2 - 2 * np.arctan(t * ((1 - s) / (1 + s)) ** (e / 2))
+    lon = np.degrees(theta / n) + LON_0
+    return np.degrees(phi), lon
+
+
+def _project(x_ft, y_ft):
+    if Transformer is not None:
+        transformer = Transformer.from_crs("EPSG:6559", "EPSG:4326", always_xy=True)
+        lon, lat = transformer.transform(x_ft, y_ft)
+        return np.asarray(lat), np.asarray(lon)
+    return lcc_inverse(x_ft, y_ft)
+
+
+def pair_keys(x_ft, y_ft):
+    """One int64 per coordinate pair (hundredths of a foot, x in the high 32 bits)."""
+    x = np.round(np.asarray(x_ft, dtype=float) * 100).astype(np.int64)
+    y = np.round(np.asarray(y_ft, dtype=float) * 100).astype(np.int64)
+    return (x << 32) | (y & 0xFFFFFFFF)
+
+
+def _load_cache(path):
+    if path and os.path.exists(path):
+        with np.load(path) as cache:
+            return cache["keys"], cache["lat"], cache["lon"]
+    return np.empty(0, np.int64), np.empty(0), np.empty(0)
+
+
+def project_state_plane(x_ft, y_ft, cache_file=CACHE_FILE):
+    """
+    Latitude and longitude arrays for state-plane coordinates. Missing or
+    zero coordinates give NaN. Returns (lat, lon, newly_projected_count).
+    """
+    x_ft = np.asarray(x_ft, dtype=float)
+    y_ft = np.asarray(y_ft, dtype=float)
+    lat = np.full(len(x_ft), np.nan)
+    lon = np.full(len(x_ft), np.nan)
+    valid = np.isfinite(x_ft) & np.isfinite(y_ft) & (x_ft > 0) & (y_ft > 0)
+    if not valid.any():
+        return lat, lon, 0
+
+    keys, inverse = np.unique(pair_keys(x_ft[valid], y_ft[valid]), return_inverse=True)
+    cached_keys, cached_lat, cached_lon = _load_cache(cache_file)
+
+    # Look every distinct pair up in the (sorted) cache; project only the misses
+    hit = np.zeros(len(keys), dtype=bool)
+    unique_lat = np.full(len(keys), np.nan)
+    unique_lon = np.full(len(keys), np.nan)
+    if len(cached_keys):
+        pos = np.minimum(np.searchsorted(cached_keys, keys), len(cached_keys) - 1)
+        hit = cached_keys[pos] == keys
+        unique_lat[hit] = cached_lat[pos[hit]]
+        unique_lon[hit] = cached_lon[pos[hit]]
+
+    misses = ~hit
+    if misses.any():
+        miss_keys = keys[misses]
+        miss_x = (miss_keys >> 32) / 100.0
+        miss_y = (miss_keys & 0xFFFFFFFF) / 100.0
+        unique_lat[misses], unique_lon[misses] = _project(miss_x, miss_y)
+
+        if cache_file:
+            all_keys = np.concatenate([cached_keys, miss_keys])
+            order = np.argsort(all_keys, kind="stable")
+            tmp_path = cache_file + ".tmp.npz"
+            np.savez(tmp_path, keys=all_keys[order],
+                     lat=np.concatenate([cached_lat, unique_lat[misses]])[order],
+                     lon=np.concatenate([cached_lon, unique_lon[misses]])[order])
+            os.replace(tmp_path, cache_file)
+
+    lat[valid] = unique_lat[inverse]
+    lon[valid] = unique_lon[inverse]
+    return lat, lon, int(misses.sum())
+
+
+def add_lat_lon(df, cache_file=CACHE_FILE):
+    """
+    Add LATITUDE and LONGITUDE columns (float64) to a dataset in place.
+    Returns how many coordinate pairs were not in the cache.
+    """
+    x = pd.to_numeric(df["X_STATE_PLANE"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    y = pd.to_numeric(df["Y_STATE_PLANE"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    lat, lon, projected = project_state_plane(x, y, cache_file)
+    df["LATITUDE"] = lat.round(7)
+    df["LONGITUDE"] = lon.round(7)
+    return projected
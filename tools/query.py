@@ -0,0 +1,245 @@
+"""
+Run SQL against the merged dataset and the quality subsets.
+
+Tables:
+    assessor                  Portland_Assessor_AllNeighborhoods.csv
+    high_quality_80pct, ...   one per subsets/*.csv
+
+Only the tables a query names are prepared, and each from the dataset's
+typed Arrow copy when it is current (the CSV is parsed otherwise).
+
+With DuckDB installed (pip install duckdb) each table is converted once to
+a typed Parquet file under .parquet/ and queried in place, so filters and
+column lists are pushed down into the scan and only the matching row
+groups and columns are read. Without DuckDB the tables are loaded once
+into a SQLite file (.query.sqlite) and queried there; SQLite has no
+pushdown, only indexes on NEIGHBORHOOD and PROPERTY_ID, so every other
+filter scans the whole table.
+
+Usage:
+    python tools/query.py --tables
+    python tools/query.py "SELECT NEIGHBORHOOD, median(SALE_PRICE) AS median_sale
+                           FROM assessor WHERE year(SALE_DATE) = 2023
+                           GROUP BY 1 ORDER BY 2 DESC LIMIT 10"
+    python tools/query.py -f my_query.sql --format csv -o result.csv
+"""
+
+import argparse
+import csv
+import glob
+import io
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+
+try:
+    import duckdb
+except ImportError:  # optional; SQLite (stdlib) is the fallback engine
+    duckdb = None
+
+MAIN_DATASET = "Portland_Assessor_AllNeighborhoods.csv"
+SUBSET_GLOB = "subsets/*.csv"
+PARQUET_DIR = ".parquet"
+SQLITE_FILE = ".query.sqlite"
+ROW_GROUP_SIZE = 100_000
+
+
+def dataset_tables():
+    """Table name -> CSV path for every dataset that exists."""
+    tables = {}
+    if os.path.exists(MAIN_DATASET):
+        tables["assessor"] = MAIN_DATASET
+    for path in sorted(glob.glob(SUBSET_GLOB)):
+        tables[os.path.splitext(os.path.basename(path))[0]] = path
+    return tables
+
+
+def referenced_tables(sql, tables):
+    """The tables whose names appear in the SQL (a column of the same name only costs a load)."""
+    words = {word.lower() for word in re.findall(r"\w+", sql)}
+    return {name: path for name, path in tables.items() if name.lower() in words}
+
+
+def read_typed_csv(csv_path):
+    """
+    A dataset with canonical types and SALE_DATE as a date, memory-mapped
+    from its Arrow copy when that is current.
+    SQL names are case-insensitive, so the merge's lowercase `neighborhood`
+    (the search label) becomes `search_neighborhood` next to NEIGHBORHOOD.
+    """
+    # pandas (and the schema module) load only when a table has to be (re)built, so a
+    # query against an up-to-date .query.sqlite starts without them
+    import pandas as pd
+    from arrow_io import read_frame
+    from assessor_schema import CSV_ENGINE, coerce_types, read_dtypes
+
+    df = coerce_types(read_frame(csv_path, dtype=read_dtypes(), engine=CSV_ENGINE))
+    if "neighborhood" in df.columns and "NEIGHBORHOOD" in df.columns:
+        df = df.rename(columns={"neighborhood": "search_neighborhood"})
+    if "SALE_DATE" in df.columns:
+        df["SALE_DATE"] = pd.to_datetime(df["SALE_DATE"], errors="coerce").dt.date
+    return df
+
+
+def _is_stale(target, source):
+    return not os.path.exists(target) or os.path.getmtime(target) < os.path.getmtime(source)
+
+
+def parquet_path(csv_path):
+    """Typed Parquet copy of a CSV, (re)written when the CSV is newer."""
+    folder, name = os.path.split(csv_path)
+    path = os.path.join(folder, PARQUET_DIR, os.path.splitext(name)[0] + ".parquet")
+    if _is_stale(path, csv_path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        read_typed_csv(csv_path).to_parquet(tmp_path, index=False, row_group_size=ROW_GROUP_SIZE)
+        os.replace(tmp_path, path)
+    return path
+
+
+def connect_duckdb(tables):
+    con = duckdb.connect()
+    for name, csv_path in tables.items():
+        try:
+            source = f"read_parquet('{parquet_path(csv_path)}')"
+        except ImportError:  # no pyarrow to write Parquet; let DuckDB scan the CSV
+            source = f"read_csv_auto('{csv_path}')"
+        con.execute(f'CREATE VIEW "{name}" AS SELECT * FROM {source}')
+    return con
+
+
+class Median:
+    """median() aggregate for SQLite (DuckDB has it built in)."""
+
+    def __init__(self):
+        self.values = []
+
+    def step(self, value):
+        if value is not None:
+            self.values.append(value)
+
+    def finalize(self):
+        values = sorted(self.values)
+        if not values:
+            return None
+        mid = len(values) // 2
+        return values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2
+
+
+def _year(value):
+    """year() for SQLite, where dates are stored as 'YYYY-MM-DD' text."""
+    try:
+        return int(str(value)[:4]) if value is not None else None
+    except ValueError:
+        return None
+
+
+def connect_sqlite(tables):
+    con = sqlite3.connect(SQLITE_FILE)
+    # The DuckDB functions the docs' examples use
+    con.create_aggregate("median", 1, Median)
+    con.create_function("year", 1, _year, deterministic=True)
+    con.execute("CREATE TABLE IF NOT EXISTS _sources (name TEXT PRIMARY KEY, path TEXT, mtime REAL)")
+    loaded = {name: (path, mtime) for name, path, mtime in con.execute("SELECT * FROM _sources")}
+    for name, csv_path in tables.items():
+        mtime = os.path.getmtime(csv_path)
+        if loaded.get(name) == (csv_path, mtime):
+            continue
+        print(f"  Loading {csv_path} into {SQLITE_FILE}...", file=sys.stderr)
+        df = read_typed_csv(csv_path)
+        df.to_sql(name, con, if_exists="replace", index=False, chunksize=50_000)
+        for col in ("NEIGHBORHOOD", "neighborhood", "PROPERTY_ID"):
+            if col in df.columns:
+                con.execute(f'CREATE INDEX IF NOT EXISTS "{name}_{col}" ON "{name}" ("{col}")')
+        con.execute("INSERT OR REPLACE INTO _sources VALUES (?, ?, ?)", (name, csv_path, mtime))
+        con.commit()
+    return con
+
+
+def connect(sql=None):
+    """
+    A connection with one table/view per dataset (only those the SQL names,
+    when given), using the best engine available.
+    """
+    tables = dataset_tables()
+    if not tables:
+        raise FileNotFoundError(f"No datasets found ({MAIN_DATASET}, {SUBSET_GLOB})")
+    if sql is not None:
+        tables = referenced_tables(sql, tables)
+    if duckdb is not None:
+        return connect_duckdb(tables)
+    return connect_sqlite(tables)
+
+
+def run_query(sql, con=None):
+    """Run one SQL statement and return the result as a DataFrame."""
+    import pandas as pd
+
+    con = con or connect(sql)
+    if duckdb is not None and isinstance(con, duckdb.DuckDBPyConnection):
+        return con.execute(sql).df()
+    return pd.read_sql_query(sql, con)
+
+
+def fetch(sql, con=None):
+    """Run one SQL statement and return (column names, rows) without going through pandas."""
+    con = con or connect(sql)
+    cursor = con.execute(sql)
+    return [d[0] for d in cursor.description or []], cursor.fetchall()
+
+
+def format_rows(columns, rows, fmt="table"):
+    """Query results as an aligned text table, CSV or JSON records."""
+    if fmt == "csv":
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator="\n")
+        writer.writerow(columns)
+        writer.writerows(rows)
+        return out.getvalue()
+    if fmt == "json":
+        return json.dumps([dict(zip(columns, row)) for row in rows], indent=2, default=str)
+    cells = [[str(c) for c in columns]] + [["" if v is None else str(v) for v in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(columns))]
+    return "\n".join(" ".join(v.rjust(w) for v, w in zip(row, widths)) for row in cells)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run SQL against the assessor datasets")
+    parser.add_argument("sql", nargs="?", help="SQL statement")
+    parser.add_argument("-f", "--file", help="Read the SQL from a file")
+    parser.add_argument("--tables", action="store_true", help="List the available tables")
+    parser.add_argument("--format", choices=["table", "csv", "json"], default="table")
+    parser.add_argument("-o", "--output", help="Write the result to a file")
+    args = parser.parse_args(argv)
+
+    if args.tables:
+        for name, path in dataset_tables().items():
+            print(f"{name:<30} {path}")
+        return
+
+    sql = open(args.file).read() if args.file else args.sql
+    if not sql:
+        parser.error("give a SQL statement, -f FILE or --tables")
+
+    started = time.time()
+    try:
+        columns, rows = fetch(sql)
+    except (sqlite3.Error, *((duckdb.Error,) if duckdb else ())) as e:
+        sys.exit(f"❌ Query failed: {e}")
+    elapsed = time.time() - started
+    text = format_rows(columns, rows, args.format)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+        print(f"✅ {len(rows):,} rows written to {args.output}")
+    else:
+        print(text)
+    print(f"\n{len(rows):,} rows in {elapsed:.2f}s ({'duckdb' if duckdb else 'sqlite'})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
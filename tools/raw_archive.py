@@ -0,0 +1,251 @@
+"""
+Content-addressed archive for raw page downloads.
+
+Each downloaded page CSV is stored once per distinct content, compressed,
+under its SHA-256: raw_archive/blobs/ab/abcdef....csv.zst (.csv.gz when
+the zstandard module is not installed). An index (raw_archive/index.csv)
+maps every neighborhood / page / scrape time to its blob, so repeated
+scrapes of unchanged pages cost one index row instead of another copy.
+
+Each index row also carries a scrape number. Pages are grouped into
+scrapes per neighborhood and per add (one merge, or one migration of old
+downloads): in filename time order, each page 1 starts a new scrape, so
+years of migrated downloads still come apart into their separate scrapes.
+
+The merge reads pages straight from the archive: blobs are decompressed
+in memory and handed to pandas as file objects, never written back out.
+Re-merging a past scrape picks, for each neighborhood, the latest complete
+scrape (all of its pages) finished at or before that time.
+
+Usage:
+    python tools/raw_archive.py add raw_downloads/*.csv --remove   # migrate old downloads
+    python tools/raw_archive.py list
+    python tools/raw_archive.py stats
+    python tools/raw_archive.py extract "ALAMEDA" 1 -o alameda_p1.csv
+"""
+
+import argparse
+import gzip
+import hashlib
+import io
+import os
+import re
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import zstandard
+except ImportError:  # optional; blobs are gzip-compressed instead
+    zstandard = None
+
+ARCHIVE_DIR = "raw_archive"
+INDEX_COLUMNS = ["neighborhood", "page", "scraped_at", "filename", "sha256", "blob", "size", "stored_size",
+                 "archived_at", "scrape"]
+FILENAME_PATTERN = re.compile(r"(.+)_page(\d+)_(\d{8}_\d{6})\.csv$")
+ZSTD_LEVEL = 10
+
+
+def parse_filename(path):
+    """(neighborhood, page, scraped_at) from NEIGHBORHOOD_pageN_YYYYMMDD_HHMMSS.csv."""
+    name = os.path.basename(path)
+    match = FILENAME_PATTERN.match(name)
+    if match:
+        return match.group(1), int(match.group(2)), match.group(3)
+    # Older names without a timestamp: fall back to the file's modification time
+    page = re.search(r"_page(\d+)", name)
+    scraped_at = datetime.fromtimestamp(os.path.getmtime(path)).strftime("%Y%m%d_%H%M%S")
+    return name.split("_page")[0], int(page.group(1)) if page else 1, scraped_at
+
+
+def number_scrapes(entries, first=0):
+    """
+    Scrape numbers (from `first`) for index rows: a new scrape starts with
+    each neighborhood, each add and, in filename time order, each page 1.
+    """
+    ordered = entries.sort_values(["neighborhood", "archived_at", "scraped_at", "page"])
+    starts = ((ordered["neighborhood"] != ordered["neighborhood"].shift())
+              | (ordered["archived_at"] != ordered["archived_at"].shift())
+              | (ordered["page"] == 1))
+    return (starts.cumsum() - 1 + first).reindex(entries.index)
+
+
+class RawArchive:
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = root
+        self.index_path = os.path.join(root, "index.csv")
+
+    def entries(self):
+        if not os.path.exists(self.index_path):
+            return pd.DataFrame(columns=INDEX_COLUMNS)
+        entries = pd.read_csv(self.index_path, dtype={"scraped_at": str, "archived_at": str, "sha256": str,
+                                                      "neighborhood": str})
+        if "scrape" not in entries.columns:  # indexes written before scrapes were numbered
+            entries["scrape"] = number_scrapes(entries)
+        return entries
+
+    def _existing_blob(self, sha256):
+        for ext in (".csv.zst", ".csv.gz"):
+            blob = os.path.join("blobs", sha256[:2], sha256 + ext)
+            if os.path.exists(os.path.join(self.root, blob)):
+                return blob
+        return None
+
+    def _write_blob(self, sha256, data):
+        if zstandard is not None:
+            blob = os.path.join("blobs", sha256[:2], sha256 + ".csv.zst")
+            compressed = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+        else:
+            blob = os.path.join("blobs", sha256[:2], sha256 + ".csv.gz")
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        path = os.path.join(self.root, blob)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(compressed)
+        os.replace(path + ".tmp", path)
+        return blob
+
+    def add_files(self, paths):
+        """
+        Archive page files (already-stored content is only indexed again).
+        Returns their index rows as a DataFrame; the originals are left in place.
+        """
+        archived_at = datetime.now().strftime("%Y%m%d_%H%M%S")
+        entries = self.entries()
+        indexed = dict(zip(zip(entries["filename"], entries["sha256"]), entries["scrape"]))
+        rows = []
+        for path in paths:
+            with open(path, "rb") as f:
+                data = f.read()
+            sha256 = hashlib.sha256(data).hexdigest()
+            blob = self._existing_blob(sha256) or self._write_blob(sha256, data)
+            neighborhood, page, scraped_at = parse_filename(path)
+            rows.append({
+                "neighborhood": neighborhood, "page": page, "scraped_at": scraped_at,
+                "filename": os.path.basename(path), "sha256": sha256, "blob": blob, "size": len(data),
+                "stored_size": os.path.getsize(os.path.join(self.root, blob)), "archived_at": archived_at,
+                "scrape": indexed.get((os.path.basename(path), sha256)),
+            })
+        added = pd.DataFrame(rows, columns=INDEX_COLUMNS)
+        new = added["scrape"].isna()
+        if new.any():
+            first = int(entries["scrape"].max()) + 1 if len(entries) else 0
+            added.loc[new, "scrape"] = number_scrapes(added[new], first)
+            os.makedirs(self.root, exist_ok=True)
+            if len(entries) and not self._has_scrape_column():
+                # Rewrite an index from before scrape numbers once, with the numbers it was read with
+                pd.concat([entries, added[new]]).to_csv(self.index_path, index=False)
+            else:
+                added[new].to_csv(self.index_path, mode="a", header=not len(entries), index=False)
+        added["scrape"] = added["scrape"].astype(int)
+        return added
+
+    def _has_scrape_column(self):
+        with open(self.index_path) as f:
+            return "scrape" in f.readline().strip().split(",")
+
+    def read_bytes(self, blob):
+        with open(os.path.join(self.root, blob), "rb") as f:
+            compressed = f.read()
+        if blob.endswith(".zst"):
+            if zstandard is None:
+                raise ImportError(f"{blob} is zstd-compressed; pip install zstandard to read it")
+            return zstandard.ZstdDecompressor().decompress(compressed)
+        return gzip.decompress(compressed)
+
+    def open(self, blob):
+        """A page as an in-memory binary file object, ready for pd.read_csv."""
+        return io.BytesIO(self.read_bytes(blob))
+
+    def as_of(self, scraped_at=None):
+        """
+        The pages of each neighborhood's latest complete scrape finished at or
+        before `scraped_at` (YYYYMMDD_HHMMSS, or a prefix such as 20250115).
+
+        A scrape is complete when it has every page from 1 to its last, and
+        finished when its last page was downloaded. Pages are never mixed
+        across scrapes: rows move between pages from one scrape to the next,
+        and a neighborhood can lose pages.
+        """
+        entries = self.entries()
+        if entries.empty:
+            return entries
+        # Within one scrape, a page downloaded twice counts once (the later copy)
+        entries = entries.sort_values(["scrape", "page", "scraped_at"])
+        entries = entries.drop_duplicates(subset=["scrape", "page"], keep="last")
+        scrapes = entries.groupby(["neighborhood", "scrape"]).agg(
+            finished=("scraped_at", "max"), pages=("page", "size"), last_page=("page", "max")).reset_index()
+        scrapes = scrapes[scrapes["pages"] == scrapes["last_page"]]
+        if scraped_at:
+            scraped_at = str(scraped_at)
+            cutoff = scraped_at + "99999999_999999"[len(scraped_at):]  # a date prefix covers the whole day
+            scrapes = scrapes[scrapes["finished"] <= cutoff]
+        latest = scrapes.sort_values(["neighborhood", "finished", "scrape"]).drop_duplicates(
+            subset="neighborhood", keep="last")
+        chosen = entries[entries["scrape"].isin(latest["scrape"])]
+        return chosen.sort_values(["neighborhood", "page"]).reset_index(drop=True)
+
+    def latest_scrapes(self):
+        """Latest scrape time (YYYYMMDD_HHMMSS) archived for each neighborhood, upper-cased."""
+        entries = self.entries()
+        return entries.groupby(entries["neighborhood"].str.upper())["scraped_at"].max().to_dict()
+
+    def stats(self):
+        entries = self.entries()
+        blobs = entries.drop_duplicates(subset="sha256")
+        return {
+            "pages": len(entries),
+            "blobs": len(blobs),
+            "raw_bytes": int(entries["size"].sum()),
+            "stored_bytes": int(blobs["stored_size"].sum()),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Content-addressed archive of raw page downloads")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="Archive page CSVs")
+    add.add_argument("files", nargs="+")
+    add.add_argument("--remove", action="store_true", help="Delete the originals once archived")
+    sub.add_parser("list", help="Scrapes in the archive")
+    sub.add_parser("stats", help="Storage used")
+    extract = sub.add_parser("extract", help="Write one archived page back out as CSV")
+    extract.add_argument("neighborhood")
+    extract.add_argument("page", type=int)
+    extract.add_argument("--as-of", help="Scrape time YYYYMMDD_HHMMSS (default: latest)")
+    extract.add_argument("-o", "--output", required=True)
+    parser.add_argument("--root", default=ARCHIVE_DIR)
+    args = parser.parse_args(argv)
+
+    archive = RawArchive(args.root)
+    if args.command == "add":
+        added = archive.add_files(args.files)
+        print(f"📦 Archived {len(added)} files ({added['blob'].nunique()} distinct blobs)")
+        if args.remove:
+            for path in args.files:
+                os.remove(path)
+            print(f"   Removed {len(args.files)} originals")
+    elif args.command == "list":
+        entries = archive.entries()
+        scrapes = entries.groupby(entries["scraped_at"].str[:8]).agg(
+            pages=("page", "size"), neighborhoods=("neighborhood", "nunique"), scrapes=("scrape", "nunique"),
+            distinct=("sha256", "nunique"))
+        print(scrapes.to_string())
+    elif args.command == "stats":
+        stats = archive.stats()
+        ratio = stats["raw_bytes"] / stats["stored_bytes"] if stats["stored_bytes"] else 0
+        print(f"📊 {stats['pages']:,} pages in {stats['blobs']:,} blobs")
+        print(f"   {stats['raw_bytes'] / 1e6:,.1f} MB of downloads stored in {stats['stored_bytes'] / 1e6:,.1f} MB "
+              f"({ratio:.1f}x, {'zstd' if zstandard is not None else 'gzip'})")
+    elif args.command == "extract":
+        entries = archive.as_of(args.as_of)
+        match = entries[(entries["neighborhood"] == args.neighborhood) & (entries["page"] == args.page)]
+        if match.empty:
+            parser.error(f"{args.neighborhood} page {args.page} is not in the archive")
+        with open(args.output, "wb") as f:
+            f.write(archive.read_bytes(match.iloc[0]["blob"]))
+        print(f"💾 {args.output} (scraped {match.iloc[0]['scraped_at']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""
+Reproducible stratified samples of the merged dataset and its subsets.
+
+Rows are grouped into strata by neighborhood and market-value tier, and
+each PROPERTY_ID gets a fixed pseudo-random number in [0, 1) from a hash
+of the ID (and a seed). A sample at fraction f keeps every row whose
+number is below f, plus the lowest-numbered rows of any stratum that would
+otherwise get fewer than `min_per_stratum`, so small neighborhoods and rare
+value tiers are still represented. The same seed always gives the same
+sample, and a 1% sample is contained in the 5% one.
+
+Every sampled row carries `sample_weight`: the number of properties in its
+stratum divided by the number sampled from it. Weighted sums scale back to
+the full dataset, e.g. (df["MARKET_VALUE"] * df["sample_weight"]).sum().
+
+A sample can be drawn in one streaming pass over any CSV (only the sampled
+rows are kept in memory), or from a sample index saved next to the dataset
+(<name>.sample_index.npz: hash numbers and strata of every row), in which
+case only the sampled rows are read from the Arrow copy.
+
+Usage:
+    python tools/sampling.py subsets/portland_focused.csv --fraction 0.01
+    python tools/sampling.py subsets/*.csv --build
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from arrow_io import read_rows
+from assessor_schema import DTYPES, read_dtypes
+
+DEFAULT_DATASET = "Portland_Assessor_AllNeighborhoods.csv"
+VALUE_TIERS = [0, 300000, 500000, 750000, 1000000, np.inf]
+VALUE_TIER_LABELS = ["<300K", "300-500K", "500-750K", "750K-1M", ">1M"]
+WEIGHT_COLUMN = "sample_weight"
+CHUNK_ROWS = 200_000
+
+
+def index_path(dataset):
+    return os.path.splitext(dataset)[0] + ".sample_index.npz"
+
+
+def _source_signature(dataset):
+    stat = os.stat(dataset)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def _neighborhood_column(columns):
+    # The merge's search neighborhood is on every row; NEIGHBORHOOD is the assessor's own field
+    return "neighborhood" if "neighborhood" in columns else "NEIGHBORHOOD"
+
+
+def strata(df):
+    """Stratum label of each row: neighborhood and market-value tier ("unknown" without a value)."""
+    neighborhood = df[_neighborhood_column(df.columns)].fillna("").astype(str)
+    value = pd.to_numeric(df["MARKET_VALUE"], errors="coerce").astype("float64")
+    tier = pd.cut(value, bins=VALUE_TIERS, labels=VALUE_TIER_LABELS)
+    tier = tier.astype(object).where(tier.notna(), "unknown")
+    return (neighborhood + "|" + tier.astype(str)).to_numpy()
+
+
+def hash_fraction(property_ids, seed=0):
+    """A fixed number in [0, 1) per PROPERTY_ID (the same for the same ID and seed, in any file)."""
+    ids = pd.Series(property_ids).fillna("").astype(str).to_numpy(dtype=object)
+    hashed = pd.util.hash_array(ids, hash_key=f"{seed:016d}"[-16:], categorize=False)
+    return (hashed >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def select(u, labels, fraction, min_per_stratum=0):
+    """
+    Boolean mask of the sampled rows: u below the fraction, plus the
+    min_per_stratum lowest-u rows of each stratum.
+    """
+    keep = u < fraction
+    if min_per_stratum:
+        if labels.dtype == object:
+            labels = pd.factorize(labels)[0]
+        order = np.lexsort((u, labels))
+        sorted_labels = labels[order]
+        starts = np.r_[0, np.flatnonzero(sorted_labels[1:] != sorted_labels[:-1]) + 1]
+        rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+        keep[order[rank < min_per_stratum]] = True
+    return keep
+
+
+def add_weights(sample, labels, population):
+    """sample_weight = stratum size / rows sampled from the stratum."""
+    sampled = pd.Series(labels).value_counts()
+    weights = pd.Series(population).reindex(sampled.index) / sampled
+    sample[WEIGHT_COLUMN] = weights.reindex(labels).to_numpy()
+    return sample
+
+
+def _infer_types(df):
+    """Columns outside the assessor schema (e.g. completeness_score) come back numeric where they are."""
+    for col in df.columns:
+        if col not in DTYPES:
+            numbers = pd.to_numeric(df[col], errors="coerce")
+            if numbers.notna().sum() == df[col].notna().sum():
+                df[col] = numbers
+    return df
+
+
+def stream_sample(dataset, fraction=0.01, min_per_stratum=5, seed=0, columns=None, chunksize=CHUNK_ROWS):
+    """Draw a stratified sample in one pass over a CSV, holding only candidate rows in memory."""
+    kept, population = [], {}
+    for chunk in pd.read_csv(dataset, dtype=read_dtypes(), chunksize=chunksize):
+        labels = strata(chunk)
+        for label, count in pd.Series(labels).value_counts().items():
+            population[label] = population.get(label, 0) + count
+        # A row in the final sample is also selected within its own chunk, so this only drops
+        # rows that can never make it; the pruning below repeats the selection over the kept rows
+        u = hash_fraction(chunk["PROPERTY_ID"], seed)
+        mask = select(u, labels, fraction, min_per_stratum)
+        kept.append(chunk[mask].assign(_u=u[mask], _stratum=labels[mask]))
+        if len(kept) > 1:
+            candidates = pd.concat(kept, ignore_index=True)
+            kept = [candidates[select(candidates["_u"].to_numpy(), candidates["_stratum"].to_numpy(),
+                                      fraction, min_per_stratum)]]
+    sample = pd.concat(kept, ignore_index=True) if kept else pd.DataFrame()
+    labels = sample.pop("_stratum").to_numpy()
+    sample = sample.drop(columns="_u")
+    if columns:
+        sample = sample[columns]
+    return add_weights(_infer_types(sample), labels, population)
+
+
+class SampleIndex:
+    """Hash number and stratum of every row of a dataset, in file order."""
+
+    def __init__(self, u, codes, labels, seed=0, source=None):
+        self.u = u
+        self.codes = codes
+        self.labels = labels
+        self.seed = seed
+        self.source = source
+
+    @classmethod
+    def build(cls, df, seed=0):
+        codes, labels = pd.factorize(strata(df))
+        return cls(hash_fraction(df["PROPERTY_ID"], seed), codes.astype(np.int32), np.asarray(labels, dtype=str), seed)
+
+    def save(self, path, dataset=None):
+        source = _source_signature(dataset) if dataset else np.zeros(2, dtype=np.int64)
+        np.savez_compressed(path, u=self.u, codes=self.codes, labels=self.labels,
+                            seed=np.array([self.seed]), source=source)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data["u"], data["codes"], data["labels"], int(data["seed"][0]), data["source"])
+
+    def __len__(self):
+        return len(self.u)
+
+    def rows(self, fraction, min_per_stratum=0):
+        """Positions of the sampled rows, in file order."""
+        return np.flatnonzero(select(self.u, self.codes, fraction, min_per_stratum))
+
+    def population(self):
+        return dict(zip(self.labels, np.bincount(self.codes, minlength=len(self.labels))))
+
+
+def build_index(dataset=DEFAULT_DATASET, df=None, seed=0):
+    """Build and save the sample index for a dataset (reads only the stratum columns if no frame is given)."""
+    if df is None:
+        header = pd.read_csv(dataset, nrows=0).columns
+        df = pd.read_csv(dataset, usecols=["PROPERTY_ID", "MARKET_VALUE", _neighborhood_column(header)],
+                         dtype={"PROPERTY_ID": str})
+    index = SampleIndex.build(df, seed)
+    index.save(index_path(dataset), dataset)
+    index.source = _source_signature(dataset)
+    return index
+
+
+def load_index(dataset=DEFAULT_DATASET, seed=0):
+    """The saved index if it matches the dataset file and seed, otherwise None."""
+    path = index_path(dataset)
+    if os.path.exists(path):
+        index = SampleIndex.load(path)
+        if index.seed == seed and np.array_equal(index.source, _source_signature(dataset)):
+            return index
+    return None
+
+
+def load_sample(dataset=DEFAULT_DATASET, fraction=0.01, min_per_stratum=5, seed=0, columns=None):
+    """
+    A stratified sample with a sample_weight column: read through the sample
+    index when there is a current one, otherwise drawn in one streaming pass.
+    """
+    index = load_index(dataset, seed)
+    if index is None:
+        return stream_sample(dataset, fraction, min_per_stratum, seed, columns)
+    rows = index.rows(fraction, min_per_stratum)
+    sample = read_rows(dataset, rows, columns=columns)
+    return add_weights(sample, index.labels[index.codes[rows]], index.population())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stratified samples (neighborhood x value tier) of a dataset")
+    parser.add_argument("datasets", nargs="*", default=[DEFAULT_DATASET])
+    parser.add_argument("--fraction", type=float, default=0.01)
+    parser.add_argument("--min-per-stratum", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--build", action="store_true", help="Build the sample index instead of sampling")
+    parser.add_argument("-o", "--output", help="Write the sample to this CSV")
+    args = parser.parse_args(argv)
+
+    for dataset in args.datasets:
+        started = time.time()
+        if args.build:
+            index = build_index(dataset, seed=args.seed)
+            print(f"🎲 {dataset}: {len(index):,} rows in {len(index.labels):,} strata "
+                  f"({time.time() - started:.2f}s)")
+            continue
+        sample = load_sample(dataset, args.fraction, args.min_per_stratum, args.seed)
+        print(f"🎲 {dataset}: {len(sample):,} rows sampled, weights sum to {sample[WEIGHT_COLUMN].sum():,.0f} "
+              f"({time.time() - started:.2f}s)")
+        if args.output:
+            sample.to_csv(args.output, index=False)
+            print(f"   Saved: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Pacing and work ordering for the scrapers.
+
+- AdaptiveLimiter caps how many requests the browser sessions have in
+  flight at once. It ramps up while the site answers quickly and halves
+  the limit on timeouts and errors (additive increase, multiplicative
+  decrease), replacing the fixed sleeps that used to pace the scrape.
+- WorkQueue hands out neighborhoods (or page ranges of big neighborhoods)
+  most expensive first, and holds failed items back for a jittered
+  backoff before they are retried.
+"""
+
+import heapq
+import itertools
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+
+class AdaptiveLimiter:
+    """Concurrency limit that adapts to how the server is coping."""
+
+    def __init__(self, initial=1, minimum=1, maximum=4, slow_seconds=8.0):
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.limit = min(max(initial, minimum), self.maximum)
+        self.slow_seconds = slow_seconds
+        self.active = 0
+        self._credit = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.active >= int(self.limit):
+                self._cond.wait()
+            self.active += 1
+
+    def release(self, seconds, ok=True):
+        with self._cond:
+            self.active -= 1
+            if not ok:
+                # Back off hard on errors and timeouts
+                previous = int(self.limit)
+                self.limit = max(self.minimum, previous // 2)
+                self._credit = 0.0
+                if self.limit < previous:
+                    print(f"    ↓ Concurrency limit now {self.limit}")
+            elif seconds > self.slow_seconds:
+                self.limit = max(self.minimum, int(self.limit) - 1)
+                self._credit = 0.0
+            else:
+                # Roughly +1 after a full round of fast responses
+                self._credit += 1.0 / self.limit
+                if self._credit >= 1.0 and self.limit < self.maximum:
+                    self.limit += 1
+                    self._credit = 0.0
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """Hold one request slot for the duration of the block, timing it."""
+        self.acquire()
+        started = time.monotonic()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.release(time.monotonic() - started, ok)
+
+
+def backoff_delay(attempt, base=2.0, cap=60.0):
+    """Full-jitter exponential backoff: a random delay up to base * 2**attempt."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+@dataclass
+class WorkItem:
+    neighborhood: str
+    pages: list = None  # None = every missing page
+    cost: float = 0.0
+    last_scraped: str = ""
+    attempts: int = 0
+    ready_at: float = 0.0
+
+
+class WorkQueue:
+    """
+    Thread-safe priority queue of WorkItems.
+
+    get() blocks while items are only waiting out a retry delay, and
+    returns None once everything has been handed out and finished.
+    """
+
+    def __init__(self, items=(), order="largest"):
+        self.order = order
+        self._heap = []
+        self._delayed = []
+        self._in_flight = 0
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        for item in items:
+            self._push(item)
+
+    def _key(self, item):
+        # "" (never scraped) sorts before any timestamp, so it counts as stalest
+        if self.order == "stalest":
+            return (item.last_scraped, -item.cost)
+        return (-item.cost, item.last_scraped)
+
+    def _push(self, item):
+        heapq.heappush(self._heap, (self._key(item), next(self._seq), item))
+
+    def put(self, item):
+        with self._cond:
+            self._push(item)
+            self._cond.notify()
+
+    def get(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                while self._delayed and self._delayed[0][0] <= now:
+                    _, _, item = heapq.heappop(self._delayed)
+                    self._push(item)
+                if self._heap:
+                    _, _, item = heapq.heappop(self._heap)
+                    self._in_flight += 1
+                    return item
+                if not self._delayed and self._in_flight == 0:
+                    return None
+                timeout = self._delayed[0][0] - now if self._delayed else None
+                self._cond.wait(timeout)
+
+    def done(self, item):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def retry(self, item, delay):
+        """Give an item back to be tried again after `delay` seconds."""
+        with self._cond:
+            item.attempts += 1
+            item.ready_at = time.monotonic() + delay
+            heapq.heappush(self._delayed, (item.ready_at, next(self._seq), item))
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+
+def load_previous_counts(summary_file="data_summary.txt"):
+    """Properties per neighborhood from the last merge's summary report."""
+    counts = {}
+    if not os.path.exists(summary_file):
+        return counts
+    with open(summary_file) as f:
+        for line in f:
+            match = re.match(r"(.+): ([\d,]+)$", line.strip())
+            if match and not line.startswith("Total"):
+                counts[match.group(1).upper()] = int(match.group(2).replace(",", ""))
+    return counts
+
+
+def last_scraped_times(*folders):
+    """Latest download timestamp (YYYYMMDD_HHMMSS) seen for each neighborhood."""
+    latest = {}
+    for folder in folders:
+        if not os.path.exists(folder):
+            continue
+        for name in os.listdir(folder):
+            match = re.match(r"(.+)_page\d+_(\d{8}_\d{6})", name)
+            if match:
+                hood = match.group(1).upper()
+                latest[hood] = max(latest.get(hood, ""), match.group(2))
+    return latest
+
+
+def split_pages(pages, chunk_size):
+    """Break a page list into runs of at most chunk_size pages."""
+    return [pages[i:i + chunk_size] for i in range(0, len(pages), chunk_size)]
+
+
+def build_work_items(neighborhoods, plan, todo_pages, previous_counts, last_scraped, chunk_pages=5):
+    """
+    One WorkItem per neighborhood, or per run of `chunk_pages` pages when a
+    neighborhood's page plan is known, so big neighborhoods spread across
+    sessions. Cost is the expected number of rows.
+    """
+    known = [c for c in previous_counts.values() if c]
+    default_cost = sorted(known)[len(known) // 2] if known else 1000
+
+    items = []
+    for hood in neighborhoods:
+        pages = todo_pages.get(hood)
+        if pages == []:
+            continue
+        entry = plan.get(hood)
+        if pages is None or entry is None:
+            cost = previous_counts.get(hood, default_cost)
+            items.append(WorkItem(hood, None, cost, last_scraped.get(hood, "")))
+            continue
+        for chunk in split_pages(pages, chunk_pages):
+            cost = len(chunk) * entry["page_size"]
+            items.append(WorkItem(hood, chunk, cost, last_scraped.get(hood, "")))
+    return items
@@ -0,0 +1,367 @@
+"""
+Versioned snapshot store for the merged assessor dataset.
+
+Every refresh is committed as a new version. Only the cells that changed
+since the previous version are stored (keyed by PROPERTY_ID), with a full
+checkpoint every few versions so reading an old version never replays
+more than a handful of deltas.
+
+Only the export's columns and the search label are tracked (TRACKED_COLUMNS);
+what the merge derives from them is left out of the history.
+
+Layout:
+    snapshots/versions.json          version list (date, rows, kind, file)
+    snapshots/v0001_full.parquet     full checkpoint
+    snapshots/v0002_delta.parquet    changed cells: PROPERTY_ID, column, op, value
+    changes/changes_v0002.csv        change feed: the same cells with old and new values
+
+Usage:
+    python tools/snapshot_store.py commit Portland_Assessor_AllNeighborhoods.csv
+    python tools/snapshot_store.py list
+    python tools/snapshot_store.py as-of 2025-06-30 -o assessor_2025-06-30.csv
+    python tools/snapshot_store.py history R183397
+    python tools/snapshot_store.py changes 3 5 -o changes_v3_v5.csv
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from assessor_schema import CANONICAL_COLUMNS, coerce_types
+
+try:
+    import pyarrow  # noqa: F401
+    FRAME_EXT = ".parquet"
+except ImportError:  # pyarrow is optional; fall back to gzipped CSV
+    FRAME_EXT = ".csv.gz"
+
+KEY = "PROPERTY_ID"
+# The export's columns and the search label. Provenance (source_file) and what the merge
+# derives (LATITUDE/LONGITUDE, validation_flags, boundary columns) would turn every rule or
+# projection change into an update of every property, and can be derived again.
+TRACKED_COLUMNS = CANONICAL_COLUMNS + ["neighborhood"]
+CHECKPOINT_EVERY = 10
+DELTA_COLUMNS = [KEY, "column", "op", "value"]
+FEED_COLUMNS = [KEY, "op", "column", "old_value", "new_value"]
+
+
+def _write_frame(df, path):
+    if path.endswith(".parquet"):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def _read_frame(path):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path).astype("string")
+    return pd.read_csv(path, dtype="string")
+
+
+def tracked(frame):
+    """The tracked columns of a dataset or snapshot."""
+    return frame[[c for c in frame.columns if c in TRACKED_COLUMNS]]
+
+
+def prepare_snapshot(df):
+    """
+    Reduce a merged dataset to one text row per PROPERTY_ID, indexed by it,
+    and count the rows dropped because their PROPERTY_ID came again (a
+    property listed under two search neighborhoods keeps the last one).
+    Cells are compared and stored as text so dtype drift between refreshes
+    never shows up as a change.
+    """
+    df = tracked(df)
+    df = df[df[KEY].notna()]
+    unique = df.drop_duplicates(subset=KEY, keep="last")
+    return unique.set_index(KEY).astype("string").sort_index(), len(df) - len(unique)
+
+
+def row_hashes(snapshot):
+    """One 64-bit hash per property, over every cell of its row."""
+    return pd.util.hash_pandas_object(snapshot, index=False).to_numpy()
+
+
+def diff_snapshots(old, new):
+    """
+    Changed cells between two prepared snapshots, as a long table with
+    columns PROPERTY_ID, column, op ("insert"/"update"/"delete"), value
+    (the new value; NA when a cell was cleared) and old_value.
+
+    Rows present in both are compared by hash first, so only the few
+    properties that actually changed are compared cell by cell.
+    """
+    columns = sorted(set(old.columns) | set(new.columns))
+    old = old.reindex(columns=columns)
+    new = new.reindex(columns=columns)
+    parts = []
+
+    inserted = new.index.difference(old.index)
+    if len(inserted):
+        cells = new.loc[inserted].stack().dropna().rename("value").reset_index()
+        cells.columns = [KEY, "column", "value"]
+        cells["op"] = "insert"
+        parts.append(cells)
+
+    deleted = old.index.difference(new.index)
+    if len(deleted):
+        parts.append(pd.DataFrame({KEY: deleted, "column": "", "op": "delete", "value": pd.NA}))
+
+    common = old.index.intersection(new.index)
+    if len(common):
+        a = old.loc[common]
+        b = new.loc[common]
+        changed = row_hashes(a) != row_hashes(b)
+        a, b, common = a[changed], b[changed], common[changed]
+        a_na, b_na = a.isna().to_numpy(), b.isna().to_numpy()
+        same = (a.fillna("").to_numpy() == b.fillna("").to_numpy()) & (a_na == b_na)
+        rows, cols = np.nonzero(~same)
+        if len(rows):
+            parts.append(pd.DataFrame({
+                KEY: common[rows],
+                "column": np.asarray(columns)[cols],
+                "op": "update",
+                "value": b.to_numpy()[rows, cols],
+                "old_value": a.to_numpy()[rows, cols],
+            }))
+
+    if not parts:
+        return pd.DataFrame(columns=DELTA_COLUMNS + ["old_value"], dtype="string")
+    return pd.concat(parts, ignore_index=True).reindex(columns=DELTA_COLUMNS + ["old_value"]).astype("string")
+
+
+def change_feed(delta):
+    """
+    Consumer-facing view of a delta: PROPERTY_ID, op, column, old_value,
+    new_value. Inserted properties list each of their cells, deleted ones
+    a single row with an empty column.
+    """
+    feed = delta.rename(columns={"value": "new_value"})
+    return feed.reindex(columns=FEED_COLUMNS).sort_values([KEY, "column"], kind="stable")
+
+
+def write_change_feed(delta, path):
+    """Write a change feed CSV atomically."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    change_feed(delta).to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def apply_delta(snapshot, delta):
+    """Apply a delta table (from diff_snapshots) to a prepared snapshot."""
+    snapshot = snapshot.copy()
+    ops = delta["op"]
+
+    deleted = delta.loc[ops == "delete", KEY]
+    if len(deleted):
+        snapshot = snapshot.drop(index=deleted, errors="ignore")
+
+    updates = delta[ops == "update"]
+    for column, cells in updates.groupby("column"):
+        if column not in snapshot.columns:
+            snapshot[column] = pd.Series(pd.NA, index=snapshot.index, dtype="string")
+        snapshot.loc[cells[KEY].to_numpy(), column] = cells["value"].to_numpy()
+
+    inserts = delta[ops == "insert"]
+    if len(inserts):
+        rows = inserts.pivot(index=KEY, columns="column", values="value")
+        snapshot = pd.concat([snapshot, rows.reindex(columns=snapshot.columns.union(rows.columns))])
+
+    return snapshot.astype("string").sort_index()
+
+
+class SnapshotStore:
+    def __init__(self, root="snapshots", checkpoint_every=CHECKPOINT_EVERY):
+        self.root = root
+        self.checkpoint_every = checkpoint_every
+        self._index_path = os.path.join(root, "versions.json")
+
+    def versions(self):
+        if not os.path.exists(self._index_path):
+            return []
+        with open(self._index_path) as f:
+            return json.load(f)
+
+    def _save_versions(self, versions):
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(versions, f, indent=2)
+        os.replace(tmp_path, self._index_path)
+
+    def read_snapshot(self, version=None):
+        """Prepared (text, PROPERTY_ID-indexed) snapshot of a version; latest by default."""
+        versions = self.versions()
+        if version is not None:
+            versions = [v for v in versions if v["version"] <= version]
+        if not versions:
+            return None
+
+        # Start from the nearest full checkpoint and replay the deltas after it
+        start = max(i for i, v in enumerate(versions) if v["kind"] == "full")
+        snapshot = _read_frame(os.path.join(self.root, versions[start]["file"])).set_index(KEY)
+        for entry in versions[start + 1:]:
+            snapshot = apply_delta(snapshot, _read_frame(os.path.join(self.root, entry["file"])))
+        return snapshot
+
+    def read(self, version=None):
+        """A version as a regular typed DataFrame (PROPERTY_ID as a column)."""
+        snapshot = self.read_snapshot(version)
+        if snapshot is None:
+            return None
+        return coerce_types(snapshot.reset_index())
+
+    def version_as_of(self, when):
+        """Latest version committed on or before a date/datetime string."""
+        when = pd.Timestamp(when)
+        if when == when.normalize():
+            when = when + pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+        candidates = [v for v in self.versions() if pd.Timestamp(v["created"]) <= when]
+        return candidates[-1]["version"] if candidates else None
+
+    def read_as_of(self, when):
+        version = self.version_as_of(when)
+        return None if version is None else self.read(version)
+
+    def commit(self, df, label="", created=None, feed_dir=None):
+        """
+        Store a merged dataset as the next version. Returns the version entry.
+        With feed_dir, the changes since the previous version are also
+        written there as changes_vNNNN.csv.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        versions = self.versions()
+        snapshot, duplicates = prepare_snapshot(df)
+        number = versions[-1]["version"] + 1 if versions else 1
+        created = created or datetime.now().isoformat(timespec="seconds")
+
+        since_checkpoint = 0
+        for entry in reversed(versions):
+            if entry["kind"] == "full":
+                break
+            since_checkpoint += 1
+
+        entry = {
+            "version": number,
+            "created": created,
+            "label": label,
+            "rows": len(snapshot),
+        }
+        if duplicates:
+            entry["duplicate_rows"] = duplicates
+        # Earlier versions may still carry derived columns; compare what is tracked now
+        delta = diff_snapshots(tracked(self.read_snapshot()), snapshot) if versions else None
+        if delta is not None:
+            entry["changed_cells"] = len(delta)
+        if not versions or since_checkpoint + 1 >= self.checkpoint_every:
+            entry["kind"] = "full"
+            entry["file"] = f"v{number:04d}_full{FRAME_EXT}"
+            _write_frame(snapshot.reset_index(), os.path.join(self.root, entry["file"]))
+        else:
+            entry["kind"] = "delta"
+            entry["file"] = f"v{number:04d}_delta{FRAME_EXT}"
+            _write_frame(delta[DELTA_COLUMNS], os.path.join(self.root, entry["file"]))
+
+        if feed_dir and delta is not None:
+            entry["feed"] = os.path.join(feed_dir, f"changes_v{number:04d}.csv")
+            write_change_feed(delta, entry["feed"])
+
+        versions.append(entry)
+        self._save_versions(versions)
+        return entry
+
+    def history(self, property_id):
+        """
+        Every recorded value change of one property, oldest first:
+        version, created, op, column, value.
+        """
+        records = []
+        for entry in self.versions():
+            path = os.path.join(self.root, entry["file"])
+            if entry["kind"] == "full":
+                # Checkpoints hold the full row; report the cells that differ from what we had
+                frame = _read_frame(path)
+                row = frame[frame[KEY] == property_id].set_index(KEY)
+                previous = {r["column"]: r["value"] for r in records}
+                if row.empty:
+                    if previous and records[-1]["op"] != "delete":
+                        records.append({"version": entry["version"], "created": entry["created"],
+                                        "op": "delete", "column": "", "value": None})
+                    continue
+                # One op for the whole row: a property new here (or back after a delete) is an insert of every column
+                op = "insert" if not records or records[-1]["op"] == "delete" else "update"
+                if op == "insert":
+                    previous = {}
+                for column, value in row.iloc[0].items():
+                    value = None if pd.isna(value) else value
+                    if previous.get(column) != value:
+                        records.append({"version": entry["version"], "created": entry["created"],
+                                        "op": op, "column": column, "value": value})
+            else:
+                delta = _read_frame(path)
+                for _, cell in delta[delta[KEY] == property_id].iterrows():
+                    records.append({"version": entry["version"], "created": entry["created"],
+                                    "op": cell["op"], "column": cell["column"],
+                                    "value": None if pd.isna(cell["value"]) else cell["value"]})
+        return pd.DataFrame(records, columns=["version", "created", "op", "column", "value"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Versioned snapshots of the merged assessor dataset")
+    parser.add_argument("--root", default="snapshots", help="Snapshot store folder")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    commit = sub.add_parser("commit", help="Store a merged CSV as the next version")
+    commit.add_argument("csv")
+    commit.add_argument("--label", default="")
+    sub.add_parser("list", help="List stored versions")
+    as_of = sub.add_parser("as-of", help="Write the dataset as it was on a date")
+    as_of.add_argument("date")
+    as_of.add_argument("-o", "--output", required=True)
+    history = sub.add_parser("history", help="Show every recorded change of one property")
+    history.add_argument("property_id")
+    changes = sub.add_parser("changes", help="Write the change feed between two versions")
+    changes.add_argument("from_version", type=int)
+    changes.add_argument("to_version", type=int)
+    changes.add_argument("-o", "--output", required=True)
+    args = parser.parse_args(argv)
+
+    store = SnapshotStore(args.root)
+    if args.command == "commit":
+        entry = store.commit(pd.read_csv(args.csv, dtype=str), label=args.label or os.path.basename(args.csv))
+        print(f"✅ Stored version {entry['version']} ({entry['kind']}, {entry['rows']:,} properties, "
+              f"{entry.get('changed_cells', entry['rows']):,} changed cells)")
+        if entry.get("duplicate_rows"):
+            print(f"   ⚠️  {entry['duplicate_rows']:,} rows repeat a PROPERTY_ID and are not in the snapshot")
+    elif args.command == "list":
+        for v in store.versions():
+            changed = f"{v['changed_cells']:>10,} changed cells" if "changed_cells" in v else ""
+            print(f"v{v['version']:<4} {v['created']}  {v['kind']:<5} {v['rows']:>10,} properties  {changed}  {v['label']}")
+    elif args.command == "as-of":
+        version = store.version_as_of(args.date)
+        if version is None:
+            print(f"No version on or before {args.date}")
+            return
+        store.read(version).to_csv(args.output, index=False)
+        print(f"✅ Version {version} written to {args.output}")
+    elif args.command == "history":
+        changes = store.history(args.property_id)
+        if changes.empty:
+            print(f"No history for {args.property_id}")
+        else:
+            print(changes.to_string(index=False))
+    elif args.command == "changes":
+        delta = diff_snapshots(store.read_snapshot(args.from_version), store.read_snapshot(args.to_version))
+        write_change_feed(delta, args.output)
+        counts = delta.drop_duplicates(subset=[KEY, "op"])["op"].value_counts()
+        print(f"✅ {len(delta):,} changed cells written to {args.output} "
+              f"({counts.get('insert', 0):,} inserted, {counts.get('update', 0):,} updated, "
+              f"{counts.get('delete', 0):,} deleted properties)")
+
+
+if __name__ == "__main__":
+    main()
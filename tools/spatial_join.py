@@ -0,0 +1,197 @@
+"""
+Assign properties to the polygons of a local boundary file.
+
+Reads polygons from GeoJSON (or a shapefile, with pyshp installed) and
+adds one column naming the polygon each property falls in: ZIP areas,
+census tracts, council districts, etc. Polygons in longitude/latitude are
+matched against LATITUDE/LONGITUDE; polygons in state-plane feet against
+X_STATE_PLANE/Y_STATE_PLANE.
+
+With shapely 2 installed the join uses its STR-tree and vectorized
+predicates. Otherwise points are sorted by x, each polygon's bounding
+box selects its candidate points with a binary search, and only those
+are ray-cast against the polygon's edges with numpy.
+
+The merge joins every file in boundaries/ automatically; the column is
+named after the file (boundaries/council_district.geojson -> council_district).
+
+Usage:
+    python tools/spatial_join.py boundaries/census_tract.geojson --field GEOID
+    python tools/spatial_join.py zips.shp --field ZCTA5CE10 --column zip_area -o with_zips.csv
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import shapely
+    from shapely.geometry import shape
+    if not hasattr(shapely, "STRtree") or not hasattr(shapely, "points"):
+        raise ImportError("shapely 2 required")
+except ImportError:  # optional; the numpy join below is used instead
+    shapely = None
+
+try:
+    import shapefile  # pyshp
+except ImportError:  # optional; only needed for .shp input
+    shapefile = None
+
+BOUNDARIES_DIR = "boundaries"
+NAME_FIELDS = ["name", "NAME", "GEOID", "ZCTA5CE20", "ZCTA5CE10", "DISTRICT", "DIST_NAME", "LABEL", "id"]
+
+
+def read_features(path):
+    """(geometry dict, properties dict) pairs from a GeoJSON or shapefile."""
+    if path.lower().endswith(".shp"):
+        if shapefile is None:
+            raise ImportError("Reading shapefiles needs pyshp (pip install pyshp); or convert to GeoJSON")
+        reader = shapefile.Reader(path)
+        fields = [f[0] for f in reader.fields[1:]]
+        return [(sr.shape.__geo_interface__, dict(zip(fields, sr.record))) for sr in reader.shapeRecords()]
+    with open(path) as f:
+        data = json.load(f)
+    features = data["features"] if data.get("type") == "FeatureCollection" else [data]
+    return [(feat["geometry"], feat.get("properties") or {}) for feat in features if feat.get("geometry")]
+
+
+def pick_name_field(features):
+    properties = features[0][1] if features else {}
+    for field in NAME_FIELDS:
+        if field in properties:
+            return field
+    for field, value in properties.items():
+        if isinstance(value, str):
+            return field
+    return None
+
+
+def polygon_rings(geometry):
+    """Every ring of a Polygon/MultiPolygon as (N, 2) arrays (exterior and holes alike)."""
+    if geometry["type"] == "Polygon":
+        polygons = [geometry["coordinates"]]
+    elif geometry["type"] == "MultiPolygon":
+        polygons = geometry["coordinates"]
+    else:
+        return []
+    return [np.asarray(ring, dtype=float)[:, :2] for polygon in polygons for ring in polygon if len(ring) >= 3]
+
+
+def points_in_rings(px, py, rings):
+    """Even-odd ray casting of many points against a polygon's rings (holes included)."""
+    inside = np.zeros(len(px), dtype=bool)
+    for ring in rings:
+        xi, yi = ring[:, 0], ring[:, 1]
+        xj, yj = np.roll(xi, 1), np.roll(yi, 1)
+        for x1, y1, x2, y2 in zip(xi, yi, xj, yj):
+            if y1 == y2:
+                continue
+            straddles = (y1 > py) != (y2 > py)
+            cross_x = (x2 - x1) * (py - y1) / (y2 - y1) + x1
+            inside ^= straddles & (px < cross_x)
+    return inside
+
+
+def join_numpy(x, y, geometries):
+    """Index of the first polygon containing each point, -1 if none."""
+    result = np.full(len(x), -1, dtype=np.int64)
+    valid = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    order = valid[np.argsort(x[valid], kind="stable")]
+    sorted_x = x[order]
+
+    for g, geometry in enumerate(geometries):
+        rings = polygon_rings(geometry)
+        if not rings:
+            continue
+        coords = np.concatenate(rings)
+        min_x, min_y = coords.min(axis=0)
+        max_x, max_y = coords.max(axis=0)
+        lo = np.searchsorted(sorted_x, min_x, side="left")
+        hi = np.searchsorted(sorted_x, max_x, side="right")
+        candidates = order[lo:hi]
+        candidates = candidates[(y[candidates] >= min_y) & (y[candidates] <= max_y) & (result[candidates] < 0)]
+        if len(candidates):
+            inside = points_in_rings(x[candidates], y[candidates], rings)
+            result[candidates[inside]] = g
+    return result
+
+
+def join_shapely(x, y, geometries):
+    result = np.full(len(x), -1, dtype=np.int64)
+    valid = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    tree = shapely.STRtree([shape(g) for g in geometries])
+    point_idx, geom_idx = tree.query(shapely.points(x[valid], y[valid]), predicate="within")
+    # First polygon (file order) wins where boundaries overlap
+    order = np.lexsort((geom_idx, point_idx))
+    point_idx, geom_idx = point_idx[order], geom_idx[order]
+    first = np.unique(point_idx, return_index=True)[1]
+    result[valid[point_idx[first]]] = geom_idx[first]
+    return result
+
+
+def coordinate_columns(features):
+    """Lon/lat boundaries use LATITUDE/LONGITUDE; anything else is taken as state-plane feet."""
+    for geometry, _ in features:
+        rings = polygon_rings(geometry)
+        if rings:
+            sample = np.abs(rings[0]).max()
+            return ("LONGITUDE", "LATITUDE") if sample <= 180 else ("X_STATE_PLANE", "Y_STATE_PLANE")
+    return ("LONGITUDE", "LATITUDE")
+
+
+def spatial_join(df, path, field=None, column=None):
+    """
+    Add a column with the `field` value of the polygon containing each
+    property (NA outside every polygon). Returns the number matched.
+    """
+    features = read_features(path)
+    field = field or pick_name_field(features)
+    column = column or os.path.splitext(os.path.basename(path))[0]
+    x_col, y_col = coordinate_columns(features)
+    if x_col not in df.columns:
+        raise KeyError(f"{path} needs {x_col}/{y_col} in the dataset")
+
+    x = pd.to_numeric(df[x_col], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    y = pd.to_numeric(df[y_col], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    geometries = [geometry for geometry, _ in features]
+    matches = join_shapely(x, y, geometries) if shapely is not None else join_numpy(x, y, geometries)
+
+    names = np.array([str(props.get(field, i)) if field else str(i) for i, (_, props) in enumerate(features)] + [None],
+                     dtype=object)
+    df[column] = pd.array(names[matches], dtype="string")  # -1 picks the trailing None
+    return int((matches >= 0).sum())
+
+
+def boundary_files(folder=BOUNDARIES_DIR):
+    return sorted(glob.glob(os.path.join(folder, "*.geojson")) + glob.glob(os.path.join(folder, "*.shp")))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Assign properties to polygons from a boundary file")
+    parser.add_argument("boundaries", help="GeoJSON or shapefile")
+    parser.add_argument("--field", help="Polygon property to record (default: guessed)")
+    parser.add_argument("--column", help="Name of the new column (default: file name)")
+    parser.add_argument("--dataset", default="Portland_Assessor_AllNeighborhoods.csv")
+    parser.add_argument("-o", "--output", help="Output CSV (default: overwrite the dataset)")
+    args = parser.parse_args(argv)
+
+    df = pd.read_csv(args.dataset, low_memory=False)
+    started = time.time()
+    matched = spatial_join(df, args.boundaries, args.field, args.column)
+    column = args.column or os.path.splitext(os.path.basename(args.boundaries))[0]
+    print(f"✅ {matched:,} of {len(df):,} properties assigned to a polygon in {time.time() - started:.1f}s "
+          f"({'shapely' if shapely is not None else 'numpy'})")
+    print(df[column].value_counts().head(10).to_string())
+
+    output = args.output or args.dataset
+    df.to_csv(output, index=False)
+    print(f"💾 Saved: {output}")
+
+
+if __name__ == "__main__":
+    main()
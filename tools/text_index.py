@@ -0,0 +1,224 @@
+"""
+Inverted word index over OWNER and LEGAL_DESCRIPTION.
+
+Each field is split into words (runs of letters and digits, upper case).
+For every word the index keeps the sorted row numbers that contain it,
+delta-encoded and compressed in an .npz next to the dataset. A query is
+answered by intersecting or merging those row lists instead of running a
+regex over every row.
+
+Query syntax:
+    TRUST                 rows containing the word
+    SMITH JOHN            all words (AND)
+    LLC OR INC OR CORP*   any group (OR); a trailing * matches by prefix
+    "ALAMEDA PARK"        quotes are ignored; words are ANDed
+
+Usage:
+    python tools/text_index.py "TRUST*" --field OWNER
+    python tools/text_index.py "LAURELHURST BLOCK 12" --field LEGAL_DESCRIPTION --show 5
+    python tools/text_index.py --build
+"""
+
+import argparse
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from arrow_io import read_rows
+
+DEFAULT_DATASET = "Portland_Assessor_AllNeighborhoods.csv"
+FIELDS = ["OWNER", "LEGAL_DESCRIPTION"]
+WORD_PATTERN = r"[^A-Z0-9]+"
+
+
+def tokenize(text):
+    return re.sub(WORD_PATTERN, " ", str(text).upper()).split()
+
+
+def index_path(dataset):
+    return os.path.splitext(dataset)[0] + ".text_index.npz"
+
+
+def _source_signature(dataset):
+    stat = os.stat(dataset)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def _posting_lists(values):
+    """Sorted distinct words, start offsets, and delta-encoded row numbers for one column."""
+    # Tokenize each distinct value once (owners and plats repeat a lot), then expand to rows
+    codes, uniques = pd.factorize(pd.Series(values, dtype="string"))
+    words = (pd.Series(uniques, dtype="string")
+             .str.upper().str.replace(WORD_PATTERN, " ", regex=True).str.split().explode().dropna())
+    word_codes, terms = pd.factorize(words, sort=True)
+    counts = np.bincount(words.index.to_numpy(dtype=np.int64), minlength=len(uniques))
+    offsets = np.cumsum(counts) - counts
+
+    rows = np.flatnonzero(codes >= 0)
+    per_row = counts[codes[rows]]
+    row_starts = np.cumsum(per_row) - per_row
+    positions = np.repeat(offsets[codes[rows]] - row_starts, per_row) + np.arange(per_row.sum())
+    pairs = np.unique(word_codes[positions].astype(np.int64) << 32 | np.repeat(rows, per_row))
+
+    codes, rows = pairs >> 32, pairs & 0xFFFFFFFF  # sorted by word, then row
+    starts = np.searchsorted(codes, np.arange(len(terms) + 1))
+    deltas = np.diff(rows, prepend=0)
+    deltas[starts[:-1]] = rows[starts[:-1]]  # each list starts with an absolute row number
+    return np.asarray(terms, dtype=bytes), starts.astype(np.int64), deltas.astype(np.uint32)
+
+
+def _intersect(rows, other):
+    """Sorted rows present in both sorted arrays (binary search of the shorter in the longer)."""
+    if len(rows) > len(other):
+        rows, other = other, rows
+    if not len(rows):
+        return rows
+    pos = np.minimum(np.searchsorted(other, rows), len(other) - 1)
+    return rows[other[pos] == rows]
+
+
+class TextIndex:
+    """Per-field sorted vocabulary with a row-number posting list for each word."""
+
+    def __init__(self, fields, property_ids, source=None):
+        self.fields = fields            # field -> (terms, starts, deltas)
+        self.property_ids = property_ids
+        self.source = source
+
+    @classmethod
+    def build(cls, df, fields=FIELDS):
+        lists = {field: _posting_lists(df[field]) for field in fields if field in df.columns}
+        property_ids = df["PROPERTY_ID"].astype(str).to_numpy().astype(bytes)
+        return cls(lists, property_ids)
+
+    def save(self, path, dataset=None):
+        arrays = {"property_ids": self.property_ids,
+                  "source": _source_signature(dataset) if dataset else np.zeros(2, dtype=np.int64)}
+        for field, (terms, starts, deltas) in self.fields.items():
+            arrays[f"{field}.terms"], arrays[f"{field}.starts"], arrays[f"{field}.deltas"] = terms, starts, deltas
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            fields = {name[:-len(".terms")]: None for name in data.files if name.endswith(".terms")}
+            for field in fields:
+                fields[field] = (data[f"{field}.terms"], data[f"{field}.starts"], data[f"{field}.deltas"])
+            return cls(fields, data["property_ids"], data["source"])
+
+    def __len__(self):
+        return len(self.property_ids)
+
+    def _union(self, lists):
+        """Sorted union of row lists, through a bitmap over all rows."""
+        if len(lists) == 1:
+            return lists[0]
+        hit = np.zeros(len(self), dtype=bool)
+        for rows in lists:
+            hit[rows] = True
+        return np.flatnonzero(hit)
+
+    def _rows(self, field, lo, hi):
+        """Rows for the words terms[lo:hi] of a field, merged."""
+        terms, starts, deltas = self.fields[field]
+        return self._union([np.cumsum(deltas[starts[i]:starts[i + 1]], dtype=np.int64) for i in range(lo, hi)])
+
+    def word_rows(self, word, field=None):
+        """Rows containing a word (or, ending in *, any word with that prefix)."""
+        prefix = word.endswith("*")
+        key = word.rstrip("*").upper().encode()
+        found = []
+        for name in ([field] if field else list(self.fields)):
+            terms = self.fields[name][0]
+            lo = np.searchsorted(terms, key, side="left")
+            hi = np.searchsorted(terms, key + b"\xff", side="left") if prefix else lo + 1
+            if not prefix and (lo == len(terms) or terms[lo] != key):
+                continue
+            found.append(self._rows(name, lo, hi))
+        return self._union(found)
+
+    def search(self, query, field=None):
+        """Sorted row numbers matching the query (see module docstring for the syntax)."""
+        groups, words = [], []
+        for token in query.replace('"', " ").split():
+            if token.upper() == "OR":
+                groups.append(words)
+                words = []
+            elif token.endswith("*"):
+                parts = tokenize(token[:-1])
+                if parts:
+                    words.extend(parts[:-1] + [parts[-1] + "*"])
+            else:
+                words.extend(tokenize(token))
+        groups.append(words)
+
+        matches = []
+        for words in filter(None, groups):
+            # Intersect the shortest lists first
+            lists = sorted((self.word_rows(word, field) for word in words), key=len)
+            rows = lists[0]
+            for other in lists[1:]:
+                rows = _intersect(rows, other)
+            matches.append(rows)
+        return self._union(matches)
+
+    def mask(self, query, field=None):
+        """Boolean array over the indexed rows, for filtering the frame the index was built from."""
+        mask = np.zeros(len(self), dtype=bool)
+        mask[self.search(query, field)] = True
+        return mask
+
+
+def build_index(dataset=DEFAULT_DATASET, df=None):
+    """Build and save the index for a dataset (reads only the indexed columns if no frame is given)."""
+    if df is None:
+        header = pd.read_csv(dataset, nrows=0).columns
+        df = pd.read_csv(dataset, usecols=[c for c in ["PROPERTY_ID"] + FIELDS if c in header], dtype=str)
+    index = TextIndex.build(df)
+    index.save(index_path(dataset), dataset)
+    index.source = _source_signature(dataset)
+    return index
+
+
+def load_index(dataset=DEFAULT_DATASET, df=None):
+    """The saved index if it matches the dataset file, otherwise a freshly built one."""
+    path = index_path(dataset)
+    if os.path.exists(path):
+        index = TextIndex.load(path)
+        if np.array_equal(index.source, _source_signature(dataset)):
+            return index
+    return build_index(dataset, df)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search OWNER and LEGAL_DESCRIPTION by word")
+    parser.add_argument("query", nargs="?", help='e.g. "TRUST*", "LLC OR INC", "LAURELHURST BLOCK 12"')
+    parser.add_argument("--field", choices=FIELDS, help="Search one field (default: both)")
+    parser.add_argument("--show", type=int, default=10, help="Matching rows to print")
+    parser.add_argument("--build", action="store_true", help="Rebuild the index")
+    parser.add_argument("--dataset", default=DEFAULT_DATASET)
+    args = parser.parse_args(argv)
+
+    started = time.time()
+    index = build_index(args.dataset) if args.build else load_index(args.dataset)
+    vocabulary = sum(len(terms) for terms, _, _ in index.fields.values())
+    print(f"🔎 {len(index):,} rows, {vocabulary:,} distinct words ({time.time() - started:.2f}s to load)")
+    if not args.query:
+        return
+
+    started = time.perf_counter()
+    rows = index.search(args.query, args.field)
+    elapsed = (time.perf_counter() - started) * 1e3
+    print(f"   {len(rows):,} matching rows ({elapsed:.2f} ms)")
+    if len(rows) and args.show:
+        sample = read_rows(args.dataset, np.sort(rows[:args.show]), columns=["PROPERTY_ID", "ADDRESS"] + FIELDS)
+        print(sample.to_string(index=False, max_colwidth=60))
+
+
+if __name__ == "__main__":
+    main()
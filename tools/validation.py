@@ -0,0 +1,216 @@
+"""
+Validation rules for the merged dataset.
+
+Rules are declared once in RULES (ranges from docs/DATA_DICTIONARY.md and
+the filters the analysis scripts used to repeat on their own). The merge
+evaluates them all as vectorized column masks in one pass and stores the
+result in a `validation_flags` column: bit i is set when the row breaks
+RULES[i]. Rows are kept; rows with any flag are also written to
+quarantine/ together with per-rule counts.
+
+Missing values are not violations (completeness is tracked by the quality
+subsets) unless a rule is marked required. The export's placeholders for a
+property that has never sold (SALE_PRICE 0, SALE_DATE 1900-01-01) count as
+missing, so the sale rules only judge actual sales.
+
+    from validation import valid_rows
+    clean = valid_rows(df)                                    # no violations
+    sales = valid_rows(df, ["sale_price_arms_length"])        # actual arm's-length sales
+
+Usage:
+    python tools/validation.py                    # check the dataset, print counts
+    python tools/validation.py --write            # also add flags and write quarantine/
+"""
+
+import argparse
+import json
+import os
+from dataclasses import dataclass
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+FLAGS_COLUMN = "validation_flags"
+QUARANTINE_DIR = "quarantine"
+
+
+@dataclass
+class Rule:
+    name: str
+    column: str
+    description: str
+    minimum: object = None   # inclusive bounds; dates as "YYYY-MM-DD"
+    maximum: object = None
+    kind: str = "number"     # "number", "date" or "text"
+    required: bool = False   # missing values break the rule too
+
+
+RULES = [
+    Rule("property_id_missing", "PROPERTY_ID", "PROPERTY_ID is empty", kind="text", required=True),
+    Rule("zip_code_range", "ZIP_CODE", "ZIP_CODE outside 97001-97299", 97001, 97299),
+    Rule("year_built_plausible", "YEAR_BUILT", "YEAR_BUILT before 1850 or in the future",
+         1850, date.today().year + 1),
+    Rule("square_feet_positive", "SQUARE_FEET", "SQUARE_FEET is zero or negative", 1),
+    Rule("market_value_positive", "MARKET_VALUE", "MARKET_VALUE is zero or negative", 1),
+    Rule("sale_price_arms_length", "SALE_PRICE", "SALE_PRICE under $10,000 (not an arm's-length sale)", 10000),
+    Rule("sale_date_not_future", "SALE_DATE", "SALE_DATE unparseable or in the future",
+         maximum=date.today().isoformat(), kind="date"),
+    Rule("latitude_in_oregon", "LATITUDE", "LATITUDE outside Oregon", 41.9, 46.3),
+    Rule("longitude_in_oregon", "LONGITUDE", "LONGITUDE outside Oregon", -124.7, -116.4),
+]
+
+# Values the export uses in place of an empty cell
+MISSING_SENTINELS = {
+    "SALE_PRICE": [0],
+    "SALE_DATE": ["1900-01-01"],
+}
+
+
+def _values(series, kind):
+    """(values, missing mask, unparseable mask) for one column; sentinels count as missing."""
+    if kind == "date":
+        values = pd.to_datetime(series, errors="coerce", format="ISO8601")
+        sentinels = pd.to_datetime(MISSING_SENTINELS.get(series.name, []))
+    elif kind == "number":
+        values = pd.to_numeric(series, errors="coerce")
+        sentinels = MISSING_SENTINELS.get(series.name, [])
+    else:
+        return series, series.isna().to_numpy(), np.zeros(len(series), dtype=bool)
+    placeholder = values.isin(sentinels).to_numpy()
+    missing = series.isna().to_numpy() | placeholder
+    values = values.mask(placeholder)
+    return values, missing, values.isna().to_numpy() & ~missing
+
+
+def rule_masks(df, rules=RULES):
+    """{rule name: boolean array of rows breaking it}. Each column is converted once."""
+    converted = {}
+    masks = {}
+    for rule in rules:
+        if rule.column not in df.columns:
+            continue
+        key = (rule.column, rule.kind)
+        if key not in converted:
+            converted[key] = _values(df[rule.column], rule.kind)
+        values, missing, unparseable = converted[key]
+
+        broken = unparseable.copy()
+        if rule.required:
+            broken |= missing
+        minimum, maximum = rule.minimum, rule.maximum
+        if rule.kind == "date":
+            minimum = pd.Timestamp(minimum) if minimum is not None else None
+            maximum = pd.Timestamp(maximum) if maximum is not None else None
+        if minimum is not None:
+            broken |= (values < minimum).fillna(False).to_numpy(dtype=bool)
+        if maximum is not None:
+            broken |= (values > maximum).fillna(False).to_numpy(dtype=bool)
+        masks[rule.name] = broken
+    return masks
+
+
+def validation_flags(df, rules=RULES):
+    """int64 bitmask per row; bit i set when the row breaks rules[i]."""
+    masks = rule_masks(df, rules)
+    flags = np.zeros(len(df), dtype=np.int64)
+    for bit, rule in enumerate(rules):
+        if rule.name in masks:
+            flags |= masks[rule.name].astype(np.int64) << bit
+    return flags
+
+
+def rule_bits(names=None, rules=RULES):
+    """Bitmask covering the named rules (all rules if none are named)."""
+    bits = 0
+    for bit, rule in enumerate(rules):
+        if not names or rule.name in names:
+            bits |= 1 << bit
+    return bits
+
+
+def valid_mask(df, *names):
+    """Rows of a flagged dataset that pass the named rules (all rules if none are named)."""
+    flags = pd.to_numeric(df[FLAGS_COLUMN], errors="coerce").fillna(0).astype(np.int64).to_numpy()
+    return (flags & rule_bits(names)) == 0
+
+
+def valid_rows(df, rules=None):
+    """
+    The rows of df that pass the named rules (all rules if none are named).
+    Named rules also need a value in their column, so
+    valid_rows(df, ["sale_price_arms_length"]) is the actual sales. The
+    merge's flags are used when df has them; otherwise the rules are
+    checked here.
+    """
+    names = set(rules or ())
+    unknown = names - {rule.name for rule in RULES}
+    if unknown:
+        raise ValueError(f"unknown validation rule {sorted(unknown)[0]!r}")
+    chosen = [rule for rule in RULES if not names or rule.name in names]
+    if FLAGS_COLUMN in df.columns:
+        keep = valid_mask(df, *names)
+    else:
+        keep = np.ones(len(df), dtype=bool)
+        for broken in rule_masks(df, chosen).values():
+            keep &= ~broken
+    if names:
+        for column, kind in {(rule.column, rule.kind) for rule in chosen if rule.column in df.columns}:
+            keep &= ~_values(df[column], kind)[1]
+    return df[keep]
+
+
+def rule_names(flags, rules=RULES):
+    """Comma-separated rule names for each bitmask."""
+    names = np.full(len(flags), "", dtype=object)
+    for bit, rule in enumerate(rules):
+        hit = (flags >> bit) & 1 == 1
+        names[hit] = names[hit] + rule.name + ","
+    return pd.Series(names).str.rstrip(",")
+
+
+def validate(df, quarantine_dir=QUARANTINE_DIR, rules=RULES):
+    """
+    Add the flags column to df in place, write rows with any violation to
+    quarantine_dir, and return {rule name: rows breaking it}.
+    """
+    flags = validation_flags(df, rules)
+    df[FLAGS_COLUMN] = flags
+    counts = {rule.name: int(((flags >> bit) & 1).sum()) for bit, rule in enumerate(rules)}
+
+    if quarantine_dir:
+        os.makedirs(quarantine_dir, exist_ok=True)
+        flagged = flags != 0
+        quarantined = df[flagged].copy()
+        quarantined["violations"] = rule_names(flags[flagged], rules).to_numpy()
+        quarantined.to_csv(os.path.join(quarantine_dir, "quarantine.csv"), index=False)
+        with open(os.path.join(quarantine_dir, "summary.json"), "w") as f:
+            json.dump({
+                "checked": len(df),
+                "flagged": int(flagged.sum()),
+                "rules": [{"bit": bit, "name": rule.name, "column": rule.column,
+                           "description": rule.description, "rows": counts[rule.name]}
+                          for bit, rule in enumerate(rules)],
+            }, f, indent=2)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the dataset against the validation rules")
+    parser.add_argument("--dataset", default="Portland_Assessor_AllNeighborhoods.csv")
+    parser.add_argument("--write", action="store_true", help="Save the flags column and write quarantine/")
+    args = parser.parse_args(argv)
+
+    df = pd.read_csv(args.dataset, dtype=str)
+    counts = validate(df, QUARANTINE_DIR if args.write else None)
+    flagged = int((df[FLAGS_COLUMN] != 0).sum())
+    print(f"🔍 {len(df):,} rows checked, {flagged:,} with at least one violation")
+    for rule in RULES:
+        print(f"   {rule.name:<26} {counts[rule.name]:>8,}  {rule.description}")
+    if args.write:
+        df.to_csv(args.dataset, index=False)
+        print(f"💾 Flags saved to {args.dataset}; flagged rows in {QUARANTINE_DIR}/")
+
+
+if __name__ == "__main__":
+    main()